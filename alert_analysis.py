@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Streaming alert analysis
+Classifies each device's output once, as it arrives from the poller, and keeps
+set-backed host indexes so the report writers never re-split the full report text
+"""
+
+from collectors import command_parsers
+from temp_parser import parse_env_temp, line_severities, SEVERITY_ORDER
+
+OUTPUT_DELIMITER = '\n --- Output of'
+
+
+def analyze_device_output(hostname, command, output, title=None, platform='auto', collector=None):
+    """
+    Classify one command's output from one device
+
+    Returns a dict with the section title, output, parsed readings, overall severity,
+    a sparse {line index in output: severity} map and the warning/critical detail lines.
+    The output is parsed by collector (a collectors.Collector), or as 'show env temp'.
+    """
+    readings = collector.readings(output, platform) if collector is not None else parse_env_temp(output, platform)
+    severities = line_severities(output, platform, readings)
+    lines = output.split('\n') if severities else ()
+    warning_details = []
+    critical_details = []
+    for lineno in sorted(severities):
+        detail = f"{hostname}: {lines[lineno].strip()}"
+        if severities[lineno] == 'critical':
+            critical_details.append(detail)
+        else:
+            warning_details.append(detail)
+
+    severity = max(severities.values(), key=SEVERITY_ORDER.get, default='ok')
+    return {
+        'kind': 'output',
+        'hostname': hostname,
+        'command': command,
+        'collector': collector.name if collector is not None else 'temp',
+        'title': title if title is not None else f" --- Output of {command} on {hostname} ",
+        'output': output,
+        'readings': readings,
+        'severity': severity,
+        'line_severities': severities,
+        'warning_details': warning_details,
+        'critical_details': critical_details,
+    }
+
+
+def error_record(host, error, skipped=False):
+    """
+    Report entry for a switch that could not be polled, or was skipped by the circuit breaker
+    """
+    return {
+        'kind': 'error',
+        'hostname': host,
+        'command': None,
+        'collector': None,
+        'title': f" --- {'Not polled' if skipped else 'Error connecting to'} {host}: {error}",
+        'error': error,
+        'output': '',
+        'readings': [],
+        'severity': 'ok',
+        'line_severities': {},
+        'warning_details': [],
+        'critical_details': [],
+    }
+
+
+def analyze_poll_result(result, platform='auto', collectors=None):
+    """
+    Turn one poller result into its report entries (one per command, plus any error)
+    With collectors, each command's output is parsed by the collector that asked for it.
+    """
+    parsers = command_parsers(collectors) if collectors else {}
+    records = [analyze_device_output(result['hostname'], command, output, platform=platform,
+                                     collector=parsers.get(command))
+               for command, output in result['outputs']]
+    if result['error']:
+        records.append(error_record(result['host'], result['error'], skipped=result.get('skipped', False)))
+    return records
+
+
+def analyses_from_text(text_content):
+    """
+    Split a legacy report string into its header and per-device analyses (one pass)
+    """
+    sections = text_content.split(OUTPUT_DELIMITER)
+    analyses = []
+    for section in sections[1:]:  # Skip first section (timestamp)
+        first_line, _, output = section.partition('\n')
+        hostname = "Unknown"
+        command = first_line.strip()
+        # Extract hostname from first line
+        if 'on ' in first_line:
+            hostname = first_line.split(' on ')[-1].strip()
+            command = first_line.split(' on ')[0].strip()
+        analyses.append(analyze_device_output(hostname, command, output, title=" --- Output of" + first_line))
+    return sections[0], analyses
+
+
+class AlertIndex:
+    """
+    Incrementally built alert summary; host membership checks are O(1) set lookups
+    """
+
+    def __init__(self):
+        self.warning_hosts = []
+        self.critical_hosts = []
+        self.warning_details = []
+        self.critical_details = []
+        self.records = []
+        self._warning_set = set()
+        self._critical_set = set()
+
+    def add(self, analysis, keep_record=True):
+        """
+        Fold one device analysis into the index (critical takes precedence over warning)
+        """
+        if keep_record:
+            self.records.append(analysis)
+        if analysis['kind'] != 'output':
+            return
+
+        hostname = analysis['hostname']
+        self.warning_details.extend(analysis['warning_details'])
+        self.critical_details.extend(analysis['critical_details'])
+
+        if analysis['severity'] == 'critical' and hostname not in self._critical_set:
+            self._critical_set.add(hostname)
+            self.critical_hosts.append(hostname)
+            if hostname in self._warning_set:
+                self._warning_set.discard(hostname)
+                self.warning_hosts.remove(hostname)
+        elif (analysis['severity'] == 'warning' and hostname not in self._warning_set
+              and hostname not in self._critical_set):
+            self._warning_set.add(hostname)
+            self.warning_hosts.append(hostname)
+
+    def add_result(self, result, platform='auto', collectors=None):
+        """
+        Analyze a poller result and add it; suitable as the poller's on_result callback
+        """
+        for analysis in analyze_poll_result(result, platform, collectors):
+            self.add(analysis)
+
+    def host_severity(self, hostname):
+        if hostname in self._critical_set:
+            return 'critical'
+        if hostname in self._warning_set:
+            return 'warning'
+        return 'ok'
+
+    def summary(self):
+        """
+        Same tuple shape as analyze_output_for_alerts
+        """
+        return self.warning_hosts, self.critical_hosts, self.warning_details, self.critical_details
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Persistent alert state machine
+Tracks every (switch, sensor) through OK -> WARNING -> CRITICAL -> RECOVERED across
+sweeps, with a hysteresis band, N-consecutive-sample confirmation and a re-notify
+interval, so a sensor sitting on its threshold doesn't raise an alarm every sweep
+"""
+
+import os
+import sqlite3
+import time
+import logging
+
+from temp_parser import SEVERITY_ORDER, sensor_key, reading_severity
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALERT_STATE_DB = 'alert_state.db'
+DEFAULT_HYSTERESIS = 2.0
+DEFAULT_CONFIRM_SAMPLES = 2
+DEFAULT_CRITICAL_CONFIRM_SAMPLES = 1
+DEFAULT_RENOTIFY_INTERVAL = 4 * 3600
+# Sensors not seen for this long (decommissioned switches or modules) are forgotten
+DEFAULT_EXPIRE_AFTER = 7 * 86400
+
+# last_seen is only rewritten once it is this stale, so a steady-state sweep writes nothing for healthy sensors
+SEEN_RESOLUTION = 3600
+
+ALERT_STATES = ('ok', 'warning', 'critical', 'recovered')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sensor_state (
+    host TEXT NOT NULL,
+    sensor TEXT NOT NULL,
+    state TEXT NOT NULL,
+    candidate TEXT,
+    streak INTEGER NOT NULL DEFAULT 0,
+    since INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    last_notified INTEGER,
+    PRIMARY KEY (host, sensor)
+) WITHOUT ROWID;
+"""
+
+UPSERT_STATE = """
+INSERT OR REPLACE INTO sensor_state (host, sensor, state, candidate, streak, since, last_seen, last_notified)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def held_severity(reading, current, hysteresis):
+    """
+    Severity of a reading given the sensor's confirmed state
+
+    Getting worse takes effect at the threshold; getting better needs the temperature
+    to fall `hysteresis` degrees below the threshold that raised the alert.
+    """
+    raw = reading_severity(reading)
+    if SEVERITY_ORDER[raw] >= SEVERITY_ORDER[current] or reading.celsius is None:
+        return raw
+    if current == 'critical' and reading.red is not None and reading.celsius > reading.red - hysteresis:
+        return 'critical'
+    if reading.yellow is not None and reading.celsius > reading.yellow - hysteresis:
+        return 'warning'
+    return raw
+
+
+class AlertStateMachine:
+    """
+    Per-sensor alert states, loaded into memory once per sweep and written back in one
+    transaction (only rows that changed), so tens of thousands of sensors update in milliseconds
+
+    Each row is [state, candidate, streak, since, last_seen, last_notified]; the latest
+    temperatures are only kept in memory for the report.
+    """
+
+    def __init__(self, path=DEFAULT_ALERT_STATE_DB, hysteresis=DEFAULT_HYSTERESIS, confirm=DEFAULT_CONFIRM_SAMPLES,
+                 critical_confirm=DEFAULT_CRITICAL_CONFIRM_SAMPLES, renotify_interval=DEFAULT_RENOTIFY_INTERVAL,
+                 expire_after=DEFAULT_EXPIRE_AFTER):
+        self.path = path
+        self.expire_after = expire_after
+        self.hysteresis = hysteresis
+        self.confirm = max(1, int(confirm))
+        self.critical_confirm = max(1, int(critical_confirm))
+        self.renotify_interval = renotify_interval
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.sensors = {(host, sensor): list(row) for host, sensor, *row in
+                        self.conn.execute('SELECT * FROM sensor_state')}
+        self._original = {key: tuple(row) for key, row in self.sensors.items()}
+        self.celsius = {}
+        self.transitions = []
+        self._seen_hosts = set()
+        self._ts = None
+
+    @classmethod
+    def from_env(cls, **overrides):
+        settings = {
+            'path': os.getenv('ALERT_STATE_DB', DEFAULT_ALERT_STATE_DB),
+            'hysteresis': float(os.getenv('ALERT_HYSTERESIS', str(DEFAULT_HYSTERESIS))),
+            'confirm': int(os.getenv('ALERT_CONFIRM_SAMPLES', str(DEFAULT_CONFIRM_SAMPLES))),
+            'critical_confirm': int(os.getenv('ALERT_CRITICAL_CONFIRM_SAMPLES', str(DEFAULT_CRITICAL_CONFIRM_SAMPLES))),
+            'renotify_interval': float(os.getenv('ALERT_RENOTIFY_INTERVAL', str(DEFAULT_RENOTIFY_INTERVAL))),
+            'expire_after': float(os.getenv('ALERT_STATE_EXPIRE', str(DEFAULT_EXPIRE_AFTER))),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def begin_sweep(self, ts=None):
+        self._ts = int(ts if ts is not None else time.time())
+        self.celsius = {}
+        self.transitions = []
+        self._seen_hosts = set()
+
+    def observe(self, host, readings):
+        """
+        Feed one device's parsed readings through the state machine
+        """
+        ts = self._ts
+        self._seen_hosts.add(host)
+        # A sensor can be reported twice (e.g. IOS 'SYSTEM TEMPERATURE is OK' plus its value block):
+        # keep the worst reading per sensor, preferring one with a temperature
+        worst = {}
+        for reading in readings:
+            rank = (SEVERITY_ORDER[reading_severity(reading)], reading.celsius is not None)
+            name = sensor_key(reading)
+            if name not in worst or rank > worst[name][0]:
+                worst[name] = (rank, reading)
+
+        for name, (_, reading) in worst.items():
+            key = (host, name)
+            row = self.sensors.get(key)
+            if row is None:
+                row = self.sensors[key] = ['ok', None, 0, ts, ts, None]
+            state = row[0]
+            base = 'ok' if state == 'recovered' else state
+            candidate = held_severity(reading, base, self.hysteresis)
+            if ts - row[4] >= SEEN_RESOLUTION:
+                row[4] = ts
+            self.celsius[key] = reading.celsius
+
+            if candidate == base:
+                row[1], row[2] = None, 0
+                if state == 'recovered':
+                    row[0] = 'ok'  # RECOVERED is reported once, then settles to OK
+                continue
+
+            row[2] = row[2] + 1 if row[1] == candidate else 1
+            row[1] = candidate
+            needed = self.critical_confirm if candidate == 'critical' else self.confirm
+            if row[2] < needed:
+                continue
+
+            new_state = 'recovered' if candidate == 'ok' else candidate
+            self.transitions.append({'host': host, 'sensor': key[1], 'before': base, 'after': new_state,
+                                     'celsius': reading.celsius})
+            row[0], row[1], row[2], row[3] = new_state, None, 0, ts
+            if new_state != 'recovered':
+                row[5] = None  # a new alert level is always notified
+
+    def tracks(self, host):
+        """
+        True if this sweep produced parsed readings for the host
+        """
+        return host in self._seen_hosts
+
+    def alerts(self, hosts=None):
+        """
+        Confirmed warning/critical sensors: [(host, sensor, state, celsius)]
+        Only switches in hosts count, by default those observed this sweep, so a switch that
+        was unreachable, renamed or removed doesn't keep its last alert.
+        """
+        hosts = self._seen_hosts if hosts is None else hosts
+        return [(host, sensor, row[0], self.celsius.get((host, sensor))) for (host, sensor), row in self.sensors.items()
+                if row[0] in ('warning', 'critical') and host in hosts]
+
+    def due_notifications(self, ts=None):
+        """
+        Sensors in alert on switches observed this sweep that were never notified at this level
+        or whose re-notify interval has passed
+        """
+        ts = self._ts if ts is None else ts
+        due = []
+        for (host, sensor), row in self.sensors.items():
+            if row[0] not in ('warning', 'critical') or host not in self._seen_hosts:
+                continue
+            if row[5] is None or (self.renotify_interval and ts - row[5] >= self.renotify_interval):
+                due.append((host, sensor))
+        return due
+
+    def recoveries(self):
+        return [t for t in self.transitions if t['after'] == 'recovered']
+
+    def mark_notified(self, keys, ts=None):
+        ts = self._ts if ts is None else ts
+        for key in keys:
+            row = self.sensors.get(key)
+            if row is not None:
+                row[5] = ts
+
+    def summary(self, alert_index):
+        """
+        Host lists and detail lines in AlertIndex.summary() shape, using confirmed states for
+        switches with parsed readings and the raw per-sweep classification for the rest
+        """
+        confirmed = {}
+        for host, sensor, state, celsius in self.alerts():
+            if self.tracks(host):
+                confirmed.setdefault(host, []).append((sensor, state, celsius))
+
+        warning_hosts, critical_hosts, warning_details, critical_details = [], [], [], []
+        for host in sorted(confirmed):
+            sensors = confirmed[host]
+            worst = 'critical' if any(state == 'critical' for _, state, _ in sensors) else 'warning'
+            (critical_hosts if worst == 'critical' else warning_hosts).append(host)
+            for sensor, state, celsius in sorted(sensors):
+                reading = f"{celsius:g}C" if celsius is not None else 'no reading'
+                detail = f"{host}: {sensor} {reading} ({state.upper()})"
+                (critical_details if state == 'critical' else warning_details).append(detail)
+
+        raw_warning, raw_critical, raw_warning_details, raw_critical_details = alert_index.summary()
+        for host in raw_critical:
+            if not self.tracks(host):
+                critical_hosts.append(host)
+        for host in raw_warning:
+            if not self.tracks(host):
+                warning_hosts.append(host)
+        untracked = set(raw_warning + raw_critical) - self._seen_hosts
+        warning_details += [d for d in raw_warning_details if d.split(':', 1)[0] in untracked]
+        critical_details += [d for d in raw_critical_details if d.split(':', 1)[0] in untracked]
+        return warning_hosts, critical_hosts, warning_details, critical_details
+
+    def save(self):
+        """
+        Write back only the rows that changed this sweep
+        """
+        changed = [(host, sensor, *row) for (host, sensor), row in self.sensors.items()
+                   if self._original.get((host, sensor)) != tuple(row)]
+        with self.conn:
+            self.conn.executemany(UPSERT_STATE, changed)
+        self._original = {key: tuple(row) for key, row in self.sensors.items()}
+        return len(changed)
+
+    def prune(self, older_than):
+        """
+        Forget sensors not seen since the given epoch time (decommissioned switches or modules);
+        last_seen is only accurate to SEEN_RESOLUTION
+        """
+        stale = [key for key, row in self.sensors.items() if row[4] < older_than]
+        for key in stale:
+            del self.sensors[key]
+            self._original.pop(key, None)
+        with self.conn:
+            self.conn.execute('DELETE FROM sensor_state WHERE last_seen < ?', (int(older_than),))
+        return len(stale)
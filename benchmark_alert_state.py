@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the persisted alert state machine
+Runs several sweeps over tens of thousands of sensors and times load, observe and save
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from alert_state import AlertStateMachine
+from temp_parser import TempReading
+
+
+def build_fleet(switches, sensors_per_switch):
+    return [(f'SW-{n}', [f'Sensor {s}' for s in range(sensors_per_switch)]) for n in range(switches)]
+
+
+def run_sweep(path, fleet, ts, rng, hot_fraction):
+    """One sweep: returns (load, observe, save) seconds and the number of rows written"""
+    start = time.perf_counter()
+    machine = AlertStateMachine(path)
+    loaded = time.perf_counter()
+    machine.begin_sweep(ts)
+    for host, sensors in fleet:
+        readings = [TempReading(sensor, rng.uniform(60, 70) if rng.random() < hot_fraction else rng.uniform(30, 40),
+                                66, 76, 'GREEN', None, '', 0) for sensor in sensors]
+        machine.observe(host, readings)
+    observed = time.perf_counter()
+    written = machine.save()
+    saved = time.perf_counter()
+    machine.close()
+    return loaded - start, observed - loaded, saved - observed, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the alert state machine')
+    parser.add_argument('--switches', type=int, default=5000, help='Number of switches (default: 5000)')
+    parser.add_argument('--sensors', type=int, default=10, help='Sensors per switch (default: 10)')
+    parser.add_argument('--sweeps', type=int, default=5, help='Number of sweeps (default: 5)')
+    parser.add_argument('--hot', type=float, default=0.02,
+                        help='Fraction of readings around the yellow threshold (default: 0.02)')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    fleet = build_fleet(args.switches, args.sensors)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'alert_state.db')
+        print(f"\n{args.switches * args.sensors} sensors, {args.hot:.0%} near the yellow threshold")
+        print(f"{'Sweep':>5} {'Load ms':>9} {'Observe ms':>11} {'Save ms':>9} {'Rows written':>13}")
+        for sweep in range(args.sweeps):
+            load, observe, save, written = run_sweep(path, fleet, sweep * 300, rng, args.hot)
+            print(f"{sweep + 1:>5} {load * 1000:>9.1f} {observe * 1000:>11.1f} {save * 1000:>9.1f} {written:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark sequential vs batched (pipelined) commands against simulated switches
+Each switch is polled over real SSH (netmiko against fake_cisco_ssh) with a network
+round trip added to every exchange. Sessions are opened by a warm-up sweep and kept
+in a session pool, so the timed sweeps measure the command phase
+"""
+
+import argparse
+import logging
+import time
+
+from collectors import collector_commands, load_collectors
+from fake_cisco_ssh import FakeCiscoSSHServer, build_fleet, inventory_for
+from poller import poll_switches
+from session_pool import SessionPool
+
+
+def run_benchmark(switch_count, round_trips, commands, workers, sweeps=2):
+    """
+    Time pooled sweeps per round trip and mode: [(rtt, mode, sweep seconds, command seconds per switch)]
+    """
+    fleet = build_fleet(switch_count)
+    rows = []
+    for rtt in round_trips:
+        with FakeCiscoSSHServer(fleet, round_trip=rtt) as server:
+            inventory = inventory_for(fleet, server.port)
+            pool = SessionPool(max_sessions=switch_count, keepalive=0)
+            try:
+                poll_switches(inventory, commands, max_workers=workers, timeout=30, pool=pool)
+                for mode, batch in (('sequential', False), ('batched', True)):
+                    for _ in range(sweeps):
+                        start = time.perf_counter()
+                        results = poll_switches(inventory, commands, max_workers=workers, timeout=30, pool=pool,
+                                                batch=batch)
+                        elapsed = time.perf_counter() - start
+                        assert all(result['error'] is None for result in results)
+                        assert all(len(result['outputs']) == len(commands) for result in results)
+                        per_switch = sum(seconds for result in results for _, seconds in result['command_times'])
+                        rows.append((rtt, mode, elapsed, per_switch / len(results)))
+            finally:
+                pool.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched vs sequential show commands over simulated SSH')
+    parser.add_argument('--switches', type=int, default=20, help='Number of simulated switches (default: 20)')
+    parser.add_argument('--round-trips', default='0,0.05,0.2',
+                        help='Comma-separated network round trips in seconds (default: 0,0.05,0.2)')
+    parser.add_argument('--collectors', default='temp,fans,power',
+                        help='Collectors whose commands are sent (default: temp,fans,power)')
+    parser.add_argument('--workers', type=int, default=20, help='Poller workers (default: 20)')
+    parser.add_argument('--sweeps', type=int, default=2, help='Timed sweeps per mode (default: 2)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+    commands = collector_commands(load_collectors(args.collectors))
+    round_trips = [float(rtt) for rtt in args.round_trips.split(',')]
+    rows = run_benchmark(args.switches, round_trips, commands, args.workers, args.sweeps)
+
+    print(f"\n{args.switches} simulated switches, {len(commands)} commands each ({', '.join(commands)})")
+    print(f"{'RTT ms':>7} {'Mode':<11} {'Sweep s':>8} {'Commands s/switch':>18} {'Speedup':>8}")
+    sequential = {}
+    for rtt, mode, elapsed, per_switch in rows:
+        baseline = sequential.setdefault(rtt, per_switch) if mode == 'sequential' else sequential[rtt]
+        print(f"{rtt * 1000:>7.0f} {mode:<11} {elapsed:>8.2f} {per_switch:>18.3f} {baseline / per_switch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for loading the switch inventory
+Each variant runs in a fresh interpreter so import time and memory are counted
+the way a cron-launched run pays them
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from openpyxl import Workbook
+
+from benchmark_poller import make_inventory
+
+VARIANTS = {
+    'baseline (python only)': "pass",
+    'pandas read_excel': (
+        "import pandas as pd\n"
+        "switches = pd.read_excel(PATH, engine='openpyxl').to_dict(orient='records')"
+    ),
+    'inventory.py (openpyxl)': (
+        "from inventory import load_inventory\n"
+        "switches = load_inventory(PATH)"
+    ),
+    'inventory.py (cached)': (
+        "from inventory import load_inventory, InventoryCache\n"
+        "switches = load_inventory(PATH, cache=InventoryCache(CACHE))"
+    ),
+}
+
+CHILD = """
+import time
+start = time.perf_counter()
+PATH, CACHE = {path!r}, {cache!r}
+{body}
+elapsed = time.perf_counter() - start
+import json
+# VmHWM is this process's own peak; ru_maxrss would include the parent's peak carried over the exec
+with open('/proc/self/status') as f:
+    peak_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM'))
+print(json.dumps({{'seconds': elapsed, 'rss_mb': peak_kb / 1024}}))
+"""
+
+
+def write_workbook(path, count):
+    workbook = Workbook()
+    sheet = workbook.active
+    inventory = make_inventory(count)
+    columns = list(inventory[0]) + ['port', 'secret']
+    sheet.append(columns)
+    for switch in inventory:
+        sheet.append([switch.get(col, 22 if col == 'port' else 'enable') for col in columns])
+    workbook.save(path)
+
+
+def run_variant(body, path, cache, repeats):
+    code = CHILD.format(path=path, cache=cache, body=body)
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env)
+        wall = time.perf_counter() - start
+        runs.append((wall, json.loads(output.stdout.strip().splitlines()[-1])))
+    return (statistics.median(wall for wall, _ in runs),
+            statistics.median(run['seconds'] for _, run in runs),
+            max(run['rss_mb'] for _, run in runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare inventory load time: pandas vs inventory.py')
+    parser.add_argument('--switches', type=int, default=500, help='Rows in the generated workbook (default: 500)')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per variant, median reported (default: 5)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'switchFile.xlsx')
+        cache = os.path.join(tmp, 'inventory_cache.json')
+        write_workbook(path, args.switches)
+        # Warm the cache once so the cached variant measures the steady state
+        subprocess.run([sys.executable, '-c', CHILD.format(path=path, cache=cache,
+                                                           body=VARIANTS['inventory.py (cached)'])],
+                       capture_output=True, check=True,
+                       env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__))))
+
+        print(f"\nLoading a {args.switches}-switch workbook in a fresh interpreter (median of {args.repeats})")
+        print(f"{'Variant':<26} {'Process s':>10} {'Load s':>8} {'Peak RSS MB':>12}")
+        for name, body in VARIANTS.items():
+            try:
+                wall, seconds, rss = run_variant(body, path, cache, args.repeats)
+            except subprocess.CalledProcessError:
+                print(f"{name:<26} {'not available':>32}")
+                continue
+            print(f"{name:<26} {wall:>10.3f} {seconds:>8.3f} {rss:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
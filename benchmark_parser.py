@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the 'show env temp' parser
+Parses a corpus of thousands of outputs and compares it with the old keyword scan
+"""
+
+import argparse
+import glob
+import random
+import time
+
+from temp_parser import parse_env_temp, reading_severity, legacy_line_severity
+
+# Representative captures for each supported platform; {t1}/{t2} are filled with random readings
+SAMPLE_OUTPUTS = {
+    'ios': """SYSTEM TEMPERATURE is OK
+System Temperature Value: {t1} Degree Celsius
+System Temperature State: GREEN
+Yellow Threshold : 66 Degree Celsius
+Red Threshold    : 76 Degree Celsius""",
+
+    'iosxe_stack': """Switch 1: SYSTEM TEMPERATURE is OK
+Inlet Temperature Value: {t1} Degree Celsius
+Temperature State: GREEN
+Yellow Threshold : 46 Degree Celsius
+Red Threshold    : 56 Degree Celsius
+
+Hotspot Temperature Value: {t2} Degree Celsius
+Temperature State: GREEN
+Yellow Threshold : 105 Degree Celsius
+Red Threshold    : 125 Degree Celsius
+Switch 2: SYSTEM TEMPERATURE is OK
+Inlet Temperature Value: {t1} Degree Celsius
+Temperature State: GREEN
+Yellow Threshold : 46 Degree Celsius
+Red Threshold    : 56 Degree Celsius""",
+
+    'iosxe_c9k': """Sensor List:  Environmental Monitoring
+ Sensor           Location          State             Reading       Range(min-max)
+ Temp: Inlet      R0                Normal            {t1} Celsius     (35,40,45)(Celsius)
+ Temp: Coretemp   R0                Normal            {t2} Celsius     (107,117,123)(Celsius)""",
+
+    'nxos': """Temperature:
+--------------------------------------------------------------------
+Module   Sensor        MajorThresh   MinorThres   CurTemp     Status
+                       (Celsius)     (Celsius)    (Celsius)
+--------------------------------------------------------------------
+1        FRONT           80              70          {t1}         Ok
+1        BACK            70              42          {t2}         Ok
+1        CPU             90              80          {t2}         Ok""",
+
+    'table': """Temperature Status: Ok
+Sensor                 Status          Reading
+System Inlet           OK              {t1} Celsius
+System Outlet          OK              {t2} Celsius
+CPU Temperature        OK              42 Celsius""",
+}
+
+
+def build_corpus(size, seed=1):
+    """
+    Generate size synthetic outputs plus any captured device_output_*.txt sections in the current directory
+    """
+    rng = random.Random(seed)
+    templates = list(SAMPLE_OUTPUTS.values())
+    corpus = [rng.choice(templates).format(t1=rng.randint(20, 60), t2=rng.randint(30, 90)) for _ in range(size)]
+    for path in glob.glob('device_output_*.txt'):
+        with open(path) as f:
+            corpus.extend(section for section in f.read().split('\n --- Output of')[1:])
+    return corpus
+
+
+def run_parser(corpus):
+    alerts = 0
+    for output in corpus:
+        for reading in parse_env_temp(output):
+            if reading_severity(reading) != 'ok':
+                alerts += 1
+    return alerts
+
+
+def run_keyword_scan(corpus):
+    alerts = 0
+    for output in corpus:
+        for line in output.split('\n'):
+            if legacy_line_severity(line) != 'ok':
+                alerts += 1
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the 'show env temp' parser")
+    parser.add_argument('--size', type=int, default=5000, help='Number of synthetic outputs (default: 5000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Best-of-N timing (default: 3)')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size)
+    total_lines = sum(output.count('\n') + 1 for output in corpus)
+    print(f"\nCorpus: {len(corpus)} outputs, {total_lines} lines")
+    print(f"{'Method':<16} {'Best (ms)':>10} {'Outputs/s':>12} {'Alerts':>8}")
+
+    for name, func in (('parser', run_parser), ('keyword scan', run_keyword_scan)):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            alerts = func(corpus)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:<16} {best * 1000:>10.1f} {len(corpus) / best:>12.0f} {alerts:>8}")
+
+
+if __name__ == "__main__":
+    main()
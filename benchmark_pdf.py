@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark for report rendering
+Renders a synthetic fleet report in each PDF mode and as the HTML email body, and
+reports wall time, peak memory and output size
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from alert_analysis import AlertIndex, analyze_device_output
+from benchmark_parser import build_corpus
+from html_report import render_report
+from pdf_report import create_pdf_report, PDF_RENDER_MODES
+
+# Not a PDF mode: the HTML email body that replaces the PDF by default
+HTML_MODE = 'html'
+
+
+def build_fleet(switch_count):
+    """
+    Synthetic analysed results for switch_count switches
+    """
+    alert_index = AlertIndex()
+    for number, output in enumerate(build_corpus(switch_count)[:switch_count]):
+        alert_index.add(analyze_device_output(f'SW-{number:04d}', 'show env temp', output))
+    return alert_index
+
+
+def render(alert_index, mode, pdf_filename):
+    warning_hosts, critical_hosts, warning_details, critical_details = alert_index.summary()
+    if mode == HTML_MODE:
+        body = render_report(alert_index.records, alert_index.summary(), 'benchmark')
+        with open(pdf_filename, 'w', encoding='utf-8') as f:
+            f.write(body)
+        return
+    ok = create_pdf_report('Start Script at Time: benchmark\n', pdf_filename, warning_hosts, critical_hosts,
+                           warning_details, critical_details, device_analyses=alert_index.records,
+                           render_mode=mode)
+    assert ok, f"PDF rendering failed in {mode} mode"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PDF and HTML report rendering for a synthetic fleet')
+    parser.add_argument('--switches', type=int, default=1000, help='Number of synthetic switches (default: 1000)')
+    parser.add_argument('--modes', default=','.join(PDF_RENDER_MODES + (HTML_MODE,)),
+                        help='Comma-separated render modes (PDF modes and html)')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    alert_index = build_fleet(args.switches)
+
+    print(f"\nReport for {args.switches} synthetic switches")
+    print(f"{'Mode':<10} {'Seconds':>9} {'Peak MB':>9} {'Size KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes.split(','):
+            pdf_filename = os.path.join(tmp, f"{mode}.{'html' if mode == HTML_MODE else 'pdf'}")
+
+            start = time.perf_counter()
+            render(alert_index, mode, pdf_filename)
+            elapsed = time.perf_counter() - start
+
+            # Separate pass for memory, since tracing allocations slows rendering down
+            tracemalloc.start()
+            render(alert_index, mode, pdf_filename)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            size = os.path.getsize(pdf_filename)
+            print(f"{mode:<10} {elapsed:>9.3f} {peak / 1e6:>9.1f} {size / 1e3:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the concurrent polling engine
+Uses a fake SSH device with fixed connect/command latency to compare sweep wall-time
+"""
+
+import argparse
+import logging
+import time
+
+from poller import poll_switches
+from session_pool import SessionPool
+
+SAMPLE_OUTPUT = """Temperature Status: Ok
+Sensor                 Status          Reading
+System Inlet           OK              23 Celsius
+System Outlet          OK              28 Celsius
+CPU Temperature        OK              42 Celsius"""
+
+
+class FakeSSHDevice:
+    """
+    Stand-in for a netmiko connection that sleeps instead of talking to a switch
+    """
+
+    def __init__(self, connect_latency=0.05, command_latency=0.02, **switch):
+        time.sleep(connect_latency)
+        self.host = switch.get('host', 'Unknown')
+        self.base_prompt = f"SW-{self.host.replace('.', '-')}"
+        self.command_latency = command_latency
+        self.commands_sent = []
+        self.alive = True
+
+    def send_command(self, command, **kwargs):
+        time.sleep(self.command_latency)
+        self.commands_sent.append(command)
+        if command.startswith('sh run | i host'):
+            return f"hostname {self.base_prompt}"
+        return SAMPLE_OUTPUT
+
+    def is_alive(self):
+        return self.alive
+
+    def disconnect(self):
+        self.alive = False
+
+
+def make_inventory(count):
+    """
+    Build a synthetic inventory of the given size
+    """
+    return [
+        {'device_type': 'cisco_ios', 'host': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}',
+         'username': 'admin', 'password': 'password'}
+        for i in range(count)
+    ]
+
+
+def run_benchmark(switch_count, worker_counts, backend, connect_latency, command_latency, sweeps=1, pooled=False):
+    """
+    Time consecutive sweeps per worker count and return [(workers, [seconds per sweep])]
+    With pooled=True the sessions opened by the first sweep are reused by the later ones.
+    """
+    inventory = make_inventory(switch_count)
+
+    def connect(**params):
+        return FakeSSHDevice(connect_latency, command_latency, **params)
+
+    timings = []
+    for workers in worker_counts:
+        pool = SessionPool(connect=connect, max_sessions=switch_count, keepalive=0) if pooled else None
+        sweep_times = []
+        for _ in range(sweeps):
+            start = time.perf_counter()
+            results = poll_switches(inventory, ['show env temp'], max_workers=workers,
+                                    backend=backend, connect=connect, pool=pool)
+            sweep_times.append(time.perf_counter() - start)
+            assert [r['host'] for r in results] == [s['host'] for s in inventory]
+        if pool is not None:
+            pool.close()
+        timings.append((workers, sweep_times))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sweep wall-time against fake SSH devices')
+    parser.add_argument('--switches', type=int, default=200, help='Number of fake switches (default: 200)')
+    parser.add_argument('--workers', default='1,16,64', help='Comma-separated worker counts (default: 1,16,64)')
+    parser.add_argument('--backend', default='thread', choices=['thread', 'asyncio'])
+    parser.add_argument('--connect-latency', type=float, default=0.05, help='Seconds per SSH connect')
+    parser.add_argument('--command-latency', type=float, default=0.02, help='Seconds per command')
+    parser.add_argument('--sweeps', type=int, default=1, help='Consecutive sweeps per worker count (default: 1)')
+    parser.add_argument('--pool', action='store_true', help='Reuse SSH sessions between sweeps (daemon mode)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    worker_counts = [int(w) for w in args.workers.split(',')]
+    timings = run_benchmark(args.switches, worker_counts, args.backend,
+                            args.connect_latency, args.command_latency, args.sweeps, args.pool)
+
+    baseline = timings[0][1][0]
+    pooled = ', pooled sessions' if args.pool else ''
+    print(f"\nSweep of {args.switches} fake switches ({args.backend} backend{pooled})")
+    print(f"{'Workers':>8} {'Sweep':>6} {'Seconds':>10} {'Switches/s':>12} {'Speedup':>9}")
+    for workers, sweep_times in timings:
+        for number, elapsed in enumerate(sweep_times, start=1):
+            print(f"{workers:>8} {number:>6} {elapsed:>10.2f} {args.switches / elapsed:>12.1f} {baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
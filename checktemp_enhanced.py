@@ -1,18 +1,20 @@
-from netmiko import ConnectHandler
-import pandas as pd
+import argparse
 import datetime
+import functools
 import time
 import os
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Preformatted
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 import logging
+import tracing
+from poller import poll_switches, DEFAULT_MAX_WORKERS
+from hostname_cache import HostnameCache, DEFAULT_CACHE_FILE, DEFAULT_TTL
+from alert_analysis import AlertIndex, analyses_from_text, analyze_poll_result
+from collectors import load_collectors, collector_commands, device_record, COLLECTORS
+from report_sink import ReportSink
+from scheduler import InventoryWatcher, parse_schedule, run_daemon
+from session_pool import SessionPool
+from inventory import load_inventory, inventory_cache_from_env, DEFAULT_INVENTORY_FILE, TAG_FIELDS
+from delta_report import (DeltaTracker, DeltaState, diff, summarize_changes, DELTA_MODES, DEFAULT_DELTA_STATE_FILE,
+                          DEFAULT_FULL_REPORT_EVERY)
 
 # Try to load .env file if python-dotenv is available
 try:
@@ -32,245 +34,84 @@ def analyze_output_for_alerts(text_content):
     """
     Analyze switch output for warning/critical conditions
     Returns categorized alerts with severity levels
+
+    Severity comes from the parsed sensor readings (device state and current
+    temperature vs. yellow/red thresholds), so threshold table rows no longer count
+    as alerts. Output the parser doesn't recognise falls back to keyword matching.
+    main() builds the same summary incrementally with an AlertIndex while polling.
     """
-    warning_hosts = []
-    critical_hosts = []
-    warning_details = []
-    critical_details = []
-    
-    sections = text_content.split('\n --- Output of')
-    
-    for section in sections[1:]:  # Skip first section (timestamp)
-        lines = section.split('\n')
-        hostname = "Unknown"
-        has_warning = False
-        has_critical = False
-        
-        # Extract hostname from first line
-        if lines and 'on ' in lines[0]:
-            hostname = lines[0].split(' on ')[-1].strip()
-        
-        # Check for warning/critical conditions
-        for line in lines:
-            line_lower = line.lower()
-            if 'critical' in line_lower or 'catastrophic' in line_lower:
-                has_critical = True
-                critical_details.append(f"{hostname}: {line.strip()}")
-            elif 'warning' in line_lower:
-                has_warning = True
-                warning_details.append(f"{hostname}: {line.strip()}")
-        
-        # Add to appropriate lists (critical takes precedence)
-        if has_critical and hostname not in critical_hosts:
-            critical_hosts.append(hostname)
-        elif has_warning and hostname not in warning_hosts and hostname not in critical_hosts:
-            warning_hosts.append(hostname)
-    
-    return warning_hosts, critical_hosts, warning_details, critical_details
+    alert_index = AlertIndex()
+    for analysis in analyses_from_text(text_content)[1]:
+        alert_index.add(analysis, keep_record=False)
+    return alert_index.summary()
 
-def create_pdf_report(text_content, pdf_filename, warning_hosts=None, critical_hosts=None, warning_details=None, critical_details=None):
+def create_pdf_report(text_content, pdf_filename, warning_hosts=None, critical_hosts=None, warning_details=None, critical_details=None, device_analyses=None, render_mode=None, raw_output=None):
     """
     Convert text content to PDF format using reportlab with color-coded alerts
+
+    When device_analyses (from alert_analysis) is given, text_content is only the
+    report header and the precomputed per-line severities are used for colouring.
+
+    render_mode (default: PDF_RENDER_MODE env var, else 'detailed'):
+      detailed - one flowable per output line (original layout)
+      fast     - one canvas-drawn flowable per device block, much cheaper to lay out for large fleets
+      summary  - alert summary table only; raw output goes in an appendix or is
+                 skipped depending on raw_output (PDF_RAW_OUTPUT env var)
     """
-    try:
-        logger.info(f"Creating PDF report: {pdf_filename}")
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(pdf_filename, pagesize=letter,
-                              rightMargin=72, leftMargin=72,
-                              topMargin=72, bottomMargin=18)
-        
-        # Get styles
-        styles = getSampleStyleSheet()
-        
-        # Create custom styles
-        code_style = ParagraphStyle(
-            'Code',
-            parent=styles['Normal'],
-            fontName='Courier',
-            fontSize=8,
-            spaceAfter=12,
-            leftIndent=0,
-            rightIndent=0
-        )
-        
-        critical_header_style = ParagraphStyle(
-            'CriticalHeader',
-            parent=styles['Heading2'],
-            textColor='red',
-            fontSize=12,
-            spaceAfter=6,
-            spaceBefore=6
-        )
-        
-        warning_header_style = ParagraphStyle(
-            'WarningHeader',
-            parent=styles['Heading2'],
-            textColor='orange',
-            fontSize=12,
-            spaceAfter=6,
-            spaceBefore=6
-        )
-        
-        critical_detail_style = ParagraphStyle(
-            'CriticalDetail',
-            parent=styles['Normal'],
-            textColor='red',
-            fontSize=10,
-            leftIndent=20,
-            spaceAfter=3
-        )
-        
-        warning_detail_style = ParagraphStyle(
-            'WarningDetail',
-            parent=styles['Normal'],
-            textColor='orange',
-            fontSize=10,
-            leftIndent=20,
-            spaceAfter=3
-        )
-        
-        # Build story for PDF
-        story = []
-        
-        # Add title
-        title_style = styles['Title']
-        title = Paragraph("Cisco Switch Temperature Monitoring Report", title_style)
-        story.append(title)
-        story.append(Spacer(1, 12))
-        
-        # Add status message
-        has_critical = critical_hosts and len(critical_hosts) > 0
-        has_warnings = warning_hosts and len(warning_hosts) > 0
-        
-        # Always show "NO CRITICAL ALERTS AT THIS TIME" when there are no critical/catastrophic conditions
-        if not has_critical:
-            no_critical_style = ParagraphStyle(
-                'NoCritical',
-                parent=styles['Normal'],
-                textColor='black',
-                fontSize=14,
-                alignment=1,  # Center alignment
-                spaceBefore=6,
-                spaceAfter=12,
-                fontName='Helvetica-Bold'
-            )
-            story.append(Paragraph("✅ NO CRITICAL ALERTS AT THIS TIME", no_critical_style))
-            story.append(Spacer(1, 12))
-        
-        # Add color-coded status based on conditions
-        if not has_critical and not has_warnings:
-            # All OK - green text already shown above
-            pass
-        elif has_warnings and not has_critical:
-            # Show yellow/orange status when there are warnings but no critical alerts
-            warning_status_style = ParagraphStyle(
-                'WarningStatus',
-                parent=styles['Normal'],
-                textColor='orange',
-                fontSize=14,
-                alignment=1,  # Center alignment
-                spaceBefore=6,
-                spaceAfter=12,
-                fontName='Helvetica-Bold'
-            )
-            story.append(Paragraph("⚠️ WARNING CONDITIONS DETECTED", warning_status_style))
-            story.append(Spacer(1, 12))
-        elif has_critical:
-            # Show red status with switch names when there are critical alerts
-            critical_status_style = ParagraphStyle(
-                'CriticalStatus',
-                parent=styles['Normal'],
-                textColor='red',
-                fontSize=14,
-                alignment=1,  # Center alignment
-                spaceBefore=6,
-                spaceAfter=12,
-                fontName='Helvetica-Bold'
-            )
-            critical_switches = ', '.join(critical_hosts)
-            story.append(Paragraph(f"🚨 CRITICAL ALERTS: {critical_switches}", critical_status_style))
-            story.append(Spacer(1, 12))
-        
-        # Add critical alerts first (if any)
-        if has_critical:
-            story.append(Paragraph("🚨 CRITICAL TEMPERATURE ALERTS", critical_header_style))
-            story.append(Paragraph(f"Critical Switches: {', '.join(critical_hosts)}", critical_detail_style))
-            story.append(Spacer(1, 6))
-            
-            if critical_details:
-                story.append(Paragraph("Critical Alert Details:", styles['Heading3']))
-                for detail in critical_details:
-                    story.append(Paragraph(f"• {detail}", critical_detail_style))
-            story.append(Spacer(1, 12))
-        
-        # Add warning alerts (if any)
-        if has_warnings:
-            story.append(Paragraph("⚠️ WARNING TEMPERATURE ALERTS", warning_header_style))
-            story.append(Paragraph(f"Warning Switches: {', '.join(warning_hosts)}", warning_detail_style))
-            story.append(Spacer(1, 6))
-            
-            if warning_details:
-                story.append(Paragraph("Warning Alert Details:", styles['Heading3']))
-                for detail in warning_details:
-                    story.append(Paragraph(f"• {detail}", warning_detail_style))
-            story.append(Spacer(1, 12))
-        
-        # Add separator if there were any alerts
-        if has_critical or has_warnings:
-            story.append(Spacer(1, 8))
-            story.append(Paragraph("Detailed Temperature Report:", styles['Heading2']))
-            story.append(Spacer(1, 12))
-        
-        # Split content into sections and add to PDF
-        sections = text_content.split('\n --- Output of')
-        
-        for i, section in enumerate(sections):
-            if i == 0:
-                # First section contains the start time
-                story.append(Paragraph(section.strip(), styles['Normal']))
-                story.append(Spacer(1, 12))
-            else:
-                # Restore the split delimiter and format as code
-                section_content = " --- Output of" + section
-                # Split into lines and create preformatted text
-                lines = section_content.split('\n')
-                for line in lines:
-                    if line.strip():
-                        line_lower = line.lower()
-                        # Color-code based on severity
-                        if 'critical' in line_lower or 'catastrophic' in line_lower:
-                            story.append(Paragraph(f"<font color='red'>{line}</font>", styles['Normal']))
-                        elif 'warning' in line_lower:
-                            story.append(Paragraph(f"<font color='orange'>{line}</font>", styles['Normal']))
-                        else:
-                            story.append(Preformatted(line, code_style))
-                story.append(Spacer(1, 12))
-        
-        # Build PDF
-        doc.build(story)
-        logger.info(f"PDF report created successfully: {pdf_filename}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error creating PDF report: {str(e)}")
-        return False
+    # reportlab is only imported when a PDF is actually built
+    from pdf_report import create_pdf_report as render_pdf_report
+    return render_pdf_report(text_content, pdf_filename, warning_hosts, critical_hosts, warning_details,
+                             critical_details, device_analyses, render_mode, raw_output)
 
-def send_email_with_attachment(pdf_filename, text_filename, timestamp, warning_hosts=None, critical_hosts=None, warning_details=None, critical_details=None):
+def send_email_with_attachment(pdf_filename, text_filename, timestamp, warning_hosts=None, critical_hosts=None, warning_details=None, critical_details=None, delivery=None, changes=None, since=None, alarm=True, recovered_details=None, linked=None, recipients=None, scope=None, html=None, digest=None):
     """
     Send email with PDF attachment
+
+    With alarm=False (alert state machine: every alert was already notified and no
+    re-notify interval has passed) the email keeps the routine subject and lists the
+    ongoing alerts instead of raising a new alarm. recovered_details are sensors that
+    left warning/critical since the last sweep.
+
+    With changes (from delta_report.diff) the email is a compact "changes since
+    last report" notice listing only the switches whose state changed since `since`.
+
+    Pass an open SMTPDelivery to send several messages over one connection;
+    otherwise a delivery is created from the environment for this message only.
+    Transient SMTP failures are retried and undeliverable mail is spooled.
+
+    The raw text backup is attached gzip-compressed (ATTACHMENT_COMPRESS) and the
+    message is encoded to a temporary file and streamed to the server. Attachments
+    that would push the email past ATTACHMENT_MAX_BYTES are left out and linked in
+    the body (REPORT_LINK_BASE); their paths are appended to `linked` if given.
+
+    recipients overrides RECIPIENT_EMAIL, and scope (e.g. "site dc-east") marks the
+    subject of a report that covers only part of the fleet.
+
+    With html (from html_report.render_report) the message carries it as an HTML
+    alternative to the plain-text body; pdf_filename may then be None.
+
+    With digest (digest.DigestQueue.build()) the email is the scheduled summary of the
+    queued sweeps, and text_filename is its per-sensor CSV.
     """
+    # The email package and smtplib are only needed once a report is ready to send
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    import tempfile
+    from mime_stream import (gzip_file, plan_attachments, write_message, format_size, link_for,
+                             DEFAULT_ATTACHMENT_MAX_BYTES)
+    from smtp_delivery import SMTPDelivery
+    
+    temp_files = []
     try:
         # Email configuration from environment variables
-        smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.getenv('SMTP_PORT', '587'))
         sender_email = os.getenv('SENDER_EMAIL', 'sender@example.com')
-        sender_password = os.getenv('SENDER_PASSWORD', 'password')
         recipient_emails_str = os.getenv('RECIPIENT_EMAIL', 'recipient@example.com')
         
         # Support multiple recipients - split by comma and clean up whitespace
         recipient_emails = [email.strip() for email in recipient_emails_str.split(',')]
         recipient_emails = [email for email in recipient_emails if email]  # Remove empty strings
+        if recipients:
+            recipient_emails = list(recipients)
         
         logger.info(f"Preparing to send email to: {', '.join(recipient_emails)}")
         
@@ -286,15 +127,128 @@ def send_email_with_attachment(pdf_filename, text_filename, timestamp, warning_h
         if warning_hosts:
             all_alert_hosts.extend(warning_hosts)
         
-        if critical_hosts and len(critical_hosts) > 0:
+        if digest is not None:
+            from digest import format_ts
+            prefix = "🚨 " if any(episode['peak'] == 'critical' for episode in digest['episodes']) else ""
+            msg['Subject'] = (f"{prefix}Cisco switch temperature digest {format_ts(digest['start'])} to "
+                              f"{format_ts(digest['end'])}: {len(digest['episodes'])} alert episodes")
+        elif changes is not None:
+            from delta_report import summarize_changes
+            prefix = "🚨 " if any(change['after'] == 'critical' for change in changes) else ""
+            msg['Subject'] = f"{prefix}Cisco switch temperature changes {timestamp}: {summarize_changes(changes)}"
+        elif not alarm:
+            msg['Subject'] = f"Cisco switch device temperature update {timestamp}"
+        elif critical_hosts and len(critical_hosts) > 0:
             msg['Subject'] = f"🚨 CRITICAL ALERT: Cisco switch device temperature update {timestamp} - Critical issues on {', '.join(critical_hosts)}"
         elif warning_hosts and len(warning_hosts) > 0:
             msg['Subject'] = f"⚠️ WARNING: Cisco switch device temperature update {timestamp} - Warnings on {', '.join(warning_hosts)}"
         else:
             msg['Subject'] = f"Cisco switch device temperature update {timestamp}"
+        if scope:
+            subject = msg['Subject']
+            del msg['Subject']
+            msg['Subject'] = f"[{scope}] {subject}"
+        
+        # The PDF is the report, so it gets the size budget first
+        candidates = []
+        if pdf_filename and os.path.exists(pdf_filename):
+            candidates.append((pdf_filename, os.path.basename(pdf_filename), 'application/pdf'))
+        if text_filename and os.path.exists(text_filename):
+            if os.getenv('ATTACHMENT_COMPRESS', 'true').lower() == 'true':
+                with tracing.span('gzip', bytes=os.path.getsize(text_filename)):
+                    compressed = gzip_file(text_filename)
+                temp_files.append(compressed)
+                candidates.append((compressed, os.path.basename(compressed), 'application/gzip'))
+            else:
+                candidates.append((text_filename, os.path.basename(text_filename), 'text/plain'))
+        max_bytes = int(os.getenv('ATTACHMENT_MAX_BYTES', str(DEFAULT_ATTACHMENT_MAX_BYTES)))
+        attachments, omitted = plan_attachments(candidates, max_bytes)
+        
+        attachment_notice = ""
+        omitted_links = []
+        if omitted:
+            link_base = os.getenv('REPORT_LINK_BASE', '')
+            attachment_notice = f"\n  Not attached (over the {format_size(max_bytes)} email size limit):\n"
+            for path, filename, _ in omitted:
+                omitted_links.append((filename, format_size(os.path.getsize(path)), link_for(path, link_base)))
+                attachment_notice += f"    - {filename} ({format_size(os.path.getsize(path))}): {link_for(path, link_base)}\n"
+                logger.warning(f"{filename} is too large to attach ({format_size(os.path.getsize(path))}) - linked instead")
+                if path in temp_files:
+                    temp_files.remove(path)  # keep what the email links to
+                if linked is not None:
+                    linked.append(path)
+        
+        # Only mention attachments the email actually carries (the PDF is opt-in, and may be linked instead)
+        attached_pdf = any(content_type == 'application/pdf' for _, _, content_type in attachments)
+        if attached_pdf:
+            attached_note = "The full report is attached as a PDF" + (", with the raw switch output." if len(attachments) > 1 else ".")
+        elif attachments:
+            attached_note = "The raw switch output is attached."
+        else:
+            attached_note = ""
+        
+        recovered_summary = ""
+        if recovered_details:
+            recovered_summary = "\n  RECOVERED:\n" + '\n'.join([f"    - {detail}" for detail in recovered_details]) + "\n"
         
         # Email body with alert information
-        if all_alert_hosts and len(all_alert_hosts) > 0:
+        if digest is not None:
+            from digest import above_threshold, format_duration, format_ts
+            episode_lines = [f"    - {episode['peak'].upper()} {episode['host']}: {episode['sensor']} "
+                             f"{format_ts(episode['start']) or 'before this period'} to {format_ts(episode['end']) or 'ongoing'}"
+                             for episode in digest['episodes']] or ["    None"]
+            above_lines = [f"    - {sensor['host']}: {sensor['sensor']} above warning for {format_duration(sensor['above_seconds'])} "
+                           f"(max {sensor['max_celsius']:g}C, mean {sensor['mean_celsius']:.1f}C)"
+                           for sensor in above_threshold(digest)] or ["    None"]
+            body = f"""
+        Dear Network Administrator,
+        
+        Temperature digest for {format_ts(digest['start'])} to {format_ts(digest['end'])}: {digest['sweeps']} sweeps of {digest['switches']} switches.
+        
+        Alert episodes:
+{chr(10).join(episode_lines)}
+        
+        Time above threshold:
+{chr(10).join(above_lines)}
+        
+        Min, max and mean for every sensor are in the {'attached CSV' if attachments else 'CSV linked below'}. New critical alerts were emailed as they happened.
+{attachment_notice}        
+        Best regards,
+        Network Monitoring System
+        """
+        elif changes is not None:
+            change_lines = []
+            for change in changes:
+                change_lines.append(f"    - {change['hostname']} ({change['host']}): {change['before'].upper()} -> {change['after'].upper()}")
+                change_lines.extend(f"        {detail}" for detail in change['details'])
+            body = f"""
+        Dear Network Administrator,
+        
+        The following switches changed temperature state since the report of {since or 'the previous run'}:
+{chr(10).join(change_lines)}
+        
+        Switches not listed are unchanged. Currently critical: {', '.join(critical_hosts) if critical_hosts else 'None'}
+        Currently warning: {', '.join(warning_hosts) if warning_hosts else 'None'}
+        
+        {'The attached PDF lists only the changed switches.' if attached_pdf else ''}
+{attachment_notice}        
+        Best regards,
+        Network Monitoring System
+        """
+        elif all_alert_hosts and not alarm:
+            ongoing = '\n'.join([f"    - {detail}" for detail in (critical_details or []) + (warning_details or [])])
+            body = f"""
+        Dear Network Administrator,
+        
+        This is the Cisco switch temperature monitoring report generated on {timestamp}. {attached_note}
+        
+        Ongoing temperature alerts (already notified, no change since):
+{ongoing}
+{recovered_summary}{attachment_notice}
+        Best regards,
+        Network Monitoring System
+        """
+        elif all_alert_hosts and len(all_alert_hosts) > 0:
             # Create alert summary
             alert_summary = ""
             if critical_details:
@@ -316,10 +270,11 @@ def send_email_with_attachment(pdf_filename, text_filename, timestamp, warning_h
         
         Alert Details:
 {alert_summary}
+{recovered_summary}{attachment_notice}
         
         Please investigate these temperature issues {'immediately' if critical_hosts else 'promptly'} to prevent potential equipment damage.
         
-        Full temperature monitoring report generated on {timestamp} is attached.
+        Temperature monitoring report generated on {timestamp}. {attached_note}
         
         Best regards,
         Network Monitoring System
@@ -328,56 +283,55 @@ def send_email_with_attachment(pdf_filename, text_filename, timestamp, warning_h
             body = f"""
         Dear Network Administrator,
         
-        Please find attached the Cisco switch temperature monitoring report generated on {timestamp}.
+        This is the Cisco switch temperature monitoring report generated on {timestamp}. {attached_note}
         
         All monitored network switches are operating within normal temperature ranges.
+{recovered_summary}{attachment_notice}
         
         Best regards,
         Network Monitoring System
         """
         
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Attach PDF file
-        if os.path.exists(pdf_filename):
-            with open(pdf_filename, "rb") as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {os.path.basename(pdf_filename)}'
-                )
-                msg.attach(part)
-                logger.info(f"PDF attachment added: {pdf_filename}")
-        
-        # Attach text file as backup
-        if os.path.exists(text_filename):
-            with open(text_filename, "rb") as attachment:
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(attachment.read())
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {os.path.basename(text_filename)}'
-                )
-                msg.attach(part)
-                logger.info(f"Text backup attachment added: {text_filename}")
+        if html is not None:
+            # Mail clients show the HTML report; the plain-text body is the fallback
+            from html_report import attachment_notice as html_attachment_notice, ATTACHMENT_NOTICE_MARKER
+            alternative = MIMEMultipart('alternative')
+            alternative.attach(MIMEText(body, 'plain'))
+            alternative.attach(MIMEText(html.replace(ATTACHMENT_NOTICE_MARKER,
+                                                     html_attachment_notice(omitted_links, format_size(max_bytes))),
+                                        'html', 'utf-8'))
+            msg.attach(alternative)
+        else:
+            msg.attach(MIMEText(body, 'plain'))
+        
+        # Attachments are base64-encoded chunk by chunk into a message file, never held in memory whole
+        with tracing.span('mime', attachments=len(attachments)) as mime_span:
+            fd, message_filename = tempfile.mkstemp(prefix='temperature_report_', suffix='.eml')
+            temp_files.append(message_filename)
+            with os.fdopen(fd, 'wb') as message_file:
+                mime_span.set(bytes=write_message(msg, attachments, message_file))
         
         # Send email
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        text = msg.as_string()
-        server.sendmail(sender_email, recipient_emails, text)  # Use list of recipients
-        server.quit()
+        if delivery is None:
+            with SMTPDelivery.from_env() as own_delivery:
+                sent = own_delivery.send_file(message_filename, sender_email, recipient_emails)  # Use list of recipients
+        else:
+            sent = delivery.send_file(message_filename, sender_email, recipient_emails)
         
+        if not sent:
+            return False
         logger.info(f"Email sent successfully to {', '.join(recipient_emails)}")
         return True
         
     except Exception as e:
         logger.error(f"Error sending email: {str(e)}")
         return False
+    finally:
+        for path in temp_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
 def cleanup_files(files_to_remove):
     """
@@ -391,72 +345,272 @@ def cleanup_files(files_to_remove):
         except Exception as e:
             logger.warning(f"Could not remove file {file_path}: {str(e)}")
 
-def main():
+def send_partition_reports(partition_reports, members, time_str, summary, delivery, alarm=True, recovered_details=None,
+                           alarm_hosts=None):
     """
-    Main function to execute the enhanced temperature monitoring script
+    Wait for the per-partition reports started with partition_reports.start() and email
+    each to its partition's recipients (RECIPIENT_EMAIL_<PARTITION>)
+
+    members maps each partition to its hostnames, used to cut the fleet-wide alert summary
+    down to that partition. With alarm_hosts (switches with an alert due for notification),
+    only partitions containing one of them raise a new alarm.
+    Returns the PDFs of the partition reports that were sent as attachments.
     """
-    ts = time.time()
+    from partition_reports import filter_summary, recipients_for
+    from html_report import render_report
     
-    # Specify the path to your Excel file
-    excel_file_path = 'switchFile.xlsx'
+    sent = []
+    for partition, pdf_filename, success in partition_reports.finish():
+        if not success:
+            logger.error(f"Failed to create the {partition_reports.field} '{partition}' report")
+            continue
+        hostnames = members[partition]
+        scope = f"{partition_reports.field} {partition}"
+        partition_summary = filter_summary(summary, hostnames)
+        recovered = [detail for detail in recovered_details or [] if detail.split(':', 1)[0] in hostnames]
+        partition_alarm = alarm if alarm_hosts is None else bool(recovered or hostnames & alarm_hosts)
+        html = render_report(partition_reports.entries[partition], partition_summary, time_str, alarm=partition_alarm,
+                             recovered_details=recovered, title=f"Cisco switch temperature report - {scope}")
+        linked = []
+        if send_email_with_attachment(pdf_filename, None, time_str, *partition_summary, delivery=delivery,
+                                      alarm=partition_alarm, recovered_details=recovered, linked=linked,
+                                      recipients=recipients_for(partition), scope=scope, html=html):
+            if pdf_filename and not linked:
+                sent.append(pdf_filename)
+        else:
+            logger.error(f"Failed to send the {scope} report" + (f" - {pdf_filename} preserved" if pdf_filename else ""))
+    return sent
+
+def send_digest(digest_queue, ts=None, delivery=None, ongoing=()):
+    """
+    Email the queued sweeps as one digest (HTML summary plus a per-sensor CSV) and empty
+    the queue once it is sent; on failure the sweeps stay queued for the next attempt
+
+    ongoing are the alerts still open (AlertStateMachine.alerts()), so alerts that started
+    before the period and never changed are listed too. Returns True if the digest was sent
+    (or there was nothing queued to send).
+    """
+    from digest import write_csv, DEFAULT_TOP_SENSORS
+    from html_report import render_digest
+    
+    ts = ts if ts is not None else time.time()
+    time_str = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+    timestamp_safe = datetime.datetime.fromtimestamp(ts).strftime('%Y%m%d_%H%M%S')
+    with tracing.span('digest'):
+        digest = digest_queue.build(ts, ongoing)
+        if digest['sweeps'] == 0:
+            logger.info("No sweeps queued since the last digest - nothing to send")
+            return True
+        csv_filename = write_csv(digest, f'temperature_digest_{timestamp_safe}.csv')
+        html = render_digest(digest, time_str, top=int(os.getenv('DIGEST_TOP_SENSORS', str(DEFAULT_TOP_SENSORS))))
+    linked = []
+    if not send_email_with_attachment(None, csv_filename, time_str, delivery=delivery, linked=linked, html=html,
+                                      digest=digest):
+        logger.error(f"Failed to send the digest - its {digest['sweeps']} sweeps stay queued, {csv_filename} preserved")
+        return False
+    digest_queue.clear(ts)
+    logger.info(f"Digest of {digest['sweeps']} sweeps sent with {len(digest['episodes'])} alert episodes")
+    if os.getenv('CLEANUP_FILES_AFTER_EMAIL', 'false').lower() == 'true' and csv_filename not in linked:
+        cleanup_files([csv_filename])
+    return True
+
+def load_switches(inventory_path):
+    """
+    Read the switch inventory (.xlsx, .csv, .yaml or .json) into a list of netmiko connection dicts
+    Returns None if the file does not exist
+    """
+    # Check if the inventory file exists
+    if not os.path.exists(inventory_path):
+        logger.error(f"Inventory file not found: {inventory_path}")
+        return None
+    
+    # Parsed inventories are cached until the file changes (INVENTORY_CACHE_FILE='' disables)
+    with tracing.span('inventory', path=inventory_path):
+        return load_inventory(inventory_path, cache=inventory_cache_from_env())
+
+def run_sweep(list_of_switches, ts=None, stagger=0, pool=None, metrics=None, collectors=None, coordinator=None,
+              partition_by=None, report_pdf=None, digest=None):
+    """
+    Poll every switch once, write the text/PDF reports and email them
+    A SessionPool (daemon mode) keeps SSH sessions open for the next sweep.
+    With a metrics.SweepMetrics, readings and poll timings are published for /metrics.
+    collectors (see collectors.py) choose what is gathered from each switch; default COLLECTORS.
+    With a distributed.Coordinator the switches are polled on its collector nodes instead of here.
+    partition_by (default REPORT_PARTITION_BY) also sends each site/owner its own report.
+    The email body is an HTML report; report_pdf (default REPORT_PDF) also attaches the PDF.
+    With digest (default DIGEST_MODE) results are queued for a scheduled digest email and
+    only sweeps that raise a new critical alert are emailed straight away.
+    """
+    ts = ts if ts is not None else time.time()
+    from smtp_delivery import SMTPDelivery
+    from history_store import TemperatureHistory, DEFAULT_HISTORY_DB, DEFAULT_RETENTION_DAYS
     
     try:
-        # Check if Excel file exists
-        if not os.path.exists(excel_file_path):
-            logger.error(f"Excel file not found: {excel_file_path}")
-            return
-        
-        # Read the Excel file into a pandas DataFrame
-        df = pd.read_excel(excel_file_path, engine='openpyxl')
-        
-        # Convert the DataFrame to a list of dictionaries
-        list_of_switches = df.to_dict(orient='records')
-        
-        logger.info(f"Loaded {len(list_of_switches)} switches from Excel file")
-        
-        # Commands to execute
-        commands = [
-            'show env temp'
-        ]
+        # Commands to execute: every selected collector's commands, all sent over the switch's one session
+        collectors = collectors or load_collectors(os.getenv('COLLECTORS'))
+        commands = collector_commands(collectors)
         
         time_str = datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
         timestamp_safe = datetime.datetime.fromtimestamp(ts).strftime('%Y%m%d_%H%M%S')
-        outputsVar = f'Start Script at Time: {time_str}\n'
-        
-        # Loop through all switches in the given excel spreadsheet
-        for switch in list_of_switches:
-            try:
-                logger.info(f"Connecting to switch: {switch.get('host', 'Unknown')}")
-                
-                # Establish SSH connection
-                net_connect = ConnectHandler(**switch)
-                
-                for command in commands:
-                    logger.info(f"Executing '{command}' on {switch['host']}...")
-                    output = net_connect.send_command(command)
-                    hostname = net_connect.send_command('sh run | i host').split()[1]
-                    outputsVar += f'\n --- Output of {command} on {hostname} \n{output}\n\n'
-        
-            except Exception as e:
-                logger.error(f"Error processing switch {switch.get('host', 'Unknown')}: {str(e)}")
-                outputsVar += f'\n --- Error connecting to {switch.get("host", "Unknown")}: {str(e)}\n\n'
-        
-            finally:
-                # Disconnect from the switch
-                if 'net_connect' in locals() and net_connect.is_alive():
-                    net_connect.disconnect()
+        report_header = f'Start Script at Time: {time_str}\n'
         
         # Generate output files
         text_filename = f'device_output_{timestamp_safe}.txt'
         pdf_filename = f'device_temperature_report_{timestamp_safe}.pdf'
         
-        # Write text output
+        # Hostnames are cached by management IP so steady-state sweeps send one command per switch
+        hostname_cache = HostnameCache(
+            os.getenv('HOSTNAME_CACHE_FILE', DEFAULT_CACHE_FILE),
+            ttl=float(os.getenv('HOSTNAME_CACHE_TTL', str(DEFAULT_TTL))),
+        )
+        
+        # Each switch's output is classified as soon as it arrives from the poller and
+        # appended to the text report, so a crash mid-sweep still leaves a partial report
+        alert_index = AlertIndex()
         logger.info(f"Writing text output to: {text_filename}")
-        with open(text_filename, 'w') as f:
-            f.write(outputsVar)
+        report_sink = ReportSink(text_filename, report_header)
+        
+        # Every parsed reading is also kept in the temperature history database (HISTORY_DB='' disables it)
+        history = None
+        history_path = os.getenv('HISTORY_DB', DEFAULT_HISTORY_DB)
+        if history_path:
+            try:
+                history = TemperatureHistory(history_path)
+                history.begin_sweep(ts)
+            except Exception as e:
+                logger.warning(f"Temperature history disabled, could not open {history_path}: {str(e)}")
+                history = None
+        
+        # Per-switch latency history for adaptive timeouts, and the circuit breaker that skips
+        # switches which failed CIRCUIT_FAILURE_THRESHOLD sweeps in a row (HOST_HEALTH_FILE='' disables)
+        host_health = None
+        if os.getenv('HOST_HEALTH_FILE', '.host_health.json'):
+            from host_health import HostHealth
+            host_health = HostHealth.from_env()
+        
+        # Per-switch severity and sensor-state fingerprints for delta reporting
+        delta_tracker = DeltaTracker()
+        
+        # Digest mode: readings and alert transitions wait in a local queue for the next digest (DIGEST_QUEUE_DB)
+        digest_queue = None
+        digest = digest if digest is not None else os.getenv('DIGEST_MODE', 'false').lower() == 'true'
+        if digest:
+            from digest import DigestQueue
+            try:
+                digest_queue = DigestQueue.from_env()
+                digest_queue.begin_sweep(ts)
+            except Exception as e:
+                logger.warning(f"Digest mode disabled, could not open its queue: {str(e)}")
+                digest_queue = None
+        
+        # Separate PDF per site/owner for that partition's recipients (REPORT_PARTITION_BY='' disables)
+        partition_reports = None
+        partition_by = partition_by if partition_by is not None else os.getenv('REPORT_PARTITION_BY', '')
+        if partition_by:
+            from partition_reports import PartitionReports
+            try:
+                partition_reports = PartitionReports(list_of_switches, partition_by,
+                                                     int(os.getenv('REPORT_PROCESSES', '0')) or None)
+            except Exception as e:
+                logger.warning(f"Per-{partition_by} reports disabled: {str(e)}")
+                partition_reports = None
+        
+        # Persisted per-sensor alert states with hysteresis and confirmation (ALERT_STATE_DB='' disables)
+        alert_machine = None
+        if os.getenv('ALERT_STATE_DB', 'alert_state.db'):
+            from alert_state import AlertStateMachine
+            try:
+                alert_machine = AlertStateMachine.from_env()
+                alert_machine.begin_sweep(ts)
+            except Exception as e:
+                logger.warning(f"Alert state machine disabled, could not open its state: {str(e)}")
+                alert_machine = None
+        
+        def handle_result(result):
+            with tracing.span('analysis', host=result['host']):
+                analyses = analyze_poll_result(result, collectors=collectors)
+                if metrics is not None:
+                    metrics.observe_result(result)
+                for analysis in analyses:
+                    alert_index.add(analysis, keep_record=False)
+                    report_sink.write(analysis)
+                # Every collector's readings for the switch, merged into one record
+                record = device_record(result, analyses)
+                if record['readings']:
+                    if history is not None:
+                        history.add_readings(record['hostname'], record['readings'])
+                    if alert_machine is not None:
+                        alert_machine.observe(record['hostname'], record['readings'])
+                    if digest_queue is not None:
+                        digest_queue.add_readings(record['hostname'], record['readings'])
+                    if metrics is not None:
+                        metrics.observe_readings(record['hostname'], record['readings'])
+                delta_tracker.observe(result, analyses)
+                if partition_reports is not None:
+                    partition_reports.observe(result)
+        
+        # Poll all switches concurrently; results come back in spreadsheet order
+        if pool is not None:
+            pool.retain(switch.get('host') for switch in list_of_switches)
+        if metrics is not None:
+            metrics.begin_sweep()
+        sweep_start = time.monotonic()
+        poll_options = dict(
+            max_workers=int(os.getenv('POLL_MAX_WORKERS', str(DEFAULT_MAX_WORKERS))),
+            backend=os.getenv('POLL_BACKEND', 'thread'),
+            timeout=float(os.getenv('POLL_TIMEOUT', '0')) or None,
+            hostname_source=os.getenv('HOSTNAME_SOURCE', 'prompt'),
+            stagger=stagger,
+            batch=os.getenv('POLL_BATCH', 'false').lower() == 'true',
+        )
+        try:
+            if coordinator is not None:
+                # Collector nodes poll their shards and stream results back; everything after this is unchanged
+                coordinator.poll(list_of_switches, commands, on_result=handle_result, keep_results=False,
+                                 hostname_cache=hostname_cache, host_health=host_health, **poll_options)
+            else:
+                poll_switches(list_of_switches, commands, on_result=handle_result, keep_results=False,
+                              hostname_cache=hostname_cache, pool=pool, host_health=host_health, **poll_options)
+        finally:
+            report_sink.close()
+            hostname_cache.save()
+            if host_health is not None:
+                host_health.save()
+            if metrics is not None:
+                metrics.observe_hostname_cache(hostname_cache.stats())
+                metrics.end_sweep(time.monotonic() - sweep_start)
+                if os.getenv('METRICS_TEXTFILE'):
+                    metrics.write_textfile(os.getenv('METRICS_TEXTFILE'))
+            if history is not None:
+                try:
+                    with tracing.span('history'):
+                        history.end_sweep()
+                        # Raw readings older than HISTORY_RETENTION_DAYS are dropped daily; hourly rollups stay
+                        history.expire(float(os.getenv('HISTORY_RETENTION_DAYS', str(DEFAULT_RETENTION_DAYS))), ts)
+                except Exception as e:
+                    logger.warning(f"Could not record temperature history: {str(e)}")
+                history.close()
         
         # Analyze output for temperature alerts
-        warning_hosts, critical_hosts, warning_details, critical_details = analyze_output_for_alerts(outputsVar)
+        # With the alert state machine, parsed sensors only count once their state is confirmed
+        alarm = True
+        recovered_details = None
+        notify_keys = []
+        alarm_hosts = None
+        if alert_machine is not None:
+            warning_hosts, critical_hosts, warning_details, critical_details = alert_machine.summary(alert_index)
+            for transition in alert_machine.transitions:
+                logger.info(f"Alert state {transition['host']} {transition['sensor']}: {transition['before'].upper()} -> {transition['after'].upper()}")
+            notify_keys = alert_machine.due_notifications()
+            recovered_details = [f"{t['host']}: {t['sensor']} back to normal" for t in alert_machine.recoveries()]
+            # Alerts the parser couldn't attribute to a sensor have no state, so they always alarm
+            untracked_alerts = [host for host in warning_hosts + critical_hosts if not alert_machine.tracks(host)]
+            alarm = bool(notify_keys or recovered_details or untracked_alerts)
+            alarm_hosts = {host for host, _ in notify_keys} | set(untracked_alerts)
+            if (warning_hosts or critical_hosts) and not alarm:
+                logger.info("All current alerts were already notified - sending the report without a new alarm")
+        else:
+            warning_hosts, critical_hosts, warning_details, critical_details = alert_index.summary()
         
         if critical_hosts:
             logger.error(f"CRITICAL temperature alerts detected on switches: {', '.join(critical_hosts)}")
@@ -465,39 +619,307 @@ def main():
         if not critical_hosts and not warning_hosts:
             logger.info("No temperature alerts detected - all switches operating normally")
         
-        # Create PDF report with color-coded alert highlighting
-        pdf_success = create_pdf_report(outputsVar, pdf_filename, warning_hosts, critical_hosts, warning_details, critical_details)
-        
-        if pdf_success:
-            # Send email with attachments and alert information
-            email_success = send_email_with_attachment(pdf_filename, text_filename, time_str, warning_hosts, critical_hosts, warning_details, critical_details)
-            
-            if email_success:
-                if critical_hosts:
-                    logger.info(f"CRITICAL ALERT EMAIL sent successfully for switches: {', '.join(critical_hosts)}")
-                elif warning_hosts:
-                    logger.info(f"WARNING ALERT EMAIL sent successfully for switches: {', '.join(warning_hosts)}")
+        # Delta reporting (DELTA_MODE): compare this sweep with the last report that was sent.
+        # 'skip' sends the full report only when something changed; 'changes' sends just the changed switches.
+        # A full report still goes out on the first run and every DELTA_FULL_REPORT_EVERY seconds.
+        delta_mode = os.getenv('DELTA_MODE', 'off').lower()
+        if delta_mode not in DELTA_MODES:
+            logger.error(f"Unknown DELTA_MODE '{delta_mode}' (expected one of: {', '.join(DELTA_MODES)}), sending the full report")
+            delta_mode = 'off'
+        delta_state = None
+        changes = None
+        since_str = None
+        skip_report = False
+        if delta_mode != 'off':
+            delta_state = DeltaState(os.getenv('DELTA_STATE_FILE', DEFAULT_DELTA_STATE_FILE))
+            full_every = float(os.getenv('DELTA_FULL_REPORT_EVERY', str(DEFAULT_FULL_REPORT_EVERY)))
+            if not delta_state.full_report_due(ts, full_every):
+                since_str = datetime.datetime.fromtimestamp(delta_state.reported_at).strftime('%Y-%m-%d %H:%M:%S')
+                changes = diff(delta_state.hosts, delta_tracker.hosts)
+                if not changes:
+                    logger.info(f"No material changes since the report of {since_str} - skipping PDF and email")
+                    skip_report = True
                 else:
-                    logger.info("Temperature monitoring report sent successfully")
+                    logger.info(f"Changes since the report of {since_str}: {summarize_changes(changes)}")
+                    if delta_mode == 'skip':
+                        changes = None
+        
+        # Digest mode: only a sensor newly confirmed critical (or, without alert states, a switch that
+        # became critical since the last sweep) is reported now; everything else waits for the digest
+        if digest_queue is not None:
+            if alert_machine is not None:
+                digest_queue.add_transitions(alert_machine.transitions)
+                new_critical = sorted({t['host'] for t in alert_machine.transitions if t['after'] == 'critical'})
+            else:
+                new_critical = digest_queue.new_critical(critical_hosts)
+            unreachable = sum(1 for entry in report_sink.index if entry['kind'] == 'error')
+            digest_queue.end_sweep(len(list_of_switches), unreachable, immediate=bool(new_critical and not skip_report))
+            if new_critical and not skip_report:
+                logger.info(f"New critical alerts on {', '.join(new_critical)} - sending the report now")
+            elif not skip_report:
+                logger.info("No new critical alerts - results queued for the next digest")
+                skip_report = True
+        
+        # The email body is an HTML report built from the report index; the PDF is opt-in (REPORT_PDF)
+        report_pdf = report_pdf if report_pdf is not None else os.getenv('REPORT_PDF', 'false').lower() == 'true'
+        summary = (warning_hosts, critical_hosts, warning_details, critical_details)
+        report_ready = False
+        html_body = None
+        partition_members = {}
+        # In changes mode only sites with a changed switch get their (full) site report;
+        # an unreachable switch is listed in the report under its address
+        changed_hostnames = None
+        if changes is not None:
+            changed_hostnames = {change['hostname'] for change in changes} | {change['host'] for change in changes}
+        if not skip_report:
+            from html_report import render_report
+            with tracing.span('html'):
+                html_body = render_report(report_sink.index, summary, time_str, alarm=alarm,
+                                          recovered_details=recovered_details, changes=changes, since=since_str)
+        if skip_report:
+            pass
+        elif not report_pdf:
+            pdf_filename = None
+            report_ready = True
+            if partition_reports is not None:
+                partition_members = partition_reports.start(report_header, text_filename, report_sink.index, summary,
+                                                            timestamp_safe, pdf=False, hostnames=changed_hostnames)
+        elif changes is not None:
+            if partition_reports is not None:
+                with tracing.span('partition_pdf'):
+                    partition_members = partition_reports.start(report_header, text_filename, report_sink.index,
+                                                                summary, timestamp_safe, hostnames=changed_hostnames)
+            # Compact PDF listing only the switches whose state changed
+            from pdf_report import create_changes_pdf
+            pdf_filename = f'device_temperature_changes_{timestamp_safe}.pdf'
+            with tracing.span('pdf', changes=len(changes)):
+                report_ready = create_changes_pdf(report_header, pdf_filename, changes, since_str)
+        else:
+            # Partition PDFs render in other processes while the main report renders here
+            if partition_reports is not None:
+                with tracing.span('partition_pdf'):
+                    partition_members = partition_reports.start(report_header, text_filename, report_sink.index,
+                                                                summary, timestamp_safe)
+            # Create PDF report with color-coded alert highlighting
+            with tracing.span('pdf'):
+                report_ready = create_pdf_report(report_header, pdf_filename, warning_hosts, critical_hosts, warning_details, critical_details, device_analyses=report_sink.iter_analyses())
+        
+        # One SMTP connection for this run: retry anything spooled by earlier runs, then send the report
+        with SMTPDelivery.from_env() as delivery:
+            delivered, remaining = delivery.flush_spool()
+            if delivered or remaining:
+                logger.info(f"Mail spool: {delivered} delivered, {remaining} still queued")
+            
+            if skip_report:
+                logger.info(f"Text output preserved: {text_filename}")
+            elif report_ready:
+                # Send email with attachments and alert information (the changes email carries only the compact PDF, if any)
+                linked = []
+                email_success = send_email_with_attachment(pdf_filename, None if changes is not None else text_filename, time_str, warning_hosts, critical_hosts, warning_details, critical_details, delivery=delivery, changes=changes, since=since_str, alarm=alarm, recovered_details=recovered_details, linked=linked, html=html_body)
+                
+                if email_success and alert_machine is not None:
+                    alert_machine.mark_notified(notify_keys)
                 
-                # Clean up files if email was sent successfully (optional)
-                cleanup_option = os.getenv('CLEANUP_FILES_AFTER_EMAIL', 'false').lower()
-                if cleanup_option == 'true':
-                    cleanup_files([pdf_filename, text_filename])
+                if email_success and delta_state is not None:
+                    # The baseline only moves once a report actually went out, so unsent changes are reported again
+                    delta_state.record(delta_tracker.hosts, ts, full=changes is None)
+                
+                if email_success:
+                    if critical_hosts:
+                        logger.info(f"CRITICAL ALERT EMAIL sent successfully for switches: {', '.join(critical_hosts)}")
+                    elif warning_hosts:
+                        logger.info(f"WARNING ALERT EMAIL sent successfully for switches: {', '.join(warning_hosts)}")
+                    else:
+                        logger.info("Temperature monitoring report sent successfully")
+                
+                    # Clean up files if email was sent successfully (optional)
+                    cleanup_option = os.getenv('CLEANUP_FILES_AFTER_EMAIL', 'false').lower()
+                    if cleanup_option == 'true':
+                        # Attachments that were too large to send stay where the email links to them
+                        cleanup_files([path for path in (pdf_filename, text_filename) if path and path not in linked])
+                    else:
+                        logger.info(f"Files preserved: {', '.join(path for path in (text_filename, pdf_filename) if path)}")
                 else:
-                    logger.info(f"Files preserved: {text_filename}, {pdf_filename}")
+                    logger.error("Failed to send email - files preserved for manual sending")
             else:
-                logger.error("Failed to send email - files preserved for manual sending")
-        else:
-            logger.error("Failed to create PDF report")
+                logger.error("Failed to create PDF report")
+                
+                # Try to send just the text file if PDF creation failed
+                email_success = send_email_with_attachment(None, text_filename, time_str, warning_hosts, critical_hosts, warning_details, critical_details, delivery=delivery, alarm=alarm, recovered_details=recovered_details, html=html_body)
+                if email_success:
+                    logger.info("Text report sent successfully (PDF creation failed)")
+                    if alert_machine is not None:
+                        alert_machine.mark_notified(notify_keys)
+            
+            if partition_reports is not None:
+                with tracing.span('partition_mail', partitions=len(partition_members)):
+                    partition_pdfs = send_partition_reports(partition_reports, partition_members, time_str, summary,
+                                                            delivery, alarm, recovered_details, alarm_hosts)
+                if partition_pdfs and os.getenv('CLEANUP_FILES_AFTER_EMAIL', 'false').lower() == 'true':
+                    cleanup_files(partition_pdfs)
             
-            # Try to send just the text file if PDF creation failed
-            email_success = send_email_with_attachment(None, text_filename, time_str, warning_hosts, critical_hosts, warning_details, critical_details)
-            if email_success:
-                logger.info("Text report sent successfully (PDF creation failed)")
+            if digest_queue is not None:
+                if digest_queue.due(ts):
+                    send_digest(digest_queue, ts, delivery, alert_machine.alerts() if alert_machine is not None else ())
+                digest_queue.close()
+        
+        if alert_machine is not None:
+            # Saved after delivery so an alert whose email failed is notified again next sweep
+            with tracing.span('alert_state'):
+                alert_machine.save()
+                # Sensors of switches gone from the inventory are forgotten after ALERT_STATE_EXPIRE seconds
+                if alert_machine.expire_after:
+                    pruned = alert_machine.prune(ts - alert_machine.expire_after)
+                    if pruned:
+                        logger.info(f"Forgot the alert state of {pruned} sensors not seen for {alert_machine.expire_after:.0f}s")
+            alert_machine.close()
     
     except Exception as e:
         logger.error(f"Critical error in main execution: {str(e)}")
 
+def traced_sweep(list_of_switches, trace_output=None, trace_format='chrome', **kwargs):
+    """
+    run_sweep under a 'sweep' span, then print the per-stage summary, write the trace
+    file if asked and start a fresh tracer for the next sweep (so a daemon's
+    inventory reload lands in the sweep that uses it)
+    """
+    with tracing.span('sweep', switches=len(list_of_switches)):
+        run_sweep(list_of_switches, **kwargs)
+    tracer = tracing.set_tracer(tracing.Tracer())
+    if tracer is None:
+        return
+    print(f"\nSweep timing breakdown:\n{tracer.format_summary()}")
+    if trace_output:
+        tracer.write(trace_output, trace_format)
+
+def main(argv=None):
+    """
+    Main function to execute the enhanced temperature monitoring script
+    """
+    parser = argparse.ArgumentParser(description='Cisco switch temperature monitoring')
+    parser.add_argument('--inventory', default=os.getenv('SWITCH_INVENTORY', DEFAULT_INVENTORY_FILE),
+                        help='Switch inventory: .xlsx, .csv, .yaml or .json (default: switchFile.xlsx)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Stay running and sweep on a schedule instead of once')
+    parser.add_argument('--interval', type=float, default=float(os.getenv('DAEMON_INTERVAL', '0')) or None,
+                        help='Daemon mode: seconds between sweeps')
+    parser.add_argument('--cron', default=os.getenv('DAEMON_CRON') or None,
+                        help="Daemon mode: 5-field cron expression, e.g. '*/15 * * * *'")
+    parser.add_argument('--stagger', type=float, default=float(os.getenv('POLL_STAGGER', '0.5')),
+                        help='Daemon mode: fraction of the interval to spread device connections over (default: 0.5)')
+    parser.add_argument('--run-now', action='store_true', help='Daemon mode: run the first sweep immediately')
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('METRICS_PORT', '0')) or None,
+                        help='Daemon mode: serve Prometheus metrics on this port at /metrics')
+    parser.add_argument('--trace', action='store_true', default=os.getenv('TRACE', 'false').lower() == 'true',
+                        help='Time each stage of the sweep and print a summary table at the end')
+    parser.add_argument('--trace-output', default=os.getenv('TRACE_OUTPUT') or None,
+                        help='Also write the trace to this file (implies --trace; rewritten every sweep)')
+    parser.add_argument('--trace-format', choices=('chrome', 'json'), default=os.getenv('TRACE_FORMAT', 'chrome'),
+                        help='Trace file format: chrome (chrome://tracing, Perfetto) or json (default: chrome)')
+    parser.add_argument('--collectors', default=os.getenv('COLLECTORS', 'temp'),
+                        help=f"Comma-separated data to collect from each switch: {', '.join(COLLECTORS)} (default: temp)")
+    parser.add_argument('--collector-nodes', default=os.getenv('COLLECTOR_NODES') or None,
+                        help='Poll on these collector nodes (comma-separated, reached via COLLECTOR_NODE_COMMAND) '
+                             'or local:N worker processes')
+    parser.add_argument('--partition-by', choices=TAG_FIELDS, default=os.getenv('REPORT_PARTITION_BY') or None,
+                        help='Also email each site/owner its own PDF (recipients from RECIPIENT_EMAIL_<NAME>)')
+    parser.add_argument('--pdf', action='store_true', default=os.getenv('REPORT_PDF', 'false').lower() == 'true',
+                        help='Also attach a PDF report to the HTML email (REPORT_PDF)')
+    parser.add_argument('--digest', action='store_true', default=os.getenv('DIGEST_MODE', 'false').lower() == 'true',
+                        help='Queue results for a scheduled digest email; only new critical alerts are sent at once')
+    parser.add_argument('--send-digest', action='store_true',
+                        help='Send the queued digest now, whatever DIGEST_SCHEDULE says, and exit')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Report per-stage import cost (like python -X importtime) and check the cold-start budget')
+    args = parser.parse_args(argv)
+    # choices only checks values given on the command line, not the REPORT_PARTITION_BY default
+    if args.partition_by and args.partition_by not in TAG_FIELDS:
+        parser.error(f"REPORT_PARTITION_BY: invalid choice '{args.partition_by}' (choose from {', '.join(TAG_FIELDS)})")
+    
+    if args.profile_startup:
+        from startup_profile import profile_startup, print_profile, DEFAULT_STARTUP_BUDGET_MS
+        budget_ms = int(os.getenv('STARTUP_BUDGET_MS', str(DEFAULT_STARTUP_BUDGET_MS)))
+        raise SystemExit(0 if print_profile(profile_startup(), budget_ms) else 1)
+    
+    if args.send_digest:
+        from digest import DigestQueue
+        try:
+            digest_queue = DigestQueue.from_env()
+        except ValueError as e:
+            parser.error(str(e))
+        with digest_queue:
+            # Open alerts, for the switches polled in this digest period only
+            ongoing = ()
+            if os.getenv('ALERT_STATE_DB', 'alert_state.db'):
+                from alert_state import AlertStateMachine
+                with AlertStateMachine.from_env() as alert_machine:
+                    ongoing = alert_machine.alerts(hosts=set(digest_queue.hosts()))
+            raise SystemExit(0 if send_digest(digest_queue, ongoing=ongoing) else 1)
+    
+    try:
+        collectors = load_collectors(args.collectors)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    # Coordinator mode: the inventory is sharded across collector nodes that poll and stream results back
+    coordinator = None
+    if args.collector_nodes:
+        from distributed import Coordinator
+        try:
+            coordinator = Coordinator.from_env(args.collector_nodes)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    sweep = functools.partial(run_sweep, collectors=collectors, coordinator=coordinator,
+                              partition_by=args.partition_by or '', report_pdf=args.pdf, digest=args.digest)
+    if args.trace or args.trace_output:
+        tracing.set_tracer(tracing.Tracer())
+        sweep = functools.partial(traced_sweep, trace_output=args.trace_output, trace_format=args.trace_format,
+                                  collectors=collectors, coordinator=coordinator, partition_by=args.partition_by or '',
+                                  report_pdf=args.pdf, digest=args.digest)
+    
+    if not args.daemon:
+        try:
+            list_of_switches = load_switches(args.inventory)
+        except Exception as e:
+            logger.error(f"Could not load inventory {args.inventory}: {str(e)}")
+            return
+        if list_of_switches is not None:
+            # A one-shot run can still leave metrics for node_exporter's textfile collector
+            metrics = None
+            if os.getenv('METRICS_TEXTFILE'):
+                from metrics import SweepMetrics
+                metrics = SweepMetrics()
+            sweep(list_of_switches, metrics=metrics)
+        return
+    
+    try:
+        schedule = parse_schedule(args.cron, args.interval)
+    except ValueError as e:
+        parser.error(str(e))
+    # Sessions stay open between sweeps unless SSH_SESSION_POOL=false (collector nodes open their own)
+    pool = None
+    if coordinator is None and os.getenv('SSH_SESSION_POOL', 'true').lower() == 'true':
+        pool = SessionPool.from_env()
+        pool.start_keepalive()
+    # Scrapes are answered from the last sweep's snapshot and never trigger SSH work
+    metrics = None
+    metrics_server = None
+    if args.metrics_port or os.getenv('METRICS_TEXTFILE'):
+        from metrics import SweepMetrics, start_metrics_server, DEFAULT_METRICS_ADDR
+        metrics = SweepMetrics()
+        if args.metrics_port:
+            metrics_server = start_metrics_server(metrics, args.metrics_port,
+                                                  os.getenv('METRICS_ADDR', DEFAULT_METRICS_ADDR))
+    try:
+        run_daemon(schedule, functools.partial(sweep, pool=pool, metrics=metrics),
+                   InventoryWatcher(args.inventory, load_switches), stagger_fraction=args.stagger,
+                   run_now=args.run_now)
+    finally:
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if pool is not None:
+            pool.close()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Pluggable per-device data collectors
+Each collector declares the CLI command(s) it needs, the parser that turns their output
+into readings and the state -> severity rules those readings are judged by. Every
+selected collector runs over the switch's one SSH session, and the results are merged
+into a single per-device record for alerting and reporting
+"""
+
+import re
+
+from temp_parser import TempReading, STATE_SEVERITY, SEVERITY_ORDER, parse_env_temp
+
+DEFAULT_COLLECTORS = ('temp',)
+
+# A fan or supply slot that is simply empty is not an alert
+FAN_STATES = {
+    'ok': 'ok', 'good': 'ok', 'normal': 'ok', 'green': 'ok', 'present': 'ok', 'not present': 'ok', 'absent': 'ok',
+    'warning': 'warning', 'minor': 'warning', 'yellow': 'warning', 'degraded': 'warning',
+    'fail': 'critical', 'failed': 'critical', 'failure': 'critical', 'faulty': 'critical', 'bad': 'critical',
+    'not functioning': 'critical', 'red': 'critical', 'major': 'critical', 'down': 'critical',
+    'shutdown': 'critical',
+}
+POWER_STATES = dict(FAN_STATES, **{
+    'on': 'ok', 'powered on': 'ok',
+    'off': 'critical', 'powered off': 'critical', 'powered down': 'critical', 'no input power': 'critical',
+    'input power fail': 'critical', 'fail-off': 'critical', 'fail/shutdown': 'critical',
+})
+
+_NUM = r'-?\d+(?:\.\d+)?'
+
+# IOS status lines: "FAN is OK", "Switch 1 FAN 2 is OK", "FAN PS-1 is NOT PRESENT"
+FAN_STATUS_RE = re.compile(r'^\s*(?:Switch\s+(?P<switch>\d+)\s*:?\s*)?FAN(?P<name>(?:\s+(?!is\b)\S+)?)\s+is\s+'
+                           r'(?P<state>\w[\w /-]*?)\s*$', re.I)
+# Catalyst 3850/9k table: "  1       1     14240     OK      Front to Back"
+FAN_TABLE_RE = re.compile(r'^\s*(?P<switch>\d+)\s+(?P<name>\d+)\s+\d+\s+(?P<state>[A-Za-z][\w-]*(?: [A-Za-z][\w-]*)?)'
+                          r'(?:\s{2,}.*)?\s*$')
+# NX-OS: "Fan1(sys_fan1)      N9K-C9300-FAN2       --     Ok"
+NXOS_FAN_RE = re.compile(r'^\s*(?P<name>Fan(?:\d|_in_PS)\S*)\s+\S+.*?\s(?P<state>[A-Za-z][\w-]*)\s*$')
+
+# IOS status lines: "POWER is OK", "RPS is NOT PRESENT", "POWER SUPPLY 1 is PRESENT"
+POWER_STATUS_RE = re.compile(r'^\s*(?:Switch\s+(?P<switch>\d+)\s*:?\s*)?(?P<name>POWER(?:\s+SUPPLY)?(?:\s+(?!is\b)\S+)?|RPS)'
+                             r'\s+is\s+(?P<state>\w[\w /-]*?)\s*$', re.I)
+# Catalyst table: "1A  PWR-C1-715WAC       DCB1844G1ZY  OK              Good     Good     715"
+#                 "1B  Not Present"
+POWER_TABLE_RE = re.compile(r'^\s*(?P<switch>\d+)(?P<name>[A-Z])\s+(?:(?P<absent>Not Present)|\S+\s+\S+\s+'
+                            r'(?P<state>[A-Za-z][\w-]*(?: [A-Za-z][\w-]*){0,2}))(?:\s{2,}.*)?\s*$', re.I)
+# NX-OS: "1        N9K-PAC-650W-B             102 W        650 W     Ok"
+NXOS_POWER_RE = re.compile(rf'^\s*(?P<name>\d+)\s+\S+\s+{_NUM}\s*W\s+{_NUM}\s*W\s+(?P<state>[A-Za-z][\w-]*)\s*$')
+
+
+def _fan_name(fields):
+    name = re.sub(r'\(.*\)$', '', fields['name'].strip())  # NX-OS "Fan1(sys_fan1)"
+    if name.lower().startswith('fan'):
+        return name
+    return f"Fan {name}" if name else 'Fan'
+
+
+def _power_name(fields):
+    name = fields['name'].strip()
+    if name.upper() == 'RPS':
+        return 'RPS'
+    if fields.get('switch') and len(name) == 1:
+        return f"PS {fields['switch']}{name}"  # table slot letter
+    name = re.sub(r'^POWER(?:\s+SUPPLY)?\s*', '', name, flags=re.I)
+    return f"PS {name}" if name else 'Power'
+
+
+def classify(state, states, default='warning'):
+    """
+    Severity of a device-reported status word using a collector's rules; unrecognised statuses get default
+    """
+    return states.get(' '.join(state.lower().split()), default)
+
+
+def parse_status_lines(output, patterns, states, kind):
+    """
+    Readings for the lines of output matching any of patterns [(regex, name function)]
+    The reading's state is the classified severity, so reading_severity() applies unchanged.
+    """
+    readings = []
+    for lineno, line in enumerate(output.split('\n')):
+        for pattern, name in patterns:
+            match = pattern.match(line)
+            if match:
+                fields = match.groupdict()
+                state = 'not present' if fields.get('absent') else fields['state']
+                readings.append(TempReading(name(fields), None, None, None, classify(state, states), fields.get('switch'),
+                                            line, lineno, kind))
+                break
+    return readings
+
+
+def parse_env_fan(output, platform='auto', states=FAN_STATES):
+    return parse_status_lines(output, [(FAN_STATUS_RE, _fan_name), (FAN_TABLE_RE, _fan_name),
+                                       (NXOS_FAN_RE, _fan_name)], states, 'fan')
+
+
+def parse_env_power(output, platform='auto', states=POWER_STATES):
+    return parse_status_lines(output, [(POWER_STATUS_RE, _power_name), (POWER_TABLE_RE, _power_name),
+                                       (NXOS_POWER_RE, _power_name)], states, 'power')
+
+
+def _parse_temp(output, platform='auto', states=STATE_SEVERITY):
+    # Temperature states are judged by temp_parser.reading_severity together with the thresholds
+    return parse_env_temp(output, platform)
+
+
+def parse_env_all(output, platform='auto', states=None):
+    """
+    'show env all' carries temperature, fan and power sections; each line yields at most one reading
+    states, if given, replaces the fan and power rules
+    """
+    readings = parse_env_temp(output, platform)
+    taken = {reading.lineno for reading in readings}
+    for parse, default_states in ((parse_env_fan, FAN_STATES), (parse_env_power, POWER_STATES)):
+        for reading in parse(output, platform, states or default_states):
+            if reading.lineno not in taken:
+                taken.add(reading.lineno)
+                readings.append(reading)
+    return sorted(readings, key=lambda reading: reading.lineno)
+
+
+class Collector:
+    """
+    One kind of device data: the commands to run, parse(output, platform, states) -> readings,
+    and the {device state: severity} rules applied to what it parses
+    """
+
+    def __init__(self, name, commands, parse, states, description):
+        self.name = name
+        self.commands = tuple(commands)
+        self.parse = parse
+        self.states = states
+        self.description = description
+
+    def readings(self, output, platform='auto'):
+        return self.parse(output, platform, self.states)
+
+    def __repr__(self):
+        return f"Collector({self.name!r}, {list(self.commands)!r})"
+
+
+COLLECTORS = {}
+
+
+def register(collector):
+    """
+    Add a collector to the registry so COLLECTORS / --collectors can select it by name
+    """
+    COLLECTORS[collector.name] = collector
+    return collector
+
+
+register(Collector('temp', ['show env temp'], _parse_temp, STATE_SEVERITY,
+                   'Temperature sensors with yellow/red thresholds'))
+register(Collector('fans', ['show env fan'], parse_env_fan, FAN_STATES, 'Fan status'))
+register(Collector('power', ['show env power'], parse_env_power, POWER_STATES, 'Power supply status'))
+register(Collector('env_all', ['show env all'], parse_env_all, None,
+                   'Temperature, fans and power from one command (instead of temp, fans and power)'))
+
+# Collectors that already read what others do; selecting both would collect every sensor twice
+OVERLAPPING = {'env_all': ('temp', 'fans', 'power')}
+
+
+def load_collectors(names=None):
+    """
+    Collectors for a comma-separated string or list of names (default: DEFAULT_COLLECTORS)
+    """
+    if names is None or names == '':
+        names = DEFAULT_COLLECTORS
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    unknown = [name for name in names if name not in COLLECTORS]
+    if unknown:
+        raise ValueError(f"Unknown collector '{unknown[0]}' (expected one of: {', '.join(COLLECTORS)})")
+    for name, covered in OVERLAPPING.items():
+        overlap = [other for other in covered if other in names]
+        if name in names and overlap:
+            raise ValueError(f"Collector '{name}' already collects {', '.join(covered)} - "
+                             f"use it instead of {', '.join(overlap)}, not with it")
+    return [COLLECTORS[name] for name in dict.fromkeys(names)]
+
+
+def collector_commands(collectors):
+    """
+    Every command the collectors need, in order and without duplicates
+    """
+    return list(dict.fromkeys(command for collector in collectors for command in collector.commands))
+
+
+def command_parsers(collectors):
+    """
+    command -> the collector whose parser reads its output
+    """
+    return {command: collector for collector in collectors for command in collector.commands}
+
+
+def device_record(result, analyses):
+    """
+    Merge one switch's per-command analyses into a single record: host, hostname, error,
+    overall severity, every reading, and the severity each collector found
+    """
+    readings = []
+    by_collector = {}
+    for analysis in analyses:
+        if analysis['kind'] != 'output':
+            continue
+        readings.extend(analysis['readings'])
+        name = analysis.get('collector') or 'temp'
+        by_collector[name] = max(by_collector.get(name, 'ok'), analysis['severity'], key=SEVERITY_ORDER.get)
+    return {
+        'host': result['host'],
+        'hostname': result['hostname'] or result['host'],
+        'error': result['error'],
+        'severity': max(by_collector.values(), key=SEVERITY_ORDER.get, default='ok'),
+        'readings': readings,
+        'collectors': by_collector,
+    }
+
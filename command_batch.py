@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Pipelined command execution
+send_command waits for the prompt after every command, so each one costs a full
+network round trip. Here all of a switch's show commands are written to the channel
+at once and the output is read until one prompt per command has come back, then split
+on those prompts. IOS, IOS-XE and NX-OS all queue typed-ahead lines once the session
+has 'terminal length 0' (netmiko sets it at login), so one exchange serves them all
+"""
+
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_TIMEOUT = 10.0
+
+# How long to sleep between channel reads while output is still arriving
+_POLL_INTERVAL = 0.01
+
+
+class BatchTimeout(Exception):
+    pass
+
+
+def prompt_pattern(base_prompt):
+    """
+    Regex for the device prompt, e.g. 'SW1#', 'SW1>' or 'SW1(config)#'
+    """
+    return re.compile(rf'{re.escape(base_prompt)}(?:\([^)\r\n]*\))?[#>]')
+
+
+def split_output(stream, commands, pattern):
+    """
+    Split the text read back after a pipelined write into one output per command
+
+    The stream holds each command's echo, its output and the next prompt. Depending on
+    when the device echoes typed-ahead input the echoes sit before their own output (IOS)
+    or all at the start, so leading lines that repeat a sent command are dropped.
+    """
+    text = stream.replace('\r\n', '\n').replace('\r', '\n')
+    segments = pattern.split(text)[:len(commands)]
+    sent = {command.strip() for command in commands}
+    outputs = []
+    for segment in segments:
+        lines = segment.split('\n')
+        while lines and (lines[0].strip() in sent or not lines[0].strip()):
+            lines.pop(0)
+        outputs.append('\n'.join(lines).strip('\n'))
+    return outputs
+
+
+def send_batched(net_connect, commands, read_timeout=None):
+    """
+    Run commands on an open netmiko session in one exchange
+
+    Returns [(command, output, seconds)], where seconds is the time until that command's
+    prompt came back after the previous one. Raises BatchTimeout if the device hasn't
+    returned every prompt within read_timeout seconds per command.
+    """
+    pattern = prompt_pattern(net_connect.base_prompt)
+    timeout = (read_timeout or DEFAULT_BATCH_TIMEOUT) * len(commands)
+    newline = getattr(net_connect, 'RETURN', '\n')
+
+    net_connect.clear_buffer()
+    start = time.monotonic()
+    net_connect.write_channel(''.join(f"{command}{newline}" for command in commands))
+
+    stream = ''
+    echo_at = -1
+    prompt_times = []
+    while len(prompt_times) < len(commands):
+        chunk = net_connect.read_channel()
+        if chunk:
+            stream += chunk
+            now = time.monotonic()
+            # A prompt still in flight from before the write must not count, so start at the first echo
+            if echo_at < 0:
+                echo_at = stream.find(commands[0])
+            if echo_at >= 0:
+                seen = len(pattern.findall(stream, echo_at))
+                prompt_times.extend([now] * (seen - len(prompt_times)))
+            continue
+        if time.monotonic() - start > timeout:
+            raise BatchTimeout(f"Batched commands returned {len(prompt_times)} of {len(commands)} prompts "
+                               f"within {timeout:.0f}s")
+        time.sleep(_POLL_INTERVAL)
+
+    outputs = split_output(stream[echo_at:], commands, pattern)
+    previous = start
+    results = []
+    for command, output, finished in zip(commands, outputs, prompt_times):
+        results.append((command, output, finished - previous))
+        previous = finished
+    return results
@@ -4,7 +4,7 @@ Script to create a sample Excel file for switch configuration
 This creates switchFile.xlsx with the proper structure
 """
 
-import pandas as pd
+from openpyxl import Workbook
 
 # Sample switch data - replace with your actual switch information
 switch_data = [
@@ -34,15 +34,21 @@ switch_data = [
     }
 ]
 
-# Create DataFrame
-df = pd.DataFrame(switch_data)
+columns = list(switch_data[0])
+
+# Create the workbook: one header row, then one row per switch
+workbook = Workbook()
+sheet = workbook.active
+sheet.append(columns)
+for switch in switch_data:
+    sheet.append([switch.get(col) for col in columns])
 
 # Save to Excel file
 excel_filename = 'switchFile.xlsx'
-df.to_excel(excel_filename, index=False, engine='openpyxl')
+workbook.save(excel_filename)
 
 print(f"Created {excel_filename} with {len(switch_data)} sample switches")
 print("Please update the file with your actual switch connection details before running the temperature monitoring script.")
 print("\nColumns in the Excel file:")
-for col in df.columns:
-    print(f"  - {col}")
\ No newline at end of file
+for col in columns:
+    print(f"  - {col}")
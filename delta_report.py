@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Delta reporting
+Keeps each switch's severity and a fingerprint of its sensor states from the last
+report that was sent, so a sweep where nothing material changed can skip the PDF
+and email, or send only the switches that went into or out of warning/critical
+"""
+
+import hashlib
+import json
+import os
+import logging
+
+from temp_parser import SEVERITY_ORDER, sensor_key, reading_severity
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELTA_STATE_FILE = '.delta_state.json'
+DELTA_MODES = ('off', 'skip', 'changes')
+DEFAULT_FULL_REPORT_EVERY = 86400
+
+# 'unreachable' ranks between ok and warning: losing a switch is worth reporting, but below a real alert
+STATUS_ORDER = {'ok': 0, 'unreachable': 1, 'warning': 2, 'critical': 3}
+
+
+def host_status(result, analyses):
+    """
+    Severity, fingerprint and alert details for one polled switch
+    The fingerprint covers each sensor's device state and severity (not the exact temperature),
+    so a sensor drifting by a degree inside the same band is not a change.
+    """
+    if result['error'] and not result['outputs']:
+        severity = 'unreachable'
+    else:
+        severity = max((a['severity'] for a in analyses if a['kind'] == 'output'), key=SEVERITY_ORDER.get,
+                       default='ok')
+    items = sorted(f"{sensor_key(r)}|{r.state}|{reading_severity(r)}" for a in analyses for r in a['readings'])
+    details = [detail for a in analyses for detail in a['critical_details'] + a['warning_details']]
+    if not items:
+        # Output the parser didn't recognise is fingerprinted by its alert lines instead
+        items = sorted(details)
+    return {
+        'hostname': result['hostname'] or result['host'],
+        'severity': severity,
+        'fingerprint': hashlib.sha1('\n'.join(items).encode()).hexdigest()[:16],
+        'details': details,
+    }
+
+
+class DeltaTracker:
+    """
+    Collects the current sweep's per-switch status, keyed by management IP
+    """
+
+    def __init__(self):
+        self.hosts = {}
+
+    def observe(self, result, analyses):
+        self.hosts[result['host']] = host_status(result, analyses)
+
+
+def diff(previous, current):
+    """
+    Material changes between the last reported state and this sweep
+
+    A change is reported when a switch's severity changed (including becoming
+    unreachable, or a switch in alert leaving the inventory), or when a switch
+    still in alert has a different set of sensors in alert.
+    Returns change dicts sorted worst-first: host, hostname, before, after, details.
+    """
+    changes = []
+    for host in current.keys() | previous.keys():
+        before = previous.get(host)
+        after = current.get(host)
+        before_severity = before['severity'] if before else None
+        after_severity = after['severity'] if after else None
+        if before_severity == after_severity:
+            if after_severity in (None, 'ok') or before['fingerprint'] == after['fingerprint']:
+                continue
+        elif before is None and after_severity == 'ok':
+            continue  # new switch, healthy
+        elif after is None and before_severity == 'ok':
+            continue  # removed switch, was healthy
+        changes.append({
+            'host': host,
+            # An unreachable switch has no prompt hostname, so keep the one from the last report
+            'hostname': (before if before and after_severity in (None, 'unreachable') else after)['hostname'],
+            'before': before_severity or 'new',
+            'after': after_severity or 'removed',
+            'details': after['details'] if after else [],
+        })
+    changes.sort(key=lambda change: (-STATUS_ORDER.get(change['after'], 0), change['hostname']))
+    return changes
+
+
+def summarize_changes(changes):
+    """
+    Short phrase for the email subject, e.g. '2 critical, 1 recovered'
+    """
+    counts = {}
+    for change in changes:
+        if change['after'] in ('critical', 'warning', 'unreachable') and change['before'] != change['after']:
+            label = change['after']
+        elif change['after'] in ('ok', 'removed'):
+            label = 'recovered' if change['after'] == 'ok' else 'removed'
+        else:
+            label = 'changed'
+        counts[label] = counts.get(label, 0) + 1
+    order = ('critical', 'warning', 'unreachable', 'changed', 'recovered', 'removed')
+    return ', '.join(f"{counts[label]} {label}" for label in order if label in counts)
+
+
+class DeltaState:
+    """
+    Last reported per-switch state, persisted as JSON between runs
+    """
+
+    def __init__(self, path=DEFAULT_DELTA_STATE_FILE):
+        self.path = path
+        self.hosts = None
+        self.reported_at = None
+        self.full_report_at = None
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.hosts = data['hosts']
+            self.reported_at = data.get('reported_at')
+            self.full_report_at = data.get('full_report_at')
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable delta state {path}: {str(e)}")
+
+    def full_report_due(self, ts, every=DEFAULT_FULL_REPORT_EVERY):
+        """
+        A full report goes out on the first run and then at least every `every` seconds (0 = never again)
+        """
+        if self.hosts is None or self.full_report_at is None:
+            return True
+        return bool(every) and ts - self.full_report_at >= every
+
+    def record(self, hosts, ts, full):
+        """
+        Make this sweep's state the baseline for the next comparison and save it
+        """
+        self.hosts = {host: {key: status[key] for key in ('hostname', 'severity', 'fingerprint')}
+                      for host, status in hosts.items()}
+        self.reported_at = ts
+        if full:
+            self.full_report_at = ts
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'reported_at': self.reported_at, 'full_report_at': self.full_report_at,
+                           'hosts': self.hosts}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save delta state {self.path}: {str(e)}")
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Digest batching
+Queues every sweep's readings and alert transitions in SQLite and, on its own schedule,
+aggregates them into one summary: min/max/mean per sensor, time spent above threshold
+and alert episodes. Only new critical alerts are still emailed as they happen
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import sqlite3
+import time
+import logging
+
+from scheduler import parse_schedule
+from temp_parser import SEVERITY_ORDER, sensor_key, reading_severity
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIGEST_QUEUE_DB = 'digest_queue.db'
+DEFAULT_DIGEST_SCHEDULE = '0 7 * * *'
+DEFAULT_TOP_SENSORS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS digest_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER
+);
+CREATE TABLE IF NOT EXISTS digest_sweeps (
+    ts INTEGER PRIMARY KEY,
+    switches INTEGER NOT NULL,
+    unreachable INTEGER NOT NULL,
+    immediate INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS digest_sensors (
+    host TEXT NOT NULL,
+    sensor TEXT NOT NULL,
+    first_ts INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    min_celsius REAL NOT NULL,
+    max_celsius REAL NOT NULL,
+    sum_celsius REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    above_samples INTEGER NOT NULL,
+    above_seconds INTEGER NOT NULL,
+    critical_seconds INTEGER NOT NULL,
+    severity TEXT NOT NULL,
+    yellow REAL,
+    red REAL,
+    PRIMARY KEY (host, sensor)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS digest_critical (
+    host TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS digest_transitions (
+    ts INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    sensor TEXT NOT NULL,
+    before TEXT NOT NULL,
+    after TEXT NOT NULL,
+    celsius REAL
+);
+"""
+
+# Time above threshold is counted from a sample above it to the sensor's next sample
+UPSERT_SENSOR = """
+INSERT INTO digest_sensors (host, sensor, first_ts, last_ts, min_celsius, max_celsius, sum_celsius, samples,
+                            above_samples, above_seconds, critical_seconds, severity, yellow, red)
+VALUES (:host, :sensor, :ts, :ts, :celsius, :celsius, :celsius, 1, :above, 0, 0, :severity, :yellow, :red)
+ON CONFLICT (host, sensor) DO UPDATE SET
+    min_celsius = MIN(min_celsius, excluded.min_celsius),
+    max_celsius = MAX(max_celsius, excluded.max_celsius),
+    sum_celsius = sum_celsius + excluded.sum_celsius,
+    samples = samples + 1,
+    above_samples = above_samples + excluded.above_samples,
+    above_seconds = above_seconds + CASE WHEN severity != 'ok' THEN excluded.last_ts - last_ts ELSE 0 END,
+    critical_seconds = critical_seconds + CASE WHEN severity = 'critical' THEN excluded.last_ts - last_ts ELSE 0 END,
+    last_ts = excluded.last_ts,
+    severity = excluded.severity,
+    yellow = excluded.yellow,
+    red = excluded.red
+"""
+
+SENSOR_COLUMNS = ('host', 'sensor', 'first_ts', 'last_ts', 'min_celsius', 'max_celsius', 'mean_celsius', 'samples',
+                  'above_samples', 'above_seconds', 'critical_seconds', 'severity', 'yellow', 'red')
+
+
+def format_duration(seconds):
+    """
+    '2h 05m', '14m' or '0m'
+    """
+    minutes = int(seconds) // 60
+    return f"{minutes // 60}h {minutes % 60:02d}m" if minutes >= 60 else f"{minutes}m"
+
+
+def format_ts(ts):
+    return datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M') if ts is not None else ''
+
+
+def build_episodes(transitions, ongoing=()):
+    """
+    Alert episodes from alert state transitions [(ts, host, sensor, before, after, celsius)] in time order
+
+    An episode runs from a sensor leaving OK until it is RECOVERED, at its worst state.
+    start is None for an alert already open when the period began and end is None for one
+    still open; ongoing [(host, sensor, state, celsius)] (AlertStateMachine.alerts()) adds
+    alerts open for the whole period.
+    """
+    episodes = []
+    open_episodes = {}
+    for ts, host, sensor, before, after, celsius in transitions:
+        key = (host, sensor)
+        episode = open_episodes.get(key)
+        if after == 'recovered':
+            if episode is None:
+                episode = {'host': host, 'sensor': sensor, 'start': None, 'peak': before, 'celsius': None}
+                episodes.append(episode)
+            episode['end'] = ts
+            open_episodes.pop(key, None)
+            continue
+        if after not in ('warning', 'critical'):
+            continue
+        if episode is None:
+            episode = open_episodes[key] = {'host': host, 'sensor': sensor, 'end': None, 'peak': after,
+                                            'celsius': celsius, 'start': ts if before in ('ok', 'recovered') else None}
+            episodes.append(episode)
+        elif SEVERITY_ORDER[after] > SEVERITY_ORDER[episode['peak']]:
+            episode['peak'], episode['celsius'] = after, celsius
+    seen = {(episode['host'], episode['sensor']) for episode in episodes}
+    for host, sensor, state, celsius in ongoing:
+        if (host, sensor) not in seen:
+            episodes.append({'host': host, 'sensor': sensor, 'start': None, 'end': None, 'peak': state,
+                             'celsius': celsius})
+    episodes.sort(key=lambda episode: (-SEVERITY_ORDER[episode['peak']], episode['host'], episode['sensor']))
+    return episodes
+
+
+def above_threshold(digest):
+    """
+    Sensors that read above their warning threshold at least once, longest first
+    """
+    return sorted((sensor for sensor in digest['sensors'] if sensor['above_samples']),
+                  key=lambda sensor: (-sensor['above_seconds'], -sensor['max_celsius'], sensor['host']))
+
+
+def hottest(digest, count=DEFAULT_TOP_SENSORS):
+    """
+    The count sensors with the highest maximum temperature
+    """
+    return sorted(digest['sensors'], key=lambda sensor: (-sensor['max_celsius'], sensor['host']))[:count]
+
+
+def write_csv(digest, filename):
+    """
+    Every sensor's digest statistics as CSV (SENSOR_COLUMNS, times as local dates)
+    """
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(SENSOR_COLUMNS)
+        for sensor in digest['sensors']:
+            writer.writerow([format_ts(sensor[column]) if column.endswith('_ts') else
+                             round(sensor[column], 1) if column == 'mean_celsius' else sensor[column]
+                             for column in SENSOR_COLUMNS])
+    return filename
+
+
+class DigestQueue:
+    """
+    Local queue of sweep results waiting for the next digest
+
+    Each sensor keeps a running aggregate for the digest period (one row, whatever the
+    sweep rate), so the queue stays small; transitions and sweeps are kept as rows.
+    A digest is due once the schedule has fired since the last one was sent.
+    """
+
+    def __init__(self, path=DEFAULT_DIGEST_QUEUE_DB, schedule=DEFAULT_DIGEST_SCHEDULE):
+        self.path = path
+        self.schedule = parse_schedule(schedule) if isinstance(schedule, str) else schedule
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._ts = None
+        self._pending = {}
+        self._transitions = []
+
+    @classmethod
+    def from_env(cls, **overrides):
+        # DIGEST_SCHEDULE (cron) wins over DIGEST_INTERVAL (seconds); daily at 07:00 if neither is set
+        interval = os.getenv('DIGEST_INTERVAL') or None
+        settings = {
+            'path': os.getenv('DIGEST_QUEUE_DB', DEFAULT_DIGEST_QUEUE_DB),
+            'schedule': parse_schedule(os.getenv('DIGEST_SCHEDULE') or (None if interval else DEFAULT_DIGEST_SCHEDULE),
+                                       interval),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Queueing
+
+    def begin_sweep(self, ts=None):
+        self._ts = int(ts if ts is not None else time.time())
+        self._pending = {}
+        self._transitions = []
+
+    def add_readings(self, host, readings):
+        """
+        Queue one device's temperature readings (a sensor reported twice keeps its hottest reading)
+        """
+        for reading in readings:
+            if reading.celsius is None or reading.kind != 'temperature':
+                continue
+            key = (host, sensor_key(reading))
+            if key in self._pending and self._pending[key]['celsius'] >= reading.celsius:
+                continue
+            severity = reading_severity(reading)
+            self._pending[key] = {'host': host, 'sensor': key[1], 'ts': self._ts, 'celsius': reading.celsius,
+                                  'above': int(severity != 'ok'), 'severity': severity, 'yellow': reading.yellow,
+                                  'red': reading.red}
+
+    def add_transitions(self, transitions):
+        """
+        Queue alert state transitions (AlertStateMachine.transitions) for the episode list
+        """
+        self._transitions.extend((self._ts, t['host'], t['sensor'], t['before'], t['after'], t['celsius'])
+                                 for t in transitions)
+
+    def new_critical(self, critical_hosts):
+        """
+        The critical_hosts that were not critical in the previous sweep; remembers this sweep's set
+        For running without alert states, where there are no transitions to say what became critical.
+        """
+        previous = {row[0] for row in self.conn.execute('SELECT host FROM digest_critical')}
+        with self.conn:
+            self.conn.execute('DELETE FROM digest_critical')
+            self.conn.executemany('INSERT INTO digest_critical VALUES (?)', [(host,) for host in set(critical_hosts)])
+        return sorted(set(critical_hosts) - previous)
+
+    def end_sweep(self, switches, unreachable=0, immediate=False):
+        """
+        Commit the sweep; immediate records that its report was also emailed straight away
+        """
+        with self.conn:
+            self.conn.executemany(UPSERT_SENSOR, list(self._pending.values()))
+            self.conn.executemany('INSERT INTO digest_transitions VALUES (?, ?, ?, ?, ?, ?)', self._transitions)
+            self.conn.execute('INSERT OR REPLACE INTO digest_sweeps VALUES (?, ?, ?, ?)',
+                              (self._ts, switches, unreachable, int(immediate)))
+        logger.info(f"Queued {len(self._pending)} sensor readings for the next digest")
+        self._pending, self._transitions = {}, []
+
+    # Digest
+
+    def hosts(self):
+        """
+        Switches with readings queued in this period
+        """
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT host FROM digest_sensors ORDER BY host')]
+
+    def period_start(self):
+        """
+        When the current digest period began: the last digest sent, else the first queued sweep
+        """
+        row = self.conn.execute("SELECT value FROM digest_meta WHERE key = 'sent'").fetchone()
+        if row is not None:
+            return row[0]
+        return self.conn.execute('SELECT MIN(ts) FROM digest_sweeps').fetchone()[0]
+
+    def due(self, ts=None):
+        """
+        True once the schedule has fired since the period began and sweeps are queued
+        """
+        ts = ts if ts is not None else time.time()
+        start = self.period_start()
+        if start is None or not self.conn.execute('SELECT 1 FROM digest_sweeps LIMIT 1').fetchone():
+            return False
+        return self.schedule.next_after(datetime.datetime.fromtimestamp(start)) <= datetime.datetime.fromtimestamp(ts)
+
+    def build(self, ts=None, ongoing=()):
+        """
+        The queued period as a digest dict: start, end, sweeps, immediate (sweeps already
+        emailed), switches, unreachable, sensors (SENSOR_COLUMNS dicts) and episodes
+        """
+        ts = int(ts if ts is not None else time.time())
+        sweeps, immediate, switches, unreachable = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(immediate), 0), COALESCE(MAX(switches), 0), COALESCE(SUM(unreachable), 0) '
+            'FROM digest_sweeps').fetchone()
+        sensors = [dict(zip(SENSOR_COLUMNS, row)) for row in self.conn.execute(
+            'SELECT host, sensor, first_ts, last_ts, min_celsius, max_celsius, sum_celsius / samples, samples, '
+            'above_samples, above_seconds, critical_seconds, severity, yellow, red '
+            'FROM digest_sensors ORDER BY host, sensor')]
+        transitions = self.conn.execute('SELECT * FROM digest_transitions ORDER BY ts, rowid').fetchall()
+        return {
+            'start': self.period_start() or ts,
+            'end': ts,
+            'sweeps': sweeps,
+            'immediate': immediate,
+            'switches': switches,
+            'unreachable': unreachable,
+            'sensors': sensors,
+            'episodes': build_episodes(transitions, ongoing),
+        }
+
+    def clear(self, sent_at):
+        """
+        Empty the queue once a digest is sent; the next period starts at sent_at
+        """
+        with self.conn:
+            for table in ('digest_sweeps', 'digest_sensors', 'digest_transitions'):
+                self.conn.execute(f'DELETE FROM {table}')
+            self.conn.execute("INSERT OR REPLACE INTO digest_meta VALUES ('sent', ?)", (int(sent_at),))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the sweeps queued for the next temperature digest')
+    parser.add_argument('--db', default=os.getenv('DIGEST_QUEUE_DB', DEFAULT_DIGEST_QUEUE_DB))
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_SENSORS, help='Hottest sensors to list (default: 20)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No digest queue at {args.db}")
+        return
+
+    with DigestQueue.from_env(path=args.db) as queue:
+        digest = queue.build()
+        next_digest = queue.schedule.next_after(datetime.datetime.fromtimestamp(digest['start']))
+        print(f"{digest['sweeps']} sweeps queued since {format_ts(digest['start'])}, next digest {next_digest:%Y-%m-%d %H:%M}")
+        for episode in digest['episodes']:
+            print(f"  {episode['peak'].upper():<8} {episode['host']} {episode['sensor']} "
+                  f"{format_ts(episode['start']) or 'before'} - {format_ts(episode['end']) or 'ongoing'}")
+        print(f"{'Switch':<20} {'Sensor':<20} {'Min':>6} {'Max':>6} {'Mean':>6} {'Above':>8}")
+        for sensor in hottest(digest, args.top):
+            print(f"{sensor['host']:<20} {sensor['sensor']:<20} {sensor['min_celsius']:>6.1f} "
+                  f"{sensor['max_celsius']:>6.1f} {sensor['mean_celsius']:>6.1f} "
+                  f"{format_duration(sensor['above_seconds']):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Distributed polling across collector nodes
+The coordinator shards the inventory across collector nodes by site tag or consistent
+hash, each node polls its own shard with the normal poller and streams every result
+back as a JSON line, and the coordinator merges them in inventory order into the usual
+analysis, PDF and email path. A node is reached by running 'distributed.py worker'
+through a command (typically ssh); 'local:N' runs N worker processes on this machine
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import logging
+
+import tracing
+from hostname_cache import HostnameCache
+from poller import poll_switches, _new_result, _OrderedRelease
+
+logger = logging.getLogger(__name__)
+
+SHARD_MODES = ('hash', 'site')
+DEFAULT_SITE_FIELD = 'site'
+DEFAULT_NODE_TIMEOUT = 1800
+LOCAL_NODES_PREFIX = 'local:'
+
+# Virtual points per node on the hash ring; enough to keep shards within a few percent of each other
+RING_REPLICAS = 100
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+
+def _ring_hash(key):
+    return int.from_bytes(hashlib.md5(str(key).encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    Consistent hash ring: adding or removing a node only moves the keys that node gains or loses
+    """
+
+    def __init__(self, nodes, replicas=RING_REPLICAS):
+        points = sorted((_ring_hash(f"{node}#{replica}"), node) for node in nodes for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        return self._nodes[bisect.bisect(self._hashes, _ring_hash(key)) % len(self._nodes)]
+
+
+def shard_inventory(switches, nodes, by='hash', site_field=DEFAULT_SITE_FIELD):
+    """
+    {node: [index into switches]} for every node, each list in inventory order
+
+    by='hash' places each switch on the ring by management IP. by='site' keeps a site's
+    switches on one node: a site tag that names a node goes to that node, other sites
+    are placed on the ring by tag, and untagged switches by management IP.
+    """
+    if by not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode '{by}' (expected one of: {', '.join(SHARD_MODES)})")
+    if not nodes:
+        raise ValueError("No collector nodes to shard the inventory across")
+    ring = HashRing(nodes)
+    shards = {node: [] for node in nodes}
+    for index, switch in enumerate(switches):
+        site = switch.get(site_field) if by == 'site' else None
+        if site in shards:
+            node = site
+        elif site:
+            node = ring.node_for(f"site:{site}")
+        else:
+            node = ring.node_for(switch['host'])
+        shards[node].append(index)
+    return shards
+
+
+def parse_nodes(spec):
+    """
+    Collector node names from 'node-a,node-b', or 'local:N' for N local worker processes
+    Returns (nodes, local)
+    """
+    spec = (spec or '').strip()
+    if spec.startswith(LOCAL_NODES_PREFIX):
+        count = spec[len(LOCAL_NODES_PREFIX):]
+        if not count.isdigit() or int(count) < 1:
+            raise ValueError(f"'{spec}': expected local:N with N local workers")
+        count = int(count)
+        return [f"local-{number}" for number in range(1, count + 1)], True
+    nodes = list(dict.fromkeys(node.strip() for node in spec.split(',') if node.strip()))
+    if not nodes:
+        raise ValueError("No collector nodes given")
+    return nodes, False
+
+
+def _decode_result(result):
+    # JSON turns the (command, output) and (command, seconds) pairs into lists
+    result['outputs'] = [tuple(pair) for pair in result.get('outputs', [])]
+    result['command_times'] = [tuple(pair) for pair in result.get('command_times', [])]
+    return result
+
+
+def run_worker(job, out):
+    """
+    Poll one shard and write each result to out as a JSON line as soon as it is released
+
+    job is {'node', 'commands', 'switches': [[index, switch, cached hostname or None]],
+    'options': poll_switches keyword arguments}. Each line is {'index', 'result'}; a
+    final {'done': count} line marks a complete shard.
+    """
+    entries = job['switches']
+    # Hostnames the coordinator already knows, so HOSTNAME_SOURCE=config still costs no extra command
+    hostname_cache = HostnameCache(path='')
+    for _, switch, hostname in entries:
+        if hostname:
+            hostname_cache.put(switch['host'], hostname)
+    indexes = iter([index for index, _, _ in entries])
+
+    def emit(result):
+        # on_result is called in shard order, so the next index belongs to this result
+        out.write(json.dumps({'index': next(indexes), 'result': result}, default=str) + '\n')
+        out.flush()
+
+    poll_switches([switch for _, switch, _ in entries], job['commands'], hostname_cache=hostname_cache,
+                  on_result=emit, keep_results=False, **job.get('options', {}))
+    out.write(json.dumps({'done': len(entries)}) + '\n')
+    out.flush()
+
+
+class Coordinator:
+    """
+    Shards each sweep across collector nodes and merges their streamed results
+
+    node_command is run for every node with {node} replaced by its name and must start
+    'distributed.py worker' there (e.g. 'ssh {node} python3 /opt/switch-monitor/distributed.py worker');
+    None runs the workers as local processes instead.
+    """
+
+    def __init__(self, nodes, shard_by='hash', site_field=DEFAULT_SITE_FIELD, node_command=None,
+                 node_timeout=DEFAULT_NODE_TIMEOUT):
+        if shard_by not in SHARD_MODES:
+            raise ValueError(f"Unknown shard mode '{shard_by}' (expected one of: {', '.join(SHARD_MODES)})")
+        if not nodes:
+            raise ValueError("No collector nodes given")
+        self.nodes = list(nodes)
+        self.shard_by = shard_by
+        self.site_field = site_field
+        self.node_command = node_command
+        self.node_timeout = node_timeout
+        self.node_stats = {}
+        self._processes = {}
+
+    @classmethod
+    def from_env(cls, spec=None, **overrides):
+        """
+        Coordinator for COLLECTOR_NODES (or spec); remote nodes need COLLECTOR_NODE_COMMAND
+        """
+        nodes, local = parse_nodes(spec if spec is not None else os.getenv('COLLECTOR_NODES'))
+        node_command = None if local else os.getenv('COLLECTOR_NODE_COMMAND')
+        if not local and not node_command:
+            raise ValueError("COLLECTOR_NODE_COMMAND is needed to reach remote collector nodes "
+                             "(or use COLLECTOR_NODES=local:N)")
+        settings = {
+            'nodes': nodes,
+            'shard_by': os.getenv('SHARD_BY', 'hash').lower(),
+            'node_command': node_command,
+            'node_timeout': float(os.getenv('COLLECTOR_NODE_TIMEOUT', str(DEFAULT_NODE_TIMEOUT))),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def command_for(self, node):
+        if self.node_command is None:
+            return [sys.executable, WORKER_SCRIPT, 'worker']
+        return shlex.split(self.node_command.format(node=node))
+
+    def _run_node(self, node, job, messages):
+        """
+        Start one node's worker, send it its shard and queue every message it streams back
+        Runs on its own thread; always ends with an {'exit': ...} message.
+        """
+        with tracing.span('node', node=node, switches=len(job['switches'])):
+            try:
+                process = subprocess.Popen(self.command_for(node), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                           text=True, bufsize=1)
+            except OSError as e:
+                messages.put((node, {'exit': f"could not start ({str(e)})"}))
+                return
+            self._processes[node] = process
+            try:
+                process.stdin.write(json.dumps(job))
+                process.stdin.close()
+                for line in process.stdout:
+                    try:
+                        messages.put((node, json.loads(line)))
+                    except ValueError:
+                        logger.debug(f"Collector node {node}: ignoring non-JSON output {line.strip()[:80]!r}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Lost collector node {node}: {str(e)}")
+            finally:
+                code = process.wait()
+                messages.put((node, {'exit': f"exit status {code}"}))
+
+    def _stop(self, nodes):
+        for node in nodes:
+            process = self._processes.get(node)
+            if process is not None and process.poll() is None:
+                process.kill()
+
+    def poll(self, list_of_switches, commands, on_result=None, keep_results=True, hostname_cache=None,
+             host_health=None, **options):
+        """
+        Poll every switch on the collector nodes; same results and on_result ordering as poller.poll_switches
+
+        options (max_workers, backend, timeout, hostname_source, stagger, batch) are passed to
+        each node's poll_switches, so max_workers applies per node. With a HostHealth the
+        coordinator skips open circuits and sets each switch's adaptive timeouts before
+        sharding, and records every result, so that state stays in one place. Switches a
+        node never reports on (it failed, or ran past node_timeout) get an error result.
+        """
+        start = time.monotonic()
+        release = _OrderedRelease(len(list_of_switches), on_result, keep_results)
+        hints = {}
+        pending = []
+        for index, switch in enumerate(list_of_switches):
+            host = switch.get('host', 'Unknown')
+            switch = dict(switch)
+            if host_health is not None:
+                skip_reason = host_health.skip_reason(host)
+                if skip_reason:
+                    result = _new_result(switch)
+                    result.update(error=skip_reason, skipped=True)
+                    release.push(index, result)
+                    continue
+                connect_timeout, command_timeout = host_health.timeouts(host, options.get('timeout'))
+                if connect_timeout:
+                    switch.setdefault('conn_timeout', connect_timeout)
+                    switch.setdefault('auth_timeout', connect_timeout)
+                if command_timeout:
+                    switch.setdefault('read_timeout_override', command_timeout)
+            if hostname_cache is not None:
+                hints[host] = hostname_cache.get(host)
+            pending.append((index, switch))
+
+        def finish(index, result, record=True):
+            if record and host_health is not None:
+                host_health.record(result)
+            if hostname_cache is not None and result['hostname'] and not hints.get(result['host']):
+                hostname_cache.put(result['host'], result['hostname'])
+            release.push(index, result)
+
+        shards = shard_inventory([switch for _, switch in pending], self.nodes, self.shard_by, self.site_field)
+        messages = queue.Queue()
+        outstanding = {}
+        self.node_stats = {}
+        self._processes = {}
+        for node, positions in shards.items():
+            if not positions:
+                continue
+            entries = [[pending[position][0], pending[position][1], hints.get(pending[position][1]['host'])]
+                       for position in positions]
+            outstanding[node] = {index: switch for index, switch, _ in entries}
+            self.node_stats[node] = {'switches': len(entries), 'results': 0, 'status': None}
+            job = {'node': node, 'commands': list(commands), 'switches': entries, 'options': options}
+            threading.Thread(target=self._run_node, args=(node, job, messages), name=f"collector-{node}",
+                             daemon=True).start()
+        logger.info(f"Sharded {len(pending)} switches across {len(outstanding)} collector nodes by {self.shard_by}: "
+                    + ', '.join(f"{node}={stats['switches']}" for node, stats in self.node_stats.items()))
+
+        # Results are merged on this thread, so on_result never runs concurrently
+        running = set(outstanding)
+        deadline = start + self.node_timeout if self.node_timeout else None
+        while running:
+            try:
+                node, message = messages.get(timeout=max(0.0, deadline - time.monotonic()) if deadline else None)
+            except queue.Empty:
+                logger.error(f"Collector nodes {', '.join(sorted(running))} still running after "
+                             f"{self.node_timeout:.0f}s, stopping them")
+                self._stop(running)
+                deadline = None
+                continue
+            if 'index' in message:
+                switch = outstanding[node].pop(message['index'], None)
+                if switch is not None:
+                    self.node_stats[node]['results'] += 1
+                    finish(message['index'], _decode_result(message['result']))
+            elif 'exit' in message:
+                running.discard(node)
+                self.node_stats[node]['status'] = message['exit']
+                missing = outstanding[node]
+                if missing:
+                    logger.error(f"Collector node {node} stopped ({message['exit']}) with {len(missing)} switches unpolled")
+                for index, switch in sorted(missing.items()):
+                    result = _new_result(switch)
+                    result['error'] = f"Collector node {node} stopped before polling this switch ({message['exit']})"
+                    # The switch itself may be fine, so this doesn't count against its circuit breaker
+                    finish(index, result, record=False)
+                missing.clear()
+
+        logger.info(f"Polled {len(list_of_switches)} switches on {len(outstanding)} collector nodes "
+                    f"in {time.monotonic() - start:.1f}s")
+        return list(release.results or [])
+
+
+def _worker_main(args):
+    job = json.load(sys.stdin)
+    # stdout carries the result stream, so logs go to stderr
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format=f"%(asctime)s - {job.get('node', 'worker')} - %(levelname)s - %(message)s")
+    logging.getLogger('paramiko').setLevel(logging.WARNING)
+    run_worker(job, sys.stdout)
+
+
+def _shards_main(args):
+    from inventory import load_inventory
+
+    switches = load_inventory(args.inventory)
+    nodes, _ = parse_nodes(args.nodes)
+    shards = shard_inventory(switches, nodes, args.by, args.site_field)
+    for node, indexes in shards.items():
+        sites = sorted({str(switches[index].get(args.site_field, '-')) for index in indexes})
+        print(f"{node:<24} {len(indexes):>6} switches  sites: {', '.join(sites) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed polling: collector node worker and shard planner')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+    subparsers.add_parser('worker', help='Poll the shard read from stdin and stream JSON results to stdout')
+    shards = subparsers.add_parser('shards', help='Show how the inventory would be sharded')
+    shards.add_argument('--inventory', default=os.getenv('SWITCH_INVENTORY', 'switchFile.xlsx'))
+    shards.add_argument('--nodes', default=os.getenv('COLLECTOR_NODES', 'local:2'),
+                        help="Comma-separated node names or local:N (default: COLLECTOR_NODES)")
+    shards.add_argument('--by', choices=SHARD_MODES, default=os.getenv('SHARD_BY', 'hash'))
+    shards.add_argument('--site-field', default=DEFAULT_SITE_FIELD, help='Tag column to shard on (default: site)')
+    args = parser.parse_args()
+
+    if args.mode == 'worker':
+        _worker_main(args)
+    else:
+        logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+        _shards_main(args)
+
+
+if __name__ == "__main__":
+    main()
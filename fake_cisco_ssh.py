@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Simulated Cisco IOS switches over real SSH, for testing the poll path without hardware
+One paramiko server listens on a single port and plays a different switch for every
+loopback address it is reached on (127.1.0.1, 127.1.0.2, ...; Linux routes all of
+127.0.0.0/8 to lo). Each switch answers netmiko's cisco_ios session setup,
+'show env temp/fan/power/all' and 'show run | i host', with configurable latency,
+failures and warning/critical temperatures
+"""
+
+import argparse
+import ipaddress
+import random
+import socket
+import threading
+import time
+import logging
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_ADDRESS = '127.1.0.1'
+DEFAULT_USERNAME = 'admin'
+DEFAULT_PASSWORD = 'password'
+FAILURE_MODES = ('refuse', 'auth', 'hang', 'drop')
+
+# IOS 'show env temp' with yellow 66 / red 76, matching the fleet in benchmark_parser.SAMPLE_OUTPUTS['ios']
+ENV_TEMP_OUTPUT = """SYSTEM TEMPERATURE is {summary}
+System Temperature Value: {celsius} Degree Celsius
+System Temperature State: {state}
+Yellow Threshold : 66 Degree Celsius
+Red Threshold    : 76 Degree Celsius"""
+ENV_FAN_OUTPUT = "FAN is {fan}"
+ENV_POWER_OUTPUT = """POWER is {power}
+RPS is NOT PRESENT"""
+TEMPERATURES = {'ok': (30, 55), 'warning': (67, 74), 'critical': (77, 85)}
+DEVICE_STATES = {'ok': ('OK', 'GREEN'), 'warning': ('OK', 'YELLOW'), 'critical': ('FAULTY', 'RED')}
+
+INVALID_INPUT = "                    ^\r\n% Invalid input detected at '^' marker.\r\n"
+
+
+def device_address(index, base=DEFAULT_BASE_ADDRESS):
+    return str(ipaddress.IPv4Address(base) + index)
+
+
+def build_fleet(count, warning_rate=0.0, critical_rate=0.0, failure_rate=0.0, failure_modes=FAILURE_MODES,
+                base=DEFAULT_BASE_ADDRESS, seed=1):
+    """
+    Profiles for count switches keyed by address: hostname, state ('ok'/'warning'/'critical')
+    and failure (None or one of FAILURE_MODES), assigned reproducibly from seed
+    """
+    rng = random.Random(seed)
+    fleet = {}
+    for index in range(count):
+        roll = rng.random()
+        state = 'critical' if roll < critical_rate else 'warning' if roll < critical_rate + warning_rate else 'ok'
+        failure = rng.choice(failure_modes) if rng.random() < failure_rate else None
+        fleet[device_address(index, base)] = {'hostname': f'SIM-SW-{index + 1:04d}', 'state': state,
+                                              'failure': failure}
+    return fleet
+
+
+def inventory_for(fleet, port, username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD):
+    """
+    Inventory records (as inventory.load_inventory returns them) pointing at the simulator
+    """
+    return [{'device_type': 'cisco_ios', 'host': address, 'port': port, 'username': username,
+             'password': password} for address in fleet]
+
+
+class _SwitchInterface(paramiko.ServerInterface):
+
+    def __init__(self, simulator, profile):
+        self.simulator = simulator
+        self.profile = profile
+        self.shell_ready = threading.Event()
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if self.profile['failure'] == 'auth':
+            self.simulator._count('failures_injected')
+            return paramiko.AUTH_FAILED
+        if (username, password) != (self.simulator.username, self.simulator.password):
+            return paramiko.AUTH_FAILED
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_ready.set()
+        return True
+
+
+class FakeCiscoSSHServer:
+    """
+    Threaded SSH server playing a fleet of IOS switches (see build_fleet)
+
+    connect_latency delays the SSH greeting, command_latency every command's output.
+    round_trip is the network RTT: every chunk of input the shell receives waits that long
+    before it is echoed and answered, so pipelined commands pay it once per exchange.
+    Addresses not in the fleet are served as healthy switches with a generated hostname.
+    A profile's optional 'fan' and 'power' set the 'show env fan/power/all' status (default OK).
+    Counters: sessions, commands, failures_injected.
+    """
+
+    def __init__(self, fleet=None, host='0.0.0.0', port=0, connect_latency=0.0, command_latency=0.0,
+                 username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD, host_key=None, seed=1, round_trip=0.0):
+        self.fleet = fleet or {}
+        self.connect_latency = connect_latency
+        self.command_latency = command_latency
+        self.round_trip = round_trip
+        self.username = username
+        self.password = password
+        # Key generation is the slowest part of startup, so one key serves every switch
+        self.host_key = host_key or paramiko.RSAKey.generate(2048)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sessions = 0
+        self.commands = 0
+        self.failures_injected = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(1024)
+        self._stopping = threading.Event()
+        self._transports = set()
+
+    @property
+    def port(self):
+        return self._sock.getsockname()[1]
+
+    def profile_for(self, address):
+        profile = self.fleet.get(address)
+        if profile is None:
+            profile = {'hostname': f"SIM-{address.replace('.', '-')}", 'state': 'ok', 'failure': None}
+        return profile
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, name='fake-ssh-accept', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        with self.lock:
+            transports = list(self._transports)
+        for transport in transports:
+            transport.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _accept_loop(self):
+        while not self._stopping.is_set():
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), name='fake-ssh', daemon=True).start()
+
+    def _count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _serve(self, client):
+        address = client.getsockname()[0]
+        profile = self.profile_for(address)
+        self._count('sessions')
+        if profile['failure'] == 'refuse':
+            self._count('failures_injected')
+            client.close()
+            return
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        interface = _SwitchInterface(self, profile)
+        with self.lock:
+            self._transports.add(transport)
+        try:
+            transport.start_server(server=interface)
+            channel = transport.accept(timeout=30)
+            if channel is None or not interface.shell_ready.wait(10):
+                return
+            self._shell(channel, profile)
+        except (EOFError, OSError, paramiko.SSHException):
+            pass
+        finally:
+            with self.lock:
+                self._transports.discard(transport)
+            transport.close()
+
+    def _shell(self, channel, profile):
+        prompt = f"{profile['hostname']}#"
+        channel.sendall(f"\r\n{prompt}".encode())
+        buffer = b''
+        while not self._stopping.is_set():
+            data = channel.recv(4096)
+            if not data:
+                return
+            data = data.replace(b'\x00', b'')  # keepalive NULs from is_alive(), ignored like a real terminal
+            if not data:
+                continue
+            if self.round_trip:
+                time.sleep(self.round_trip)
+            channel.sendall(data.replace(b'\n', b'\r\n'))  # echo, like a real terminal
+            buffer += data
+            while b'\n' in buffer or b'\r' in buffer:
+                cut = min(i for i in (buffer.find(b'\n'), buffer.find(b'\r')) if i >= 0)
+                line, buffer = buffer[:cut].decode('utf-8', 'replace').strip(), buffer[cut + 1:].lstrip(b'\r\n')
+                if line in ('exit', 'logout', 'quit'):
+                    return
+                if line:
+                    self._count('commands')
+                    if profile['failure'] in ('hang', 'drop') and self._is_poll_command(line):
+                        self._count('failures_injected')
+                        if profile['failure'] == 'drop':
+                            return
+                        self._stopping.wait(3600)  # never answer; the client's read timeout fires
+                        return
+                    if self.command_latency:
+                        time.sleep(self.command_latency)
+                output = self.run_command(line, profile)
+                channel.sendall(f"{output}{prompt}".encode())
+
+    @staticmethod
+    def _is_poll_command(line):
+        return line.startswith(('show env', 'sh env'))
+
+    def run_command(self, line, profile):
+        """
+        Output for one CLI line (without the trailing prompt)
+        """
+        words = line.split()
+        if not words or words[0] == 'terminal':
+            return ''
+        if self._is_poll_command(line):
+            section = words[2] if len(words) > 2 else 'all'
+            sections = []
+            if section.startswith('fan') or section == 'all':
+                sections.append(ENV_FAN_OUTPUT.format(fan=profile.get('fan', 'OK')))
+            if section.startswith('temp') or section == 'all':
+                low, high = TEMPERATURES[profile['state']]
+                with self.lock:
+                    celsius = self.rng.randint(low, high)
+                summary, state = DEVICE_STATES[profile['state']]
+                sections.append(ENV_TEMP_OUTPUT.format(summary=summary, celsius=celsius, state=state))
+            if section.startswith('pow') or section == 'all':
+                sections.append(ENV_POWER_OUTPUT.format(power=profile.get('power', 'OK')))
+            if not sections:
+                return INVALID_INPUT
+            return '\n'.join(sections).replace('\n', '\r\n') + '\r\n'
+        if words[0] in ('sh', 'show') and 'host' in words[-1] and words[1:2] in (['run'], ['running-config']):
+            return f"hostname {profile['hostname']}\r\n"
+        return INVALID_INPUT
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run simulated Cisco IOS switches over SSH')
+    parser.add_argument('--switches', type=int, default=10, help='Number of switches (default: 10)')
+    parser.add_argument('--port', type=int, default=2222, help='SSH port (default: 2222)')
+    parser.add_argument('--base-address', default=DEFAULT_BASE_ADDRESS,
+                        help='Address of the first switch; the rest follow it (default: 127.1.0.1)')
+    parser.add_argument('--warning-rate', type=float, default=0.0, help='Fraction of switches in warning')
+    parser.add_argument('--critical-rate', type=float, default=0.0, help='Fraction of switches in critical')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help=f"Fraction of switches that fail ({', '.join(FAILURE_MODES)})")
+    parser.add_argument('--connect-latency', type=float, default=0.0, help='Seconds before the SSH greeting')
+    parser.add_argument('--command-latency', type=float, default=0.0, help='Seconds per command')
+    parser.add_argument('--round-trip', type=float, default=0.0, help='Network round trip in seconds per exchange')
+    parser.add_argument('--inventory', help='Write a matching inventory to this .csv file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    fleet = build_fleet(args.switches, args.warning_rate, args.critical_rate, args.failure_rate,
+                        base=args.base_address)
+    with FakeCiscoSSHServer(fleet, port=args.port, connect_latency=args.connect_latency,
+                            command_latency=args.command_latency, round_trip=args.round_trip) as server:
+        if args.inventory:
+            import csv
+            with open(args.inventory, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=['device_type', 'host', 'port', 'username', 'password'])
+                writer.writeheader()
+                writer.writerows(inventory_for(fleet, server.port))
+        print(f"{args.switches} simulated switches on {args.base_address}+ port {server.port} "
+              f"(user {server.username} / {server.password})")
+        try:
+            while True:
+                time.sleep(10)
+                print(f"sessions {server.sessions}, commands {server.commands}, "
+                      f"failures injected {server.failures_injected}")
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
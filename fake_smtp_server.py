@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Minimal local SMTP server for testing email delivery without a real mail server
+Speaks just enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+            drop = server.sessions <= server.drop_first
+        if drop:
+            # Simulate a transient failure: close the connection without a greeting
+            return
+
+        self.reply('220 localhost fake SMTP ready')
+        sender, recipients = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command.split(':', 1)[1].strip().strip('<>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipient = command.split(':', 1)[1].strip().strip('<>')
+                if recipient in server.refuse:
+                    self.reply('550 No such user')
+                    continue
+                recipients.append(recipient)
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b'.\r\n', b'.\n'):
+                        break
+                    # Undo dot-stuffing
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                with server.lock:
+                    server.messages.append({'sender': sender, 'recipients': recipients,
+                                            'data': b''.join(lines), 'received': time.time()})
+                self.reply('250 OK queued')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Threaded SMTP stand-in; received messages are collected in .messages
+
+    drop_first closes the first N connections immediately to exercise retry logic, and
+    recipients in refuse are rejected with a permanent 550.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, drop_first=0, refuse=()):
+        super().__init__((host, port), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.sessions = 0
+        self.drop_first = drop_first
+        self.refuse = set(refuse)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake SMTP server that prints received mail')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args()
+
+    with FakeSMTPServer(port=args.port) as server:
+        print(f"Fake SMTP server listening on 127.0.0.1:{server.port} (set SMTP_USE_TLS=false)")
+        seen = 0
+        try:
+            while True:
+                time.sleep(1)
+                with server.lock:
+                    new = server.messages[seen:]
+                for message in new:
+                    print(f"Received {len(message['data'])} bytes from {message['sender']} for {', '.join(message['recipients'])}")
+                seen += len(new)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
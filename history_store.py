@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Persistent temperature history store
+Records every parsed sensor reading per host and sweep in SQLite, indexed by
+(host, sensor, time), with an hourly rollup for fast long-range aggregates
+"""
+
+import argparse
+import datetime
+import os
+import sqlite3
+import time
+import logging
+
+from temp_parser import sensor_key, reading_severity
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_DB = 'temperature_history.db'
+HOUR = 3600
+DAY = 24 * HOUR
+DEFAULT_RETENTION_DAYS = 90
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    id INTEGER PRIMARY KEY,
+    started INTEGER NOT NULL,
+    finished INTEGER,
+    reading_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS readings (
+    host TEXT NOT NULL,
+    sensor TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    celsius REAL NOT NULL,
+    yellow REAL,
+    red REAL,
+    state TEXT,
+    severity TEXT NOT NULL,
+    sweep_id INTEGER NOT NULL,
+    PRIMARY KEY (host, sensor, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS readings_hourly (
+    host TEXT NOT NULL,
+    sensor TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    min_celsius REAL NOT NULL,
+    max_celsius REAL NOT NULL,
+    sum_celsius REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (host, sensor, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+# A reading already stored for (host, sensor, ts) - the same sensor reported twice, or two
+# sweeps in the same second - is ignored, so the hourly rollup counts each reading once
+INSERT_READING = """
+INSERT OR IGNORE INTO readings (host, sensor, ts, celsius, yellow, red, state, severity, sweep_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_HOURLY = """
+INSERT INTO readings_hourly (host, sensor, hour, min_celsius, max_celsius, sum_celsius, samples)
+VALUES (?, ?, ?, ?, ?, ?, 1)
+ON CONFLICT (host, sensor, hour) DO UPDATE SET
+    min_celsius = MIN(min_celsius, excluded.min_celsius),
+    max_celsius = MAX(max_celsius, excluded.max_celsius),
+    sum_celsius = sum_celsius + excluded.sum_celsius,
+    samples = samples + 1
+"""
+
+
+class TemperatureHistory:
+    """
+    SQLite-backed time series of sensor readings
+
+    Writes are buffered and committed in batches inside one transaction per sweep.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_DB, batch_size=5000):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._sweep_id = None
+        self._sweep_ts = None
+        self._pending = []
+        self._count = 0
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Writing
+
+    def begin_sweep(self, started=None):
+        """
+        Start recording a sweep; all of its readings share the sweep start time
+        """
+        self._sweep_ts = int(started if started is not None else time.time())
+        cursor = self.conn.execute('INSERT INTO sweeps (started) VALUES (?)', (self._sweep_ts,))
+        self._sweep_id = cursor.lastrowid
+        self._count = 0
+        return self._sweep_id
+
+    def add_readings(self, host, readings):
+        """
+        Buffer one device's parsed readings (TempReading records without a value, and fan or
+        power status readings, are skipped)
+        """
+        for reading in readings:
+            if reading.celsius is None or reading.kind != 'temperature':
+                continue
+            self._pending.append((host, sensor_key(reading), self._sweep_ts, reading.celsius, reading.yellow,
+                                  reading.red, reading.state, reading_severity(reading), self._sweep_id))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        # Row by row so only readings that were actually inserted reach the rollup
+        hour_rows = []
+        for row in self._pending:
+            if self.conn.execute(INSERT_READING, row).rowcount:
+                host, sensor, ts, celsius = row[:4]
+                hour_rows.append((host, sensor, ts - ts % HOUR, celsius, celsius, celsius))
+        self.conn.executemany(UPSERT_HOURLY, hour_rows)
+        self._count += len(hour_rows)
+        self._pending = []
+
+    def end_sweep(self):
+        """
+        Write any buffered readings and commit the sweep
+        """
+        self._flush()
+        self.conn.execute('UPDATE sweeps SET finished = ?, reading_count = ? WHERE id = ?',
+                          (int(time.time()), self._count, self._sweep_id))
+        self.conn.commit()
+        logger.info(f"Recorded {self._count} temperature readings in {self.path}")
+        return self._count
+
+    def prune(self, older_than):
+        """
+        Delete raw readings older than the given epoch time (hourly rollups are kept)
+        """
+        cursor = self.conn.execute('DELETE FROM readings WHERE ts < ?', (int(older_than),))
+        self.conn.execute('DELETE FROM sweeps WHERE started < ?', (int(older_than),))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def expire(self, retention_days=DEFAULT_RETENTION_DAYS, now=None):
+        """
+        prune() raw readings older than retention_days, at most once a day (the delete scans
+        the readings table, so it isn't run every sweep); returns the rows deleted
+        """
+        now = int(now if now is not None else time.time())
+        row = self.conn.execute("SELECT value FROM history_meta WHERE key = 'pruned'").fetchone()
+        if not retention_days or (row is not None and now - row[0] < DAY):
+            return 0
+        deleted = self.prune(now - retention_days * DAY)
+        self.conn.execute("INSERT OR REPLACE INTO history_meta VALUES ('pruned', ?)", (now,))
+        self.conn.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} temperature readings older than {retention_days:g} days")
+        return deleted
+
+    # Querying
+
+    def hosts(self):
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT host FROM readings_hourly ORDER BY host')]
+
+    def sensors(self, host):
+        return [row[0] for row in self.conn.execute(
+            'SELECT DISTINCT sensor FROM readings_hourly WHERE host = ? ORDER BY sensor', (host,))]
+
+    def range(self, host, start, end, sensor=None):
+        """
+        Raw readings for a host (optionally one sensor) with start <= ts < end
+        Returns (sensor, ts, celsius, yellow, red, severity) tuples ordered by sensor and time
+        """
+        query = ('SELECT sensor, ts, celsius, yellow, red, severity FROM readings '
+                 'WHERE host = ? AND ts >= ? AND ts < ?')
+        params = [host, int(start), int(end)]
+        if sensor is not None:
+            query = query.replace('WHERE host = ?', 'WHERE host = ? AND sensor = ?')
+            params.insert(1, sensor)
+        return self.conn.execute(query + ' ORDER BY sensor, ts', params).fetchall()
+
+    def downsample(self, host, start, end, bucket_seconds=HOUR, sensor=None):
+        """
+        Min/max/mean per sensor per time bucket with start <= ts < end
+        Whole-hour buckets are served from the hourly rollup; others aggregate raw readings.
+        Returns (sensor, bucket_start, min, max, mean, samples) tuples.
+        """
+        bucket_seconds = int(bucket_seconds)
+        if bucket_seconds % HOUR == 0:
+            query = ('SELECT sensor, hour - hour % :bucket AS bucket, MIN(min_celsius), MAX(max_celsius), '
+                     'SUM(sum_celsius) / SUM(samples), SUM(samples) FROM readings_hourly '
+                     'WHERE host = :host AND hour >= :start AND hour < :end')
+        else:
+            query = ('SELECT sensor, ts - ts % :bucket AS bucket, MIN(celsius), MAX(celsius), '
+                     'AVG(celsius), COUNT(*) FROM readings '
+                     'WHERE host = :host AND ts >= :start AND ts < :end')
+        if sensor is not None:
+            query += ' AND sensor = :sensor'
+        query += ' GROUP BY sensor, bucket ORDER BY sensor, bucket'
+        params = {'bucket': bucket_seconds, 'host': host, 'start': int(start), 'end': int(end), 'sensor': sensor}
+        return self.conn.execute(query, params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query switch temperature history')
+    parser.add_argument('host', nargs='?', help='Switch hostname (omit to list recorded hosts)')
+    parser.add_argument('--db', default=os.getenv('HISTORY_DB', DEFAULT_HISTORY_DB))
+    parser.add_argument('--sensor', help='Only this sensor')
+    parser.add_argument('--days', type=float, default=7, help='How far back to look (default: 7)')
+    parser.add_argument('--bucket', type=int, default=HOUR * 24, help='Bucket size in seconds (default: 1 day)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No history database at {args.db}")
+        return
+
+    with TemperatureHistory(args.db) as history:
+        if not args.host:
+            for host in history.hosts():
+                print(host)
+            return
+
+        end = time.time()
+        rows = history.downsample(args.host, end - args.days * 86400, end, args.bucket, args.sensor)
+        print(f"{'Sensor':<24} {'From':<17} {'Min':>6} {'Max':>6} {'Mean':>6} {'Samples':>8}")
+        for sensor, bucket, low, high, mean, samples in rows:
+            when = datetime.datetime.fromtimestamp(bucket).strftime('%Y-%m-%d %H:%M')
+            print(f"{sensor:<24} {when:<17} {low:>6.1f} {high:>6.1f} {mean:>6.1f} {samples:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Per-switch connect/command latency and failure tracking
+Derives each switch's timeouts from its own recent latency (like TCP's retransmission
+timeout: smoothed latency plus deviations) and opens a circuit breaker on switches
+that failed several sweeps in a row, so dead devices are skipped and only probed
+occasionally instead of holding every sweep for a full connect timeout
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEALTH_FILE = '.host_health.json'
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_PROBE_INTERVAL = 15 * 60
+DEFAULT_MAX_PROBE_INTERVAL = 4 * 60 * 60
+DEFAULT_MIN_TIMEOUT = 5.0
+DEFAULT_MAX_TIMEOUT = 60.0
+
+# Timeouts allow twice the smoothed latency plus four deviations, so a switch with steady latency still has headroom
+TIMEOUT_HEADROOM = 2
+
+# RFC 6298 smoothing factors
+_ALPHA = 0.125
+_BETA = 0.25
+
+
+def _update_latency(stats, key, sample):
+    """
+    Fold one latency sample into the smoothed mean/deviation pair stored under key
+    """
+    smoothed = stats.get(key)
+    if smoothed is None:
+        stats[key] = [sample, sample / 2]
+        return
+    mean, deviation = smoothed
+    deviation = (1 - _BETA) * deviation + _BETA * abs(mean - sample)
+    mean = (1 - _ALPHA) * mean + _ALPHA * sample
+    stats[key] = [mean, deviation]
+
+
+class HostHealth:
+    """
+    Thread-safe management IP -> latency/failure record, persisted as JSON
+
+    Each record holds 'connect' and 'command' as [smoothed seconds, deviation], the
+    consecutive 'failures', 'last_error', and while the circuit is open 'next_probe'
+    (epoch seconds) and 'probe_interval'.
+    """
+
+    def __init__(self, path=DEFAULT_HEALTH_FILE, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 probe_interval=DEFAULT_PROBE_INTERVAL, max_probe_interval=DEFAULT_MAX_PROBE_INTERVAL,
+                 min_timeout=DEFAULT_MIN_TIMEOUT, max_timeout=DEFAULT_MAX_TIMEOUT, clock=time.time):
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.clock = clock
+        self.skipped = []
+        self.opened = []
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def from_env(cls, **overrides):
+        settings = {
+            'path': os.getenv('HOST_HEALTH_FILE', DEFAULT_HEALTH_FILE),
+            'failure_threshold': int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', str(DEFAULT_FAILURE_THRESHOLD))),
+            'probe_interval': float(os.getenv('CIRCUIT_PROBE_INTERVAL', str(DEFAULT_PROBE_INTERVAL))),
+            'max_probe_interval': float(os.getenv('CIRCUIT_MAX_PROBE_INTERVAL', str(DEFAULT_MAX_PROBE_INTERVAL))),
+            'min_timeout': float(os.getenv('ADAPTIVE_TIMEOUT_MIN', str(DEFAULT_MIN_TIMEOUT))),
+            'max_timeout': float(os.getenv('ADAPTIVE_TIMEOUT_MAX', str(DEFAULT_MAX_TIMEOUT))),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self._hosts = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable host health file {self.path}: {str(e)}")
+            self._hosts = {}
+
+    def skip_reason(self, host):
+        """
+        Why host should not be polled this sweep, or None
+        A switch whose circuit is open is skipped until its next probe is due; the probe
+        itself goes ahead (half-open) and either closes the circuit or backs it off further.
+        """
+        with self._lock:
+            entry = self._hosts.get(host)
+            if not entry or entry.get('next_probe') is None or self.clock() >= entry['next_probe']:
+                return None
+            self.skipped.append(host)
+            next_probe = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['next_probe']))
+            return (f"Skipped - failed {entry['failures']} times in a row (last: {entry.get('last_error', 'unknown')}); "
+                    f"next attempt after {next_probe}")
+
+    def timeouts(self, host, default=None):
+        """
+        (connect timeout, command timeout) in seconds for host
+
+        Twice the smoothed latency plus four deviations, clamped to [min_timeout, max_timeout] and
+        doubled for each consecutive failure (up to three), so a switch that timed out
+        gets more room next time. Hosts with no history get `default` (None = netmiko's own).
+        """
+        ceiling = min(self.max_timeout, default) if default else self.max_timeout
+        with self._lock:
+            entry = self._hosts.get(host) or {}
+            result = []
+            for key in ('connect', 'command'):
+                smoothed = entry.get(key)
+                if smoothed is None:
+                    result.append(default)
+                    continue
+                timeout = max(self.min_timeout, TIMEOUT_HEADROOM * smoothed[0] + 4 * smoothed[1])
+                timeout *= 2 ** min(entry.get('failures', 0), 3)
+                result.append(round(min(timeout, ceiling), 1))
+        return tuple(result)
+
+    def record(self, result):
+        """
+        Update a host's latency and failure state from one poller result
+        """
+        host = result['host']
+        with self._lock:
+            entry = self._hosts.setdefault(host, {'failures': 0})
+            if result['error'] is None:
+                if result.get('connect_time') is not None:
+                    _update_latency(entry, 'connect', result['connect_time'])
+                for _, seconds in result.get('command_times', []):
+                    _update_latency(entry, 'command', seconds)
+                if entry.get('next_probe') is not None:
+                    logger.info(f"Circuit closed for {host}: reachable again after {entry['failures']} failures")
+                entry.update(failures=0, next_probe=None, probe_interval=None)
+                return
+
+            entry['failures'] += 1
+            entry['last_error'] = result['error'].strip().splitlines()[0][:200] if result['error'].strip() else 'error'
+            if entry['failures'] < self.failure_threshold:
+                return
+            if entry.get('probe_interval'):
+                interval = min(entry['probe_interval'] * 2, self.max_probe_interval)
+            else:
+                interval = self.probe_interval
+                self.opened.append(host)
+                logger.warning(f"Circuit opened for {host} after {entry['failures']} consecutive failures; "
+                               f"probing every {interval / 60:.0f} min")
+            entry['probe_interval'] = interval
+            entry['next_probe'] = self.clock() + interval
+
+    def open_circuits(self):
+        with self._lock:
+            return sorted(host for host, entry in self._hosts.items() if entry.get('next_probe') is not None)
+
+    def entries(self):
+        with self._lock:
+            return json.loads(json.dumps(self._hosts))
+
+    def reset(self, host=None):
+        """
+        Forget one host's history (e.g. after repairing it), or everything when host is None
+        """
+        with self._lock:
+            if host is None:
+                self._hosts.clear()
+            else:
+                self._hosts.pop(host, None)
+
+    def save(self):
+        """
+        Write the state to disk atomically
+        """
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._hosts, indent=1, sort_keys=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save host health {self.path}: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show switch latency and circuit breaker state')
+    parser.add_argument('--file', default=os.getenv('HOST_HEALTH_FILE', DEFAULT_HEALTH_FILE))
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--reset', metavar='HOST', help='Close the circuit and forget the history of one switch')
+    group.add_argument('--reset-all', action='store_true', help='Forget every switch')
+    args = parser.parse_args()
+
+    health = HostHealth(args.file)
+    if args.reset or args.reset_all:
+        health.reset(args.reset)
+        health.save()
+        print(f"Reset {'all hosts' if args.reset_all else args.reset} in {args.file}")
+        return
+
+    print(f"{'Host':<20} {'Connect s':>10} {'Command s':>10} {'Timeouts s':>12} {'Failures':>9}  Circuit")
+    for host, entry in sorted(health.entries().items()):
+        connect = f"{entry['connect'][0]:.2f}" if entry.get('connect') else '-'
+        command = f"{entry['command'][0]:.2f}" if entry.get('command') else '-'
+        connect_timeout, command_timeout = health.timeouts(host)
+        timeouts = f"{connect_timeout or '-'}/{command_timeout or '-'}"
+        circuit = 'closed'
+        if entry.get('next_probe'):
+            circuit = f"open until {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['next_probe']))}"
+        print(f"{host:<20} {connect:>10} {command:>10} {timeouts:>12} {entry.get('failures', 0):>9}  {circuit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Persistent hostname cache keyed by management IP
+Saves a 'sh run | i host' round trip per switch on every sweep
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = '.hostname_cache.json'
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class HostnameCache:
+    """
+    Thread-safe management IP -> hostname map with a TTL, persisted as JSON
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+            logger.info(f"Loaded {len(self._entries)} cached hostnames from {self.path}")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable hostname cache {self.path}: {str(e)}")
+            self._entries = {}
+
+    def get(self, host):
+        """
+        Return the cached hostname for host, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry and time.time() - entry['updated'] < self.ttl:
+                self.hits += 1
+                return entry['hostname']
+            self.misses += 1
+            return None
+
+    def put(self, host, hostname):
+        with self._lock:
+            self._entries[host] = {'hostname': hostname, 'updated': time.time()}
+
+    def invalidate(self, host=None):
+        """
+        Drop one host from the cache, or everything when host is None
+        """
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(host, None)
+
+    def entries(self):
+        with self._lock:
+            return dict(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    def save(self):
+        """
+        Write the cache to disk atomically so a crash never leaves a truncated file
+        """
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._entries, indent=1, sort_keys=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save hostname cache {self.path}: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or invalidate the switch hostname cache')
+    parser.add_argument('--file', default=os.getenv('HOSTNAME_CACHE_FILE', DEFAULT_CACHE_FILE))
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--invalidate', metavar='HOST', help='Forget the hostname of one management IP')
+    group.add_argument('--clear', action='store_true', help='Forget all cached hostnames')
+    args = parser.parse_args()
+
+    cache = HostnameCache(args.file)
+    if args.clear or args.invalidate:
+        cache.invalidate(args.invalidate)
+        cache.save()
+        print(f"Invalidated {'all hosts' if args.clear else args.invalidate} in {args.file}")
+        return
+
+    for host, entry in sorted(cache.entries().items()):
+        updated = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['updated']))
+        print(f"{host:<20} {entry['hostname']:<30} {updated}")
+
+
+if __name__ == "__main__":
+    main()
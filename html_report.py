@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+HTML email report
+Renders the analysed sweep as an HTML email body with inline colour-coded warning and
+critical tables, straight from the report index, so a routine sweep needs no PDF. The
+page template is parsed once and cached (HTML_REPORT_TEMPLATE replaces the built-in one).
+Digests (digest.py) are rendered with the same template
+"""
+
+import functools
+import html
+import os
+from string import Template
+
+# Replaced with the list of attachments that were too large to send, once that is known
+ATTACHMENT_NOTICE_MARKER = '<!-- attachment notice -->'
+
+# Colour, background and heading for each kind of table
+STYLES = {
+    'critical': ('#b71c1c', '#fdecea', 'Critical alerts'),
+    'warning': ('#e65100', '#fff4e5', 'Warning alerts'),
+    'recovered': ('#1b5e20', '#edf7ed', 'Recovered'),
+    'error': ('#424242', '#f2f2f2', 'Not polled'),
+    'changes': ('#0d47a1', '#e8f0fe', 'Changes'),
+}
+
+DEFAULT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>$title</title></head>
+<body style="margin: 0; padding: 16px; font-family: Arial, Helvetica, sans-serif; font-size: 14px; color: #222222;">
+<h2 style="margin: 0 0 4px 0;">$title</h2>
+<p style="margin: 0 0 16px 0; color: #555555;">Generated $timestamp &middot; $counts</p>
+$banner
+$sections
+$attachment_notice
+<p style="margin-top: 24px; color: #777777; font-size: 12px;">Network Monitoring System</p>
+</body>
+</html>
+"""
+
+_BANNER = Template('<p style="padding: 10px 12px; border-left: 6px solid $color; background: $background; '
+                   'font-weight: bold;">$text</p>\n')
+_TABLE = Template('<h3 style="margin: 20px 0 6px 0; color: $color;">$caption</h3>\n'
+                  '<table cellpadding="6" cellspacing="0" style="border-collapse: collapse; width: 100%;">\n'
+                  '<tr>$headers</tr>\n$rows</table>\n')
+_HEADER_CELL = Template('<th align="left" style="border-bottom: 2px solid $color; color: $color;">$text</th>')
+_ROW = Template('<tr style="background: $background;">$cells</tr>\n')
+_CELL = Template('<td style="border-bottom: 1px solid #dddddd; vertical-align: top;$extra">$text</td>')
+
+
+@functools.lru_cache(maxsize=8)
+def _load_template(path, mtime):
+    # Keyed on the file's mtime so a daemon picks up an edited template without re-reading it every sweep
+    if path is None:
+        return Template(DEFAULT_TEMPLATE)
+    with open(path, encoding='utf-8') as f:
+        return Template(f.read())
+
+
+def load_template(path=None):
+    """
+    The parsed page template: path, HTML_REPORT_TEMPLATE, or the built-in one
+    """
+    path = path or os.getenv('HTML_REPORT_TEMPLATE') or None
+    return _load_template(path, os.path.getmtime(path) if path else None)
+
+
+def _split_detail(detail):
+    # Detail lines are 'hostname: flagged output line'
+    host, _, text = detail.partition(':')
+    return host.strip(), text.strip()
+
+
+def table(kind, headers, rows, caption=None):
+    """
+    One colour-coded table; rows are lists of plain-text cells (escaped here)
+    """
+    color, background, default_caption = STYLES[kind]
+    header_cells = ''.join(_HEADER_CELL.substitute(color=color, text=html.escape(header)) for header in headers)
+    body = []
+    for row in rows:
+        cells = [_CELL.substitute(extra=' font-weight: bold; white-space: nowrap;' if number == 0 else
+                                  ' font-family: Courier, monospace;' if number == len(row) - 1 else '',
+                                  text=html.escape(str(cell)))
+                 for number, cell in enumerate(row)]
+        body.append(_ROW.substitute(background=background, cells=''.join(cells)))
+    return _TABLE.substitute(color=color, caption=html.escape(caption or default_caption), headers=header_cells,
+                             rows=''.join(body))
+
+
+def attachment_notice(omitted, max_size):
+    """
+    HTML for attachments left out of the email: omitted is [(filename, size text, link)]
+    """
+    if not omitted:
+        return ''
+    items = ''.join(f'<li>{html.escape(filename)} ({html.escape(size)}): '
+                    f'<a href="{html.escape(link, quote=True)}">{html.escape(link)}</a></li>'
+                    for filename, size, link in omitted)
+    return f'<p>Not attached (over the {html.escape(max_size)} email size limit):</p>\n<ul>{items}</ul>\n'
+
+
+def _fleet_counts(entries, warning_hosts, critical_hosts):
+    hosts = set()
+    errors = []
+    for entry in entries:
+        hosts.add(entry['hostname'])
+        if entry['kind'] == 'error':
+            errors.append(entry)
+    return errors, (f"{len(hosts)} switches: {len(critical_hosts)} critical, {len(warning_hosts)} warning, "
+                    f"{len(errors)} not polled")
+
+
+def render_report(entries, summary, timestamp, alarm=True, recovered_details=None, changes=None, since=None,
+                  title=None, template_path=None):
+    """
+    HTML body for a sweep report
+
+    entries are the report index (ReportSink.index or analyses; output text isn't needed),
+    summary is the AlertIndex.summary()-shaped tuple the email alerts on, and alarm,
+    recovered_details, changes and since mean the same as for the plain-text body.
+    """
+    warning_hosts, critical_hosts, warning_details, critical_details = summary
+    errors, counts = _fleet_counts(entries, warning_hosts, critical_hosts)
+
+    if changes:
+        banner_kind = 'critical' if any(change['after'] == 'critical' for change in changes) else 'changes'
+        banner_text = f"{len(changes)} switches changed state since {since or 'the previous report'}"
+    elif critical_hosts and alarm:
+        banner_kind, banner_text = 'critical', f"CRITICAL temperature alerts on {', '.join(critical_hosts)}"
+    elif warning_hosts and alarm:
+        banner_kind, banner_text = 'warning', f"Temperature warnings on {', '.join(warning_hosts)}"
+    elif critical_hosts or warning_hosts:
+        banner_kind, banner_text = 'error', 'Ongoing alerts, already notified - no change since'
+    else:
+        banner_kind, banner_text = 'recovered', 'All monitored switches are within normal temperature ranges'
+    color, background, _ = STYLES[banner_kind]
+    banner = _BANNER.substitute(color=color, background=background, text=html.escape(banner_text))
+
+    sections = []
+    if changes:
+        sections.append(table('changes', ['Switch', 'Address', 'Change', 'Details'],
+                              [[change['hostname'], change['host'], f"{change['before'].upper()} -> {change['after'].upper()}",
+                                '; '.join(change['details'])] for change in changes]))
+    if critical_details:
+        sections.append(table('critical', ['Switch', 'Reading'], [_split_detail(detail) for detail in critical_details]))
+    if warning_details:
+        sections.append(table('warning', ['Switch', 'Reading'], [_split_detail(detail) for detail in warning_details]))
+    if recovered_details:
+        sections.append(table('recovered', ['Switch', 'Sensor'], [_split_detail(detail) for detail in recovered_details]))
+    if errors:
+        sections.append(table('error', ['Switch', 'Reason'], [[entry['hostname'], entry.get('error') or entry['title']]
+                                                               for entry in errors]))
+
+    return load_template(template_path).safe_substitute(
+        title=html.escape(title or 'Cisco switch temperature report'),
+        timestamp=html.escape(timestamp),
+        counts=html.escape(counts),
+        banner=banner,
+        sections=''.join(sections),
+        attachment_notice=ATTACHMENT_NOTICE_MARKER,
+    )
+
+
+def render_digest(digest, timestamp, top=None, title=None, template_path=None):
+    """
+    HTML body for a digest (digest.DigestQueue.build()): alert episodes, time above
+    threshold and the hottest sensors of the period; every sensor's statistics go in the CSV
+    """
+    from digest import DEFAULT_TOP_SENSORS, above_threshold, format_duration, format_ts, hottest
+
+    episodes = digest['episodes']
+    critical = [episode for episode in episodes if episode['peak'] == 'critical']
+    warning = [episode for episode in episodes if episode['peak'] != 'critical']
+    above = above_threshold(digest)
+    period = f"{format_ts(digest['start'])} to {format_ts(digest['end'])}"
+    counts = (f"{digest['sweeps']} sweeps of {digest['switches']} switches from {period}: {len(episodes)} alert "
+              f"episodes, {len(above)} sensors above threshold")
+
+    if critical:
+        banner_kind, banner_text = 'critical', f"{len(critical)} critical alert episodes in this period"
+    elif warning:
+        banner_kind, banner_text = 'warning', f"{len(warning)} warning alert episodes in this period"
+    else:
+        banner_kind, banner_text = 'recovered', 'No temperature alerts in this period'
+    color, background, _ = STYLES[banner_kind]
+    banner = _BANNER.substitute(color=color, background=background, text=html.escape(banner_text))
+
+    def episode_rows(selected):
+        return [[episode['host'], episode['sensor'], format_ts(episode['start']) or 'before this period',
+                 format_ts(episode['end']) or 'ongoing',
+                 format_duration(episode['end'] - episode['start']) if episode['start'] and episode['end'] else '',
+                 f"{episode['celsius']:g}C" if episode['celsius'] is not None else '']
+                for episode in selected]
+
+    headers = ['Switch', 'Sensor', 'Started', 'Ended', 'Duration', 'Reading']
+    sections = []
+    if critical:
+        sections.append(table('critical', headers, episode_rows(critical), 'Critical episodes'))
+    if warning:
+        sections.append(table('warning', headers, episode_rows(warning), 'Warning episodes'))
+    if above:
+        sections.append(table('warning', ['Switch', 'Sensor', 'Samples above', 'Above warning', 'Above critical',
+                                          'Min / max / mean'],
+                              [[sensor['host'], sensor['sensor'], f"{sensor['above_samples']} of {sensor['samples']}",
+                                format_duration(sensor['above_seconds']), format_duration(sensor['critical_seconds']),
+                                f"{sensor['min_celsius']:g} / {sensor['max_celsius']:g} / {sensor['mean_celsius']:.1f}C"]
+                               for sensor in above], 'Time above threshold'))
+    sections.append(table('changes', ['Switch', 'Sensor', 'Samples', 'Min / max / mean'],
+                          [[sensor['host'], sensor['sensor'], sensor['samples'],
+                            f"{sensor['min_celsius']:g} / {sensor['max_celsius']:g} / {sensor['mean_celsius']:.1f}C"]
+                           for sensor in hottest(digest, top or DEFAULT_TOP_SENSORS)], 'Hottest sensors'))
+
+    return load_template(template_path).safe_substitute(
+        title=html.escape(title or 'Cisco switch temperature digest'),
+        timestamp=html.escape(timestamp),
+        counts=html.escape(counts),
+        banner=banner,
+        sections=''.join(sections),
+        attachment_notice=ATTACHMENT_NOTICE_MARKER,
+    )
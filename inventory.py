@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Switch inventory loader
+Reads the switch list from .xlsx (streaming, read-only openpyxl), .csv, .yaml or .json
+without importing pandas, validates it, and caches the parsed result keyed on the
+file's modification time and content hash
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVENTORY_FILE = 'switchFile.xlsx'
+# The cache holds the device credentials, so by default it lives in a private per-user directory
+# rather than next to the spreadsheet
+DEFAULT_INVENTORY_CACHE = os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                       'cisco-switch-temperature', 'inventory_cache.json')
+CACHE_VERSION = 1
+
+REQUIRED_FIELDS = ('device_type', 'host')
+INT_FIELDS = ('port', 'keepalive')
+FLOAT_FIELDS = ('timeout', 'conn_timeout', 'auth_timeout', 'banner_timeout', 'blocking_timeout',
+                'read_timeout_override', 'global_delay_factor')
+BOOL_FIELDS = ('fast_cli', 'use_keys', 'allow_agent', 'verbose')
+# Columns that group switches (sharding across collector nodes, per-site reports) and aren't netmiko settings
+TAG_FIELDS = ('site', 'owner')
+
+
+class InventoryError(ValueError):
+    """
+    The inventory file could not be read or has no usable switches
+    """
+
+
+def _read_xlsx(path):
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the sheet XML instead of building the whole workbook in memory
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return []
+        columns = [str(name).strip() if name is not None else None for name in header]
+        return [{name: value for name, value in zip(columns, row) if name}
+                for row in rows]
+    finally:
+        workbook.close()
+
+
+def _read_xls(path):
+    # Legacy .xls workbooks need pandas (and xlrd); everything else avoids pandas entirely
+    try:
+        import pandas as pd
+    except ImportError:
+        raise InventoryError(f"{path}: .xls files need pandas installed (or save the sheet as .xlsx/.csv)")
+    return pd.read_excel(path).to_dict(orient='records')
+
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+
+def _read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_yaml(path):
+    try:
+        import yaml
+    except ImportError:
+        raise InventoryError(f"{path}: YAML inventories need PyYAML installed (pip install pyyaml)")
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+READERS = {
+    '.xlsx': _read_xlsx,
+    '.xlsm': _read_xlsx,
+    '.xls': _read_xls,
+    '.csv': _read_csv,
+    '.json': _read_json,
+    '.yaml': _read_yaml,
+    '.yml': _read_yaml,
+}
+
+
+def _is_blank(value):
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    return isinstance(value, str) and not value.strip()
+
+
+def _clean_value(field, value):
+    if isinstance(value, str):
+        value = value.strip()
+    if field in INT_FIELDS:
+        return int(float(value))
+    if field in FLOAT_FIELDS:
+        return float(value)
+    if field in BOOL_FIELDS:
+        if isinstance(value, str):
+            return value.lower() in ('true', 'yes', '1')
+        return bool(value)
+    # Spreadsheets turn numeric passwords and secrets into numbers; netmiko needs strings
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def validate(records, source='inventory'):
+    """
+    Normalise raw rows into netmiko connection dicts
+
+    Blank cells are dropped, numeric fields are coerced, rows missing a required
+    field are skipped with an error and duplicate hosts keep their first row.
+    """
+    if isinstance(records, dict):
+        # YAML/JSON may wrap the list: {switches: [...]}
+        records = records.get('switches', records.get('devices'))
+    if not isinstance(records, list):
+        raise InventoryError(f"{source}: expected a list of switches")
+
+    switches = []
+    seen = set()
+    for number, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            logger.error(f"{source} row {number}: expected a mapping, skipped")
+            continue
+        fields = {str(key).strip(): value for key, value in record.items()
+                  if key is not None and not _is_blank(value)}
+        if not fields:
+            continue  # blank spreadsheet row
+        missing = [field for field in REQUIRED_FIELDS if field not in fields]
+        if missing:
+            logger.error(f"{source} row {number}: missing {', '.join(missing)}, skipped")
+            continue
+        try:
+            switch = {field: _clean_value(field, value) for field, value in fields.items()}
+        except (TypeError, ValueError) as e:
+            logger.error(f"{source} row {number}: invalid value ({str(e)}), skipped")
+            continue
+        if switch['host'] in seen:
+            logger.warning(f"{source} row {number}: duplicate host {switch['host']}, skipped")
+            continue
+        seen.add(switch['host'])
+        switches.append(switch)
+    return switches
+
+
+def connection_params(switch):
+    """
+    The netmiko connection settings of an inventory row, without its tag columns
+    """
+    return {field: value for field, value in switch.items() if field not in TAG_FIELDS}
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InventoryCache:
+    """
+    JSON cache of validated inventories keyed by absolute path
+
+    A cache entry is used as-is while the file's mtime and size are unchanged; if
+    they changed but the content hash still matches (file touched or copied), the
+    entry is refreshed instead of re-parsing the file.
+    Entries hold the credentials from the file, so entries whose file no longer exists
+    are dropped on every write, and the cache file and its directory are owner-only.
+    """
+
+    def __init__(self, path=DEFAULT_INVENTORY_CACHE):
+        self.path = path
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self._entries = data.get('entries', {})
+            except (OSError, ValueError):
+                pass
+        return self._entries
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        # Don't keep the credentials of a removed or renamed inventory
+        self._entries = {source: entry for source, entry in self._entries.items() if os.path.exists(source)}
+        try:
+            # The inventory holds device credentials; keep the cache private to this user
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory, mode=0o700)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'entries': self._entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write inventory cache {self.path}: {str(e)}")
+
+    def get(self, source, stat):
+        """
+        Cached switches for this file, or None; also returns the content hash if one was computed
+        """
+        entry = self._load().get(os.path.abspath(source))
+        if entry is None:
+            return None, None
+        if entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['switches'], entry['sha256']
+        digest = _file_hash(source)
+        if digest != entry['sha256']:
+            return None, digest
+        entry['mtime_ns'], entry['size'] = stat.st_mtime_ns, stat.st_size
+        self._save()
+        return entry['switches'], digest
+
+    def put(self, source, stat, digest, switches):
+        self._load()[os.path.abspath(source)] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest or _file_hash(source),
+            'switches': switches,
+        }
+        self._save()
+
+
+def load_inventory(path=DEFAULT_INVENTORY_FILE, cache=None):
+    """
+    Load and validate the switch inventory; the backend is chosen by file extension
+    Pass an InventoryCache to skip parsing when the file hasn't changed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    reader = READERS.get(extension)
+    if reader is None:
+        raise InventoryError(f"Unsupported inventory format '{extension}' (expected one of: {', '.join(READERS)})")
+
+    stat = os.stat(path)
+    digest = None
+    if cache is not None:
+        switches, digest = cache.get(path, stat)
+        if switches is not None:
+            logger.info(f"Loaded {len(switches)} switches from {path} (cached)")
+            return switches
+
+    try:
+        records = reader(path)
+    except InventoryError:
+        raise
+    except Exception as e:
+        raise InventoryError(f"Could not read {path}: {str(e)}") from e
+    switches = validate(records, source=path)
+    if not switches:
+        raise InventoryError(f"No valid switches in {path}")
+
+    if cache is not None:
+        cache.put(path, stat, digest, switches)
+    logger.info(f"Loaded {len(switches)} switches from {path}")
+    return switches
+
+
+def inventory_cache_from_env():
+    """
+    Cache configured by INVENTORY_CACHE_FILE (empty disables caching)
+    """
+    cache_path = os.getenv('INVENTORY_CACHE_FILE', DEFAULT_INVENTORY_CACHE)
+    return InventoryCache(os.path.expanduser(cache_path)) if cache_path else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate a switch inventory file')
+    parser.add_argument('path', nargs='?', default=DEFAULT_INVENTORY_FILE)
+    parser.add_argument('--no-cache', action='store_true', help='Parse the file even if a cached copy is valid')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    start = time.perf_counter()
+    try:
+        switches = load_inventory(args.path, cache=None if args.no_cache else inventory_cache_from_env())
+    except (OSError, InventoryError) as e:
+        print(f"Inventory error: {e}")
+        raise SystemExit(1)
+    print(f"{len(switches)} valid switches in {args.path} ({time.perf_counter() - start:.3f}s)")
+    for switch in switches[:10]:
+        print(f"  {switch['host']:<20} {switch['device_type']}")
+    if len(switches) > 10:
+        print(f"  ... and {len(switches) - 10} more")
+
+
+if __name__ == "__main__":
+    main()
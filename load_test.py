@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: runs the real checktemp_enhanced.main() pipeline (inventory load,
+netmiko polling, analysis, PDF, email) against a fleet of simulated SSH switches
+(fake_cisco_ssh.py) and a local fake SMTP server, and reports throughput
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import tempfile
+import time
+import logging
+
+from fake_cisco_ssh import FakeCiscoSSHServer, build_fleet, inventory_for, FAILURE_MODES
+from fake_smtp_server import FakeSMTPServer
+
+SWITCH_UP = re.compile(r'^cisco_switch_up\{.*\} (\d)$', re.MULTILINE)
+
+
+def write_inventory(path, records):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def run_load_test(switches, workers, runs=1, warning_rate=0.05, critical_rate=0.01, failure_rate=0.01,
+                  connect_latency=0.0, command_latency=0.0, poll_timeout=10, workdir=None, extra_args=(), log_level=logging.WARNING):
+    """
+    Run main() `runs` times against `switches` simulated switches
+    Returns a list of per-run dicts: seconds, switches_per_second, up, down, emails, email_bytes
+    """
+    fleet = build_fleet(switches, warning_rate, critical_rate, failure_rate)
+    results = []
+    previous_cwd = os.getcwd()
+    with FakeCiscoSSHServer(fleet, connect_latency=connect_latency, command_latency=command_latency) as ssh_server, \
+            FakeSMTPServer() as smtp_server, tempfile.TemporaryDirectory() as tmp:
+        workdir = workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        os.chdir(workdir)
+        try:
+            inventory_path = os.path.join(workdir, 'load_test_inventory.csv')
+            write_inventory(inventory_path, inventory_for(fleet, ssh_server.port))
+            os.environ.update(SMTP_SERVER='127.0.0.1', SMTP_PORT=str(smtp_server.port), SMTP_USE_TLS='false',
+                              SENDER_PASSWORD='', POLL_MAX_WORKERS=str(workers), POLL_TIMEOUT=str(poll_timeout),
+                              METRICS_TEXTFILE=os.path.join(workdir, 'load_test.prom'))
+            import checktemp_enhanced
+            logging.getLogger().setLevel(log_level)  # checktemp_enhanced configures INFO logging on import
+            # paramiko logs every injected reset/hang with a traceback; the poller already reports them
+            logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+
+            for _ in range(runs):
+                emails_before = len(smtp_server.messages)
+                start = time.perf_counter()
+                checktemp_enhanced.main(['--inventory', inventory_path, *extra_args])
+                elapsed = time.perf_counter() - start
+                with open(os.environ['METRICS_TEXTFILE']) as f:
+                    up = [int(value) for value in SWITCH_UP.findall(f.read())]
+                new_emails = smtp_server.messages[emails_before:]
+                results.append({'seconds': elapsed, 'switches_per_second': switches / elapsed,
+                                'up': sum(up), 'down': len(up) - sum(up), 'emails': len(new_emails),
+                                'email_bytes': sum(len(m['data']) for m in new_emails)})
+        finally:
+            os.chdir(previous_cwd)
+        server_counts = {'sessions': ssh_server.sessions, 'commands': ssh_server.commands,
+                          'failures_injected': ssh_server.failures_injected}
+    return results, server_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the full pipeline against simulated SSH switches')
+    parser.add_argument('--switches', type=int, default=1000, help='Number of simulated switches (default: 1000)')
+    parser.add_argument('--workers', type=int, default=64, help='POLL_MAX_WORKERS (default: 64)')
+    parser.add_argument('--runs', type=int, default=1, help='Consecutive runs of main() (default: 1)')
+    parser.add_argument('--warning-rate', type=float, default=0.05, help='Fraction in warning (default: 0.05)')
+    parser.add_argument('--critical-rate', type=float, default=0.01, help='Fraction in critical (default: 0.01)')
+    parser.add_argument('--failure-rate', type=float, default=0.01,
+                        help=f"Fraction failing with one of {', '.join(FAILURE_MODES)} (default: 0.01)")
+    parser.add_argument('--connect-latency', type=float, default=0.0, help='Seconds before each SSH greeting')
+    parser.add_argument('--command-latency', type=float, default=0.0, help='Seconds per command')
+    parser.add_argument('--poll-timeout', type=float, default=10, help='POLL_TIMEOUT for hung switches (default: 10)')
+    parser.add_argument('--workdir', help='Keep reports, history and metrics in this directory')
+    parser.add_argument('--verbose', action='store_true', help="Show the pipeline's INFO logging")
+    args, extra_args = parser.parse_known_args()
+
+    results, server = run_load_test(args.switches, args.workers, args.runs, args.warning_rate, args.critical_rate,
+                                    args.failure_rate, args.connect_latency, args.command_latency,
+                                    args.poll_timeout, args.workdir, extra_args,
+                                    logging.INFO if args.verbose else logging.WARNING)
+
+    print(f"\nLoad test: {args.switches} simulated switches, {args.workers} workers")
+    print(f"{'Run':>4} {'Seconds':>9} {'Switches/s':>11} {'Up':>6} {'Down':>6} {'Emails':>7} {'Email KB':>9}")
+    for number, run in enumerate(results, start=1):
+        print(f"{number:>4} {run['seconds']:>9.2f} {run['switches_per_second']:>11.1f} {run['up']:>6} "
+              f"{run['down']:>6} {run['emails']:>7} {run['email_bytes'] / 1024:>9.0f}")
+    print(f"Simulator: {server['sessions']} SSH sessions, {server['commands']} commands, "
+          f"{server['failures_injected']} failures injected")
+    return 0 if all(run['emails'] for run in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
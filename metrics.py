@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for switch temperatures and the poller
+Each sweep's sensor readings and poll timings are rendered once, at the end of the sweep,
+into a text exposition snapshot; /metrics scrapes only return that snapshot and never
+touch a switch
+"""
+
+import os
+import threading
+import time
+import logging
+
+from temp_parser import SEVERITY_ORDER, sensor_key, reading_severity
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_ADDR = '0.0.0.0'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; SSH logins are typically 0.5-5s, 'show' commands well under a second
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SWEEP_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, optionally split by one set of label values
+    """
+
+    def __init__(self, name, help_text, buckets, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, count, total) in sorted(self._series.items()):
+            base = list(zip(self.label_names, label_values))
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts + [count]):
+                lines.append(f"{self.name}_bucket{_labels(base + [('le', _number(bound))])} {bucket_count}")
+            lines.append(f"{self.name}_sum{_labels(base)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(base)} {count}")
+        return lines
+
+
+def _gauge(name, help_text, samples, metric_type='gauge'):
+    """
+    Exposition lines for one metric family: samples is [(labels, value)]
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples)
+    return lines
+
+
+class SweepMetrics:
+    """
+    Collects one sweep's readings and poll timings; histograms and counters accumulate
+    over the life of the process, per-sensor gauges are replaced by each sweep
+
+    observe_* are called from the poller's result callback; the rendered snapshot is
+    swapped in under a lock so a scrape always sees one complete sweep.
+    """
+
+    def __init__(self):
+        self.connect_seconds = Histogram('cisco_switch_connect_seconds',
+                                         'SSH connect and login time per switch', LATENCY_BUCKETS)
+        self.command_seconds = Histogram('cisco_switch_command_seconds', 'Time to run one CLI command',
+                                         LATENCY_BUCKETS, ('command',))
+        self.poll_seconds = Histogram('cisco_switch_poll_seconds', 'Total time to poll one switch',
+                                      LATENCY_BUCKETS)
+        self.sweep_seconds = Histogram('cisco_switch_sweep_duration_seconds', 'Wall time of a full sweep',
+                                       SWEEP_BUCKETS)
+        self.failures = {}
+        self.sweeps = 0
+        self.hostname_cache_hits = 0
+        self.hostname_cache_misses = 0
+        self._hostname_cache_size = None
+        self._sensors = {}
+        self._components = {}
+        self._hosts = {}
+        self._snapshot = b''
+        self._lock = threading.Lock()
+
+    def begin_sweep(self):
+        self._sensors = {}
+        self._components = {}
+        self._hosts = {}
+
+    def observe_result(self, result):
+        host = result['host']
+        up = result['error'] is None
+        self._hosts[host] = (result['hostname'] or host, up, result['connect_time'],
+                             sum(seconds for _, seconds in result['command_times']))
+        if result['connect_time'] is not None:
+            self.connect_seconds.observe(result['connect_time'])
+        for command, seconds in result['command_times']:
+            self.command_seconds.observe(seconds, command)
+        self.poll_seconds.observe(result['elapsed'])
+        if not up:
+            self.failures[host] = self.failures.get(host, 0) + 1
+
+    def observe_readings(self, hostname, readings):
+        for reading in readings:
+            if reading.kind != 'temperature':
+                # Fan and power supply status from the other collectors
+                key = (hostname, reading.kind, sensor_key(reading))
+                severity = SEVERITY_ORDER[reading_severity(reading)]
+                self._components[key] = max(self._components.get(key, 0), severity)
+                continue
+            values = [reading.celsius, reading.yellow, reading.red, SEVERITY_ORDER[reading_severity(reading)]]
+            key = (hostname, sensor_key(reading))
+            seen = self._sensors.get(key)
+            if seen is None:
+                self._sensors[key] = values
+            else:
+                # The same sensor reported twice (IOS 'SYSTEM TEMPERATURE is OK' plus its value block) is one series
+                for i in range(3):
+                    if seen[i] is None:
+                        seen[i] = values[i]
+                seen[3] = max(seen[3], values[3])
+
+    def observe_hostname_cache(self, stats):
+        """
+        Add one sweep's HostnameCache.stats() to the hit/miss counters
+        """
+        self.hostname_cache_hits += stats['hits']
+        self.hostname_cache_misses += stats['misses']
+        self._hostname_cache_size = stats['size']
+
+    def end_sweep(self, duration, ts=None):
+        """
+        Record the sweep and publish the new snapshot
+        """
+        self.sweeps += 1
+        self.sweep_seconds.observe(duration)
+        snapshot = self.render(ts if ts is not None else time.time()).encode()
+        with self._lock:
+            self._snapshot = snapshot
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot
+
+    def render(self, ts):
+        sensors = [(h, s, *values) for (h, s), values in sorted(self._sensors.items())]
+        labels = lambda hostname, sensor: [('hostname', hostname), ('sensor', sensor)]
+        lines = []
+        lines += _gauge('cisco_switch_temperature_celsius', 'Current sensor temperature',
+                        [(labels(h, s), c) for h, s, c, _, _, _ in sensors if c is not None])
+        lines += _gauge('cisco_switch_temperature_yellow_threshold_celsius', 'Sensor warning threshold',
+                        [(labels(h, s), y) for h, s, _, y, _, _ in sensors if y is not None])
+        lines += _gauge('cisco_switch_temperature_red_threshold_celsius', 'Sensor critical threshold',
+                        [(labels(h, s), r) for h, s, _, _, r, _ in sensors if r is not None])
+        lines += _gauge('cisco_switch_temperature_severity', 'Sensor severity: 0 ok, 1 warning, 2 critical',
+                        [(labels(h, s), sev) for h, s, _, _, _, sev in sensors])
+        if self._components:
+            lines += _gauge('cisco_switch_component_severity', 'Fan/power supply severity: 0 ok, 1 warning, 2 critical',
+                            [([('hostname', h), ('component', k), ('sensor', s)], sev)
+                             for (h, k, s), sev in sorted(self._components.items())])
+
+        hosts = [(host, *values) for host, values in sorted(self._hosts.items())]
+        lines += _gauge('cisco_switch_up', 'Whether the last poll of the switch succeeded',
+                        [([('host', h), ('hostname', n)], int(up)) for h, n, up, _, _ in hosts])
+        lines += _gauge('cisco_switch_last_connect_seconds', 'Connect time of the last poll (new sessions only)',
+                        [([('host', h)], c) for h, _, _, c, _ in hosts if c is not None])
+        lines += _gauge('cisco_switch_last_command_seconds', 'Command time of the last poll',
+                        [([('host', h)], c) for h, _, up, _, c in hosts if up])
+        lines += _gauge('cisco_switch_poll_failures_total', 'Failed polls per switch since start',
+                        [([('host', h)], n) for h, n in sorted(self.failures.items())], 'counter')
+        if self._hostname_cache_size is not None:
+            lines += _gauge('cisco_switch_hostname_cache_hits_total', 'Hostnames found in the cache since start',
+                            [([], self.hostname_cache_hits)], 'counter')
+            lines += _gauge('cisco_switch_hostname_cache_misses_total',
+                            'Hostnames missing or expired in the cache since start',
+                            [([], self.hostname_cache_misses)], 'counter')
+            lines += _gauge('cisco_switch_hostname_cache_entries', 'Hostnames in the cache',
+                            [([], self._hostname_cache_size)])
+
+        for histogram in (self.connect_seconds, self.command_seconds, self.poll_seconds, self.sweep_seconds):
+            lines += histogram.render()
+        lines += _gauge('cisco_switch_sweeps_total', 'Sweeps completed since start', [([], self.sweeps)], 'counter')
+        lines += _gauge('cisco_switch_last_sweep_timestamp_seconds', 'Unix time the last sweep finished',
+                        [([], round(ts, 3))])
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """
+        Write the snapshot for node_exporter's textfile collector (atomic rename)
+        """
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self.snapshot())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {str(e)}")
+
+
+def start_metrics_server(metrics, port, addr=DEFAULT_METRICS_ADDR):
+    """
+    Serve metrics.snapshot() on http://addr:port/metrics from a background thread
+    Returns the server; call .shutdown() to stop it
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.snapshot()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"metrics: {self.address_string()} {format % args}")
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info(f"Serving metrics on http://{addr}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Streaming MIME encoding for report emails
+The raw text backup grows with the fleet, so attachments are gzip-compressed and
+base64-encoded chunk by chunk straight into a message file instead of being read,
+encoded and serialised in memory. Attachments that would push the email over a
+size limit are left out and linked from the body instead
+"""
+
+import base64
+import gzip
+import io
+import os
+import shutil
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ATTACHMENT_MAX_BYTES = 10 * 1024 * 1024
+
+# base64 turns 57 input bytes into one 76-character line, so whole chunks never split a line
+_CHUNK = 57 * 1024
+
+
+def gzip_file(path, dest=None, level=6):
+    """
+    Compress path to dest (default path + '.gz') without reading it into memory; returns dest
+    """
+    dest = dest or f"{path}.gz"
+    with open(path, 'rb') as source, open(dest, 'wb') as raw:
+        # mtime=0 keeps the archive byte-identical for identical reports
+        with gzip.GzipFile(filename=os.path.basename(path), mode='wb', compresslevel=level, fileobj=raw,
+                           mtime=0) as target:
+            shutil.copyfileobj(source, target, _CHUNK)
+    return dest
+
+
+def encoded_size(size):
+    """
+    Bytes a file of size bytes takes once base64-encoded into 76-character CRLF lines
+    """
+    encoded = (size + 2) // 3 * 4
+    return encoded + (encoded + 75) // 76 * 2
+
+
+def plan_attachments(attachments, max_bytes=DEFAULT_ATTACHMENT_MAX_BYTES):
+    """
+    Split [(path, filename, content_type)] into (attached, omitted) so the encoded
+    attachments stay within max_bytes (0 = no limit)
+
+    Attachments are taken in order, so list the most important first; one that
+    doesn't fit is omitted but later, smaller ones can still be attached.
+    """
+    attached, omitted = [], []
+    budget = max_bytes
+    for attachment in attachments:
+        size = encoded_size(os.path.getsize(attachment[0]))
+        if max_bytes and size > budget:
+            omitted.append(attachment)
+            continue
+        budget -= size
+        attached.append(attachment)
+    return attached, omitted
+
+
+def format_size(size):
+    for unit in ('bytes', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'bytes' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def link_for(path, link_base=None):
+    """
+    Where the recipient can fetch an omitted attachment: link_base + file name, or the local path
+    """
+    if link_base:
+        return f"{link_base.rstrip('/')}/{os.path.basename(path)}"
+    return os.path.abspath(path)
+
+
+def write_message(msg, attachments, out):
+    """
+    Serialise msg (a MIMEMultipart holding the headers and body parts) to the binary
+    file out with CRLF line endings, streaming each (path, filename, content_type)
+    attachment in as a base64 part after the existing parts; returns the bytes written
+    """
+    from email.generator import BytesGenerator
+
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, policy=msg.policy.clone(linesep='\r\n')).flatten(msg)
+    head = buffer.getvalue()
+    boundary = msg.get_boundary().encode()
+    closing = b'--' + boundary + b'--'
+    written = out.write(head[:head.rindex(closing)])
+
+    for path, filename, content_type in attachments:
+        headers = (f"--{boundary.decode()}\r\n"
+                   f"Content-Type: {content_type}\r\n"
+                   f"MIME-Version: 1.0\r\n"
+                   f"Content-Transfer-Encoding: base64\r\n"
+                   f"Content-Disposition: attachment; filename=\"{filename}\"\r\n\r\n")
+        written += out.write(headers.encode())
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(_CHUNK)
+                if not chunk:
+                    break
+                written += out.write(base64.encodebytes(chunk).replace(b'\n', b'\r\n'))
+        logger.info(f"Attachment added: {filename} ({format_size(os.path.getsize(path))})")
+
+    written += out.write(closing + b'\r\n')
+    return written
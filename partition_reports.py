@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Per-partition reports
+Splits an analysed sweep by an inventory tag column (site or owner), renders one PDF
+per partition in a process pool alongside the main report (when PDFs are enabled), and
+looks up the recipients each partition's report goes to
+"""
+
+import os
+import re
+import time
+import logging
+
+from inventory import TAG_FIELDS
+
+logger = logging.getLogger(__name__)
+
+UNASSIGNED = 'unassigned'
+
+
+def recipients_env(partition):
+    """
+    Environment variable holding a partition's recipients, e.g. RECIPIENT_EMAIL_DC_EAST for 'dc-east'
+    """
+    return 'RECIPIENT_EMAIL_' + re.sub(r'[^A-Za-z0-9]+', '_', partition).strip('_').upper()
+
+
+def recipients_for(partition):
+    """
+    Comma-separated recipients from RECIPIENT_EMAIL_<PARTITION>, as a list (empty if not configured)
+    """
+    return [email.strip() for email in os.getenv(recipients_env(partition), '').split(',') if email.strip()]
+
+
+def filter_summary(summary, hostnames):
+    """
+    An AlertIndex.summary()-shaped tuple restricted to hostnames (detail lines start with 'hostname:')
+    """
+    warning_hosts, critical_hosts, warning_details, critical_details = summary
+    return ([host for host in warning_hosts if host in hostnames],
+            [host for host in critical_hosts if host in hostnames],
+            [detail for detail in warning_details if detail.split(':', 1)[0] in hostnames],
+            [detail for detail in critical_details if detail.split(':', 1)[0] in hostnames])
+
+
+def render_partition(job):
+    """
+    Build one partition's PDF from its report index entries; runs in a pool process
+    Returns (partition, pdf_filename, success, seconds)
+    """
+    from pdf_report import create_pdf_report
+    from report_sink import read_analyses
+
+    start = time.perf_counter()
+    warning_hosts, critical_hosts, warning_details, critical_details = job['summary']
+    success = create_pdf_report(job['header'], job['pdf_filename'], warning_hosts, critical_hosts, warning_details,
+                                critical_details, device_analyses=read_analyses(job['text_filename'], job['entries']),
+                                render_mode=job.get('render_mode'), raw_output=job.get('raw_output'))
+    return job['partition'], job['pdf_filename'], success, time.perf_counter() - start
+
+
+class PartitionReports:
+    """
+    Per-partition reports for one sweep
+
+    observe() each poller result so report sections can be matched to their switch's
+    partition by hostname; start() submits one render per partition that has recipients
+    to a process pool, so they build while the main report does, and finish() waits for
+    them: [(partition, pdf_filename, success)]. Each partition's index entries stay in
+    .entries for its HTML report.
+    """
+
+    def __init__(self, switches, field='site', processes=None):
+        if field not in TAG_FIELDS:
+            raise ValueError(f"Unknown partition column '{field}' (expected one of: {', '.join(TAG_FIELDS)})")
+        self.field = field
+        self.processes = max(1, int(processes or os.cpu_count() or 1))
+        self._by_host = {switch['host']: str(switch.get(field) or UNASSIGNED) for switch in switches}
+        self._by_hostname = {}
+        self.entries = {}
+        self._executor = None
+        self._futures = []
+        self._done = []
+
+    def observe(self, result):
+        partition = self._by_host.get(result['host'], UNASSIGNED)
+        # Error sections are titled with the management IP, output sections with the hostname
+        self._by_hostname[result['host']] = partition
+        if result['hostname']:
+            self._by_hostname[result['hostname']] = partition
+
+    def partition(self, hostname):
+        return self._by_hostname.get(hostname, UNASSIGNED)
+
+    def split(self, entries):
+        """
+        {partition: [report index entry]} in inventory order
+        """
+        partitions = {}
+        for entry in entries:
+            partitions.setdefault(self.partition(entry['hostname']), []).append(entry)
+        return partitions
+
+    def start(self, header, text_filename, entries, summary, timestamp_safe, render_mode=None, raw_output=None,
+              pdf=True, hostnames=None):
+        """
+        Start rendering every partition that has recipients; returns {partition: hostnames in it}
+        With pdf=False nothing is rendered and finish() reports each partition with no PDF.
+        With hostnames (e.g. the switches that changed state) only partitions containing one of them are reported.
+        """
+        jobs = []
+        members = {}
+        self.entries = {}
+        for partition, partition_entries in self.split(entries).items():
+            if not recipients_for(partition):
+                logger.info(f"No recipients for {self.field} '{partition}' ({recipients_env(partition)}), "
+                            f"no separate report")
+                continue
+            partition_hostnames = {entry['hostname'] for entry in partition_entries}
+            if hostnames is not None and not partition_hostnames & hostnames:
+                continue
+            members[partition] = partition_hostnames
+            self.entries[partition] = partition_entries
+            if not pdf:
+                self._done.append((partition, None, True, 0.0))
+                continue
+            slug = re.sub(r'[^A-Za-z0-9]+', '-', partition).strip('-').lower() or 'partition'
+            jobs.append({
+                'partition': partition,
+                'header': header,
+                'pdf_filename': f'device_temperature_report_{slug}_{timestamp_safe}.pdf',
+                'text_filename': text_filename,
+                'entries': partition_entries,
+                'summary': filter_summary(summary, partition_hostnames),
+                'render_mode': render_mode,
+                'raw_output': raw_output,
+            })
+        if not jobs:
+            return members
+
+        processes = min(self.processes, len(jobs))
+        logger.info(f"Rendering {len(jobs)} {self.field} reports with {processes} processes")
+        if processes == 1:
+            self._done = [render_partition(job) for job in jobs]
+            return members
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+
+        # spawn, not fork: the daemon has SSH keepalive and metrics threads whose locks a fork would copy
+        self._executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+        self._futures = [(job, self._executor.submit(render_partition, job)) for job in jobs]
+        return members
+
+    def finish(self):
+        """
+        Wait for the renders started by start(): [(partition, pdf_filename or None, success)]
+        """
+        results = []
+        for job, future in self._futures:
+            try:
+                self._done.append(future.result())
+            except Exception as e:
+                logger.error(f"Could not render the {self.field} '{job['partition']}' report: {str(e)}")
+                self._done.append((job['partition'], job['pdf_filename'], False, 0.0))
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for partition, pdf_filename, success, seconds in self._done:
+            if success and pdf_filename:
+                logger.info(f"{self.field} '{partition}' report {pdf_filename} rendered in {seconds:.2f}s")
+            results.append((partition, pdf_filename, success))
+        self._futures, self._done = [], []
+        return results
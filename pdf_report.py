@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+PDF report rendering
+Imported on first use by checktemp_enhanced.create_pdf_report, so runs that never
+reach the PDF stage don't pay for importing reportlab
+"""
+
+import os
+from xml.sax.saxutils import escape
+import logging
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Preformatted, Table, TableStyle, PageBreak, Flowable
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+
+from alert_analysis import analyses_from_text
+
+logger = logging.getLogger(__name__)
+
+PDF_RENDER_MODES = ('detailed', 'fast', 'summary')
+PDF_RAW_OUTPUT_OPTIONS = ('appendix', 'skip')
+SEVERITY_COLORS = {'critical': colors.red, 'warning': colors.orange}
+
+class DeviceBlock(Flowable):
+    """
+    One device section drawn straight onto the canvas as monospaced text lines,
+    with critical/warning lines coloured. Much cheaper to lay out than one
+    Paragraph/Preformatted per line, and splits across pages like Preformatted.
+    """
+
+    def __init__(self, lines, style):
+        Flowable.__init__(self)
+        self.lines = lines
+        self.style = style
+        self.spaceAfter = style.spaceAfter
+
+    @classmethod
+    def from_analysis(cls, analysis, style):
+        severities = analysis['line_severities']
+        lines = [(analysis['title'], None)]
+        for lineno, line in enumerate(analysis['output'].split('\n')):
+            if line.strip():
+                lines.append((line, SEVERITY_COLORS.get(severities.get(lineno))))
+        return cls(lines, style)
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        self.height = len(self.lines) * self.style.leading
+        return availWidth, self.height
+
+    def split(self, availWidth, availHeight):
+        fits = int(availHeight // self.style.leading)
+        if fits <= 0 or fits >= len(self.lines):
+            return []
+        return [DeviceBlock(self.lines[:fits], self.style), DeviceBlock(self.lines[fits:], self.style)]
+
+    def draw(self):
+        text = self.canv.beginText(0, self.height - self.style.fontSize)
+        text.setFont(self.style.fontName, self.style.fontSize, self.style.leading)
+        current = None
+        for line, color in self.lines:
+            if color != current:
+                text.setFillColor(color or colors.black)
+                current = color
+            text.textLine(line)
+        self.canv.drawText(text)
+
+def create_pdf_report(text_content, pdf_filename, warning_hosts=None, critical_hosts=None, warning_details=None, critical_details=None, device_analyses=None, render_mode=None, raw_output=None):
+    """
+    Convert text content to PDF format using reportlab with color-coded alerts
+
+    When device_analyses (from alert_analysis) is given, text_content is only the
+    report header and the precomputed per-line severities are used for colouring.
+
+    render_mode (default: PDF_RENDER_MODE env var, else 'detailed'):
+      detailed - one flowable per output line (original layout)
+      fast     - one canvas-drawn flowable per device block, much cheaper to lay out for large fleets
+      summary  - alert summary table only; raw output goes in an appendix or is
+                 skipped depending on raw_output (PDF_RAW_OUTPUT env var)
+    """
+    render_mode = render_mode or os.getenv('PDF_RENDER_MODE', 'detailed')
+    raw_output = raw_output or os.getenv('PDF_RAW_OUTPUT', 'appendix')
+    if render_mode not in PDF_RENDER_MODES:
+        logger.error(f"Unknown PDF render mode '{render_mode}' (expected one of: {', '.join(PDF_RENDER_MODES)})")
+        return False
+    if raw_output not in PDF_RAW_OUTPUT_OPTIONS:
+        logger.error(f"Unknown PDF raw output option '{raw_output}' (expected one of: {', '.join(PDF_RAW_OUTPUT_OPTIONS)})")
+        return False
+    
+    try:
+        logger.info(f"Creating PDF report: {pdf_filename}")
+        
+        # Create PDF document
+        doc = SimpleDocTemplate(pdf_filename, pagesize=letter,
+                              rightMargin=72, leftMargin=72,
+                              topMargin=72, bottomMargin=18)
+        
+        # Get styles
+        styles = getSampleStyleSheet()
+        
+        # Create custom styles
+        code_style = ParagraphStyle(
+            'Code',
+            parent=styles['Normal'],
+            fontName='Courier',
+            fontSize=8,
+            spaceAfter=12,
+            leftIndent=0,
+            rightIndent=0
+        )
+        
+        critical_header_style = ParagraphStyle(
+            'CriticalHeader',
+            parent=styles['Heading2'],
+            textColor='red',
+            fontSize=12,
+            spaceAfter=6,
+            spaceBefore=6
+        )
+        
+        warning_header_style = ParagraphStyle(
+            'WarningHeader',
+            parent=styles['Heading2'],
+            textColor='orange',
+            fontSize=12,
+            spaceAfter=6,
+            spaceBefore=6
+        )
+        
+        critical_detail_style = ParagraphStyle(
+            'CriticalDetail',
+            parent=styles['Normal'],
+            textColor='red',
+            fontSize=10,
+            leftIndent=20,
+            spaceAfter=3
+        )
+        
+        warning_detail_style = ParagraphStyle(
+            'WarningDetail',
+            parent=styles['Normal'],
+            textColor='orange',
+            fontSize=10,
+            leftIndent=20,
+            spaceAfter=3
+        )
+        
+        # Build story for PDF
+        story = []
+        
+        # Add title
+        title_style = styles['Title']
+        title = Paragraph("Cisco Switch Temperature Monitoring Report", title_style)
+        story.append(title)
+        story.append(Spacer(1, 12))
+        
+        # Add status message
+        has_critical = critical_hosts and len(critical_hosts) > 0
+        has_warnings = warning_hosts and len(warning_hosts) > 0
+        
+        # Always show "NO CRITICAL ALERTS AT THIS TIME" when there are no critical/catastrophic conditions
+        if not has_critical:
+            no_critical_style = ParagraphStyle(
+                'NoCritical',
+                parent=styles['Normal'],
+                textColor='black',
+                fontSize=14,
+                alignment=1,  # Center alignment
+                spaceBefore=6,
+                spaceAfter=12,
+                fontName='Helvetica-Bold'
+            )
+            story.append(Paragraph("✅ NO CRITICAL ALERTS AT THIS TIME", no_critical_style))
+            story.append(Spacer(1, 12))
+        
+        # Add color-coded status based on conditions
+        if not has_critical and not has_warnings:
+            # All OK - green text already shown above
+            pass
+        elif has_warnings and not has_critical:
+            # Show yellow/orange status when there are warnings but no critical alerts
+            warning_status_style = ParagraphStyle(
+                'WarningStatus',
+                parent=styles['Normal'],
+                textColor='orange',
+                fontSize=14,
+                alignment=1,  # Center alignment
+                spaceBefore=6,
+                spaceAfter=12,
+                fontName='Helvetica-Bold'
+            )
+            story.append(Paragraph("⚠️ WARNING CONDITIONS DETECTED", warning_status_style))
+            story.append(Spacer(1, 12))
+        elif has_critical:
+            # Show red status with switch names when there are critical alerts
+            critical_status_style = ParagraphStyle(
+                'CriticalStatus',
+                parent=styles['Normal'],
+                textColor='red',
+                fontSize=14,
+                alignment=1,  # Center alignment
+                spaceBefore=6,
+                spaceAfter=12,
+                fontName='Helvetica-Bold'
+            )
+            critical_switches = ', '.join(critical_hosts)
+            story.append(Paragraph(f"🚨 CRITICAL ALERTS: {critical_switches}", critical_status_style))
+            story.append(Spacer(1, 12))
+        
+        # Add critical alerts first (if any)
+        if has_critical:
+            story.append(Paragraph("🚨 CRITICAL TEMPERATURE ALERTS", critical_header_style))
+            story.append(Paragraph(f"Critical Switches: {', '.join(critical_hosts)}", critical_detail_style))
+            story.append(Spacer(1, 6))
+            
+            if critical_details:
+                story.append(Paragraph("Critical Alert Details:", styles['Heading3']))
+                for detail in critical_details:
+                    story.append(Paragraph(f"• {detail}", critical_detail_style))
+            story.append(Spacer(1, 12))
+        
+        # Add warning alerts (if any)
+        if has_warnings:
+            story.append(Paragraph("⚠️ WARNING TEMPERATURE ALERTS", warning_header_style))
+            story.append(Paragraph(f"Warning Switches: {', '.join(warning_hosts)}", warning_detail_style))
+            story.append(Spacer(1, 6))
+            
+            if warning_details:
+                story.append(Paragraph("Warning Alert Details:", styles['Heading3']))
+                for detail in warning_details:
+                    story.append(Paragraph(f"• {detail}", warning_detail_style))
+            story.append(Spacer(1, 12))
+        
+        # Split content into sections and add to PDF
+        if device_analyses is None:
+            header, device_analyses = analyses_from_text(text_content)
+        else:
+            header = text_content
+        
+        if render_mode == 'summary':
+            # Summary table of every polled device, then the raw output (if any) in an appendix
+            device_analyses = list(device_analyses)
+            story.append(Paragraph(header.strip(), styles['Normal']))
+            story.append(Spacer(1, 12))
+            story.append(Paragraph("Switch Summary:", styles['Heading2']))
+            rows = [['Switch', 'Command', 'Status', 'Alert lines']]
+            row_styles = [('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                          ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+                          ('FONTSIZE', (0, 0), (-1, -1), 8)]
+            for analysis in device_analyses:
+                status = 'UNREACHABLE' if analysis['kind'] == 'error' else analysis['severity'].upper()
+                rows.append([analysis['hostname'], analysis['command'] or '', status, len(analysis['line_severities'])])
+                color = SEVERITY_COLORS.get(analysis['severity']) if analysis['kind'] == 'output' else None
+                if color:
+                    row_styles.append(('TEXTCOLOR', (0, len(rows) - 1), (-1, len(rows) - 1), color))
+            table = Table(rows, repeatRows=1, hAlign='LEFT')
+            table.setStyle(TableStyle(row_styles))
+            story.append(table)
+            
+            if raw_output == 'appendix':
+                story.append(PageBreak())
+                story.append(Paragraph("Appendix: Raw Switch Output", styles['Heading2']))
+                story.append(Spacer(1, 12))
+                for analysis in device_analyses:
+                    story.append(DeviceBlock.from_analysis(analysis, code_style))
+        else:
+            # Add separator if there were any alerts
+            if has_critical or has_warnings:
+                story.append(Spacer(1, 8))
+                story.append(Paragraph("Detailed Temperature Report:", styles['Heading2']))
+                story.append(Spacer(1, 12))
+            
+            # First section contains the start time
+            story.append(Paragraph(header.strip(), styles['Normal']))
+            story.append(Spacer(1, 12))
+            
+            for analysis in device_analyses:
+                if render_mode == 'fast':
+                    story.append(DeviceBlock.from_analysis(analysis, code_style))
+                    continue
+                story.append(Preformatted(analysis['title'], code_style))
+                severities = analysis['line_severities']
+                for lineno, line in enumerate(analysis['output'].split('\n')):
+                    if line.strip():
+                        severity = severities.get(lineno)
+                        # Color-code based on severity
+                        if severity == 'critical':
+                            story.append(Paragraph(f"<font color='red'>{line}</font>", styles['Normal']))
+                        elif severity == 'warning':
+                            story.append(Paragraph(f"<font color='orange'>{line}</font>", styles['Normal']))
+                        else:
+                            story.append(Preformatted(line, code_style))
+                story.append(Spacer(1, 12))
+        
+        # Build PDF
+        doc.build(story)
+        logger.info(f"PDF report created successfully: {pdf_filename}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error creating PDF report: {str(e)}")
+        return False
+
+def create_changes_pdf(header, pdf_filename, changes, since=None):
+    """
+    Compact "changes since last report" PDF: one table row per switch whose state changed
+    (changes from delta_report.diff), followed by the current alert lines of those switches
+    """
+    try:
+        logger.info(f"Creating changes PDF: {pdf_filename} ({len(changes)} switches)")
+        doc = SimpleDocTemplate(pdf_filename, pagesize=letter,
+                              rightMargin=72, leftMargin=72,
+                              topMargin=72, bottomMargin=18)
+        styles = getSampleStyleSheet()
+        detail_style = ParagraphStyle('ChangeDetail', parent=styles['Normal'], fontSize=9, leftIndent=20, spaceAfter=2)
+        
+        story = [Paragraph("Cisco Switch Temperature Changes", styles['Title']), Spacer(1, 12)]
+        story.append(Paragraph(header.strip(), styles['Normal']))
+        if since:
+            story.append(Paragraph(f"Changes since the report of {since}", styles['Normal']))
+        story.append(Spacer(1, 12))
+        
+        rows = [['Switch', 'Management IP', 'Previous', 'Current']]
+        row_styles = [('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                      ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+                      ('FONTSIZE', (0, 0), (-1, -1), 9)]
+        for change in changes:
+            rows.append([change['hostname'], change['host'], change['before'].upper(), change['after'].upper()])
+            color = SEVERITY_COLORS.get(change['after'])
+            if color:
+                row_styles.append(('TEXTCOLOR', (0, len(rows) - 1), (-1, len(rows) - 1), color))
+        table = Table(rows, repeatRows=1, hAlign='LEFT')
+        table.setStyle(TableStyle(row_styles))
+        story.append(table)
+        
+        detailed = [change for change in changes if change['details']]
+        if detailed:
+            story.append(Spacer(1, 12))
+            story.append(Paragraph("Current Alert Details:", styles['Heading3']))
+            for change in detailed:
+                color = 'red' if change['after'] == 'critical' else 'orange'
+                for detail in change['details']:
+                    story.append(Paragraph(f"<font color='{color}'>• {escape(detail)}</font>", detail_style))
+        
+        doc.build(story)
+        logger.info(f"Changes PDF created successfully: {pdf_filename}")
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error creating changes PDF: {str(e)}")
+        return False
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Concurrent switch polling engine
+Connects to many switches at once and returns their results in inventory order
+"""
+
+import functools
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import tracing
+from command_batch import send_batched
+from inventory import connection_params
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 16
+BACKENDS = ('thread', 'asyncio')
+HOSTNAME_SOURCES = ('prompt', 'config')
+
+
+def _default_connect(**params):
+    """
+    Open a netmiko session (imported here so callers with a fake connect don't need netmiko)
+    """
+    from netmiko import ConnectHandler
+    return ConnectHandler(**params)
+
+
+def _new_result(switch):
+    """
+    Empty result record for one switch
+    """
+    return {
+        'host': switch.get('host', 'Unknown'),
+        'hostname': None,
+        'outputs': [],
+        'error': None,
+        'elapsed': 0.0,
+        'connect_time': None,
+        'command_times': [],
+        'skipped': False,
+    }
+
+
+def resolve_hostname(net_connect, host, hostname_cache=None, source='prompt'):
+    """
+    Work out the switch hostname with as few CLI round trips as possible:
+    cache hit -> netmiko prompt (already read at login) -> 'sh run | i host'
+    """
+    if hostname_cache is not None:
+        hostname = hostname_cache.get(host)
+        if hostname:
+            return hostname
+
+    hostname = None
+    if source == 'prompt':
+        hostname = getattr(net_connect, 'base_prompt', None)
+    if not hostname:
+        hostname = net_connect.send_command('sh run | i host').split()[1]
+
+    if hostname_cache is not None:
+        hostname_cache.put(host, hostname)
+    return hostname
+
+
+def _run_commands(net_connect, result, commands, hostname_cache, hostname_source, batch=False):
+    result['outputs'] = []
+    result['command_times'] = []
+    with tracing.span('hostname', host=result['host']):
+        result['hostname'] = resolve_hostname(net_connect, result['host'], hostname_cache, hostname_source)
+
+    if batch and len(commands) > 1 and hasattr(net_connect, 'write_channel'):
+        # One round trip for every command instead of one each
+        logger.info(f"Executing {len(commands)} commands batched on {result['host']}...")
+        with tracing.span('command', host=result['host'], command='batch', commands=len(commands)):
+            batched = send_batched(net_connect, commands, getattr(net_connect, 'read_timeout_override', None))
+        for command, output, seconds in batched:
+            result['command_times'].append((command, seconds))
+            result['outputs'].append((command, output))
+        return
+
+    for command in commands:
+        logger.info(f"Executing '{command}' on {result['host']}...")
+        command_start = time.monotonic()
+        with tracing.span('command', host=result['host'], command=command):
+            output = net_connect.send_command(command)
+        result['command_times'].append((command, time.monotonic() - command_start))
+        result['outputs'].append((command, output))
+
+
+def poll_switch(switch, commands, timeout=None, connect=None, hostname_cache=None, hostname_source='prompt',
+                pool=None, host_health=None, batch=False):
+    """
+    Connect to a single switch, run each command and disconnect
+    With a session pool the session is borrowed and returned instead; a pooled session
+    that fails mid-poll is replaced by a fresh connection and the poll retried once.
+    With a HostHealth, timeouts come from the switch's own recent latency and a switch
+    whose circuit breaker is open is skipped (result['skipped']) without connecting.
+    With batch, several commands are pipelined in one exchange (see command_batch).
+    Never raises - connection and command errors are stored in result['error']
+    """
+    connect = connect or _default_connect
+    result = _new_result(switch)
+    start = time.monotonic()
+    net_connect = None
+
+    connect_timeout = command_timeout = timeout
+    if host_health is not None:
+        skip_reason = host_health.skip_reason(result['host'])
+        if skip_reason:
+            result.update(error=skip_reason, skipped=True)
+            return result
+        connect_timeout, command_timeout = host_health.timeouts(result['host'], timeout)
+
+    params = connection_params(switch)
+    if connect_timeout:
+        # Bound the TCP connect and the SSH auth for this switch
+        params.setdefault('conn_timeout', connect_timeout)
+        params.setdefault('auth_timeout', connect_timeout)
+    if command_timeout:
+        # ...and every command read
+        params.setdefault('read_timeout_override', command_timeout)
+
+    try:
+        if pool is None:
+            logger.info(f"Connecting to switch: {result['host']}")
+
+            # Establish SSH connection
+            with tracing.span('connect', host=result['host']):
+                net_connect = connect(**params)
+            result['connect_time'] = time.monotonic() - start
+            _run_commands(net_connect, result, commands, hostname_cache, hostname_source, batch)
+        else:
+            with tracing.span('connect', host=result['host'], pooled=True) as connect_span:
+                net_connect, reused = pool.checkout(params)
+                connect_span.set(reused=reused)
+            if not reused:
+                logger.info(f"Connecting to switch: {result['host']}")
+                result['connect_time'] = time.monotonic() - start
+            elif 'read_timeout_override' in params:
+                # The session outlives this sweep's timeout, so apply the current one
+                net_connect.read_timeout_override = params['read_timeout_override']
+            try:
+                _run_commands(net_connect, result, commands, hostname_cache, hostname_source, batch)
+            except Exception as e:
+                if not reused:
+                    raise
+                logger.info(f"Pooled session to {result['host']} failed ({str(e)}), reconnecting")
+                stale, net_connect = net_connect, None
+                pool.checkin(params, stale, healthy=False)
+                reconnect_start = time.monotonic()
+                with tracing.span('connect', host=result['host'], pooled=True, reconnect=True):
+                    net_connect, _ = pool.checkout(params, fresh=True)
+                result['connect_time'] = time.monotonic() - reconnect_start
+                _run_commands(net_connect, result, commands, hostname_cache, hostname_source, batch)
+
+    except Exception as e:
+        logger.error(f"Error processing switch {result['host']}: {str(e)}")
+        result['error'] = str(e)
+
+    finally:
+        if pool is not None:
+            # Healthy sessions go back to the pool for the next sweep
+            if net_connect is not None:
+                pool.checkin(params, net_connect, healthy=result['error'] is None)
+        else:
+            # Disconnect from the switch
+            try:
+                if net_connect is not None and net_connect.is_alive():
+                    net_connect.disconnect()
+            except Exception as e:
+                logger.warning(f"Error disconnecting from {result['host']}: {str(e)}")
+        result['elapsed'] = time.monotonic() - start
+        if host_health is not None:
+            host_health.record(result)
+
+    return result
+
+
+def _traced_poll(switch, **kwargs):
+    with tracing.span('poll', host=switch.get('host', 'Unknown')):
+        return poll_switch(switch, **kwargs)
+
+
+def _poll_at(poll_one, switch, start_at):
+    """
+    Wait for the switch's staggered start time (monotonic clock), then poll it
+    """
+    if start_at is not None:
+        delay = start_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    return poll_one(switch)
+
+
+class _OrderedRelease:
+    """
+    Reorder buffer: collects results as they complete and hands them to the
+    on_result callback in inventory order, as soon as each prefix is complete
+    """
+
+    def __init__(self, count, on_result=None, keep_results=True):
+        self.results = [None] * count if keep_results else None
+        self.on_result = on_result
+        self._pending = {}
+        self._next = 0
+
+    def push(self, index, result):
+        if self.results is not None:
+            self.results[index] = result
+        if self.on_result is None:
+            return
+        # Only out-of-order results wait here; released ones are dropped unless kept
+        self._pending[index] = result
+        while self._next in self._pending:
+            self.on_result(self._pending.pop(self._next))
+            self._next += 1
+
+
+def _poll_threaded(list_of_switches, poll_one, max_workers, release, start_at):
+    """
+    Thread pool backend
+    """
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='poller') as executor:
+        futures = {
+            executor.submit(_poll_at, poll_one, switch, start_at(index)): index
+            for index, switch in enumerate(list_of_switches)
+        }
+        for future in as_completed(futures):
+            release.push(futures[future], future.result())
+    return release.results or []
+
+
+async def _poll_async(list_of_switches, poll_one, max_workers, timeout, command_count, release, start_at):
+    """
+    asyncio backend - netmiko is blocking, so each poll still runs on a worker thread,
+    but the event loop enforces a hard wall-clock timeout per switch
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='poller'))
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def poll_guarded(index, switch):
+        if start_at(index) is not None:
+            await asyncio.sleep(max(0.0, start_at(index) - time.monotonic()))
+        async with semaphore:
+            task = asyncio.ensure_future(asyncio.to_thread(poll_one, switch))
+            # Allow for connect plus every command before giving up on the switch
+            limit = timeout * (command_count + 1) if timeout else None
+            done, _ = await asyncio.wait({task}, timeout=limit)
+            if done:
+                result = task.result()
+            else:
+                result = _new_result(switch)
+                result['error'] = f"Timed out after {limit:.0f}s"
+                logger.error(f"Error processing switch {result['host']}: {result['error']}")
+            # Runs on the event loop thread, so the release buffer needs no locking
+            release.push(index, result)
+            if not done:
+                # The worker thread can't be cancelled: keep its slot until it returns, so the next
+                # switch's deadline never starts while that switch is still queued for a thread
+                await asyncio.wait({task})
+
+    await asyncio.gather(*(poll_guarded(index, switch) for index, switch in enumerate(list_of_switches)))
+    return release.results or []
+
+
+def poll_switches(list_of_switches, commands, max_workers=DEFAULT_MAX_WORKERS, backend='thread',
+                  timeout=None, connect=None, hostname_cache=None, hostname_source='prompt', on_result=None,
+                  keep_results=True, stagger=0, pool=None, host_health=None, batch=False):
+    """
+    Poll every switch concurrently and return one result per switch in inventory order
+
+    Each result is a dict with host, hostname, outputs (list of (command, output)),
+    error (None on success), elapsed seconds, connect_time (None when a pooled session
+    was reused) and command_times (list of (command, seconds)). If on_result is given it is called
+    with each result, in inventory order, as soon as it and all earlier switches finish;
+    with keep_results=False the results are only streamed and an empty list is returned.
+    stagger spreads the connection start times evenly over that many seconds so a
+    large inventory doesn't open every SSH session in the same instant.
+    With a SessionPool, sessions are reused across calls instead of opened and closed
+    every sweep (the pool's own connect function is used for new sessions).
+    With a HostHealth, per-switch adaptive timeouts and the circuit breaker apply.
+    With batch, each switch's commands are sent in one pipelined exchange.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown polling backend '{backend}' (expected one of: {', '.join(BACKENDS)})")
+    if hostname_source not in HOSTNAME_SOURCES:
+        raise ValueError(f"Unknown hostname source '{hostname_source}' (expected one of: {', '.join(HOSTNAME_SOURCES)})")
+
+    poll_one = functools.partial(_traced_poll, commands=commands, timeout=timeout, connect=connect,
+                                 hostname_cache=hostname_cache, hostname_source=hostname_source, pool=pool,
+                                 host_health=host_health, batch=batch)
+
+    max_workers = max(1, min(int(max_workers), len(list_of_switches) or 1))
+    logger.info(f"Polling {len(list_of_switches)} switches with {max_workers} workers ({backend} backend)")
+
+    release = _OrderedRelease(len(list_of_switches), on_result, keep_results)
+    start = time.monotonic()
+    if stagger and len(list_of_switches) > 1:
+        step = stagger / len(list_of_switches)
+        logger.info(f"Staggering connections over {stagger:.0f}s ({step:.2f}s apart)")
+        start_at = lambda index: start + index * step
+    else:
+        start_at = lambda index: None
+    if backend == 'asyncio':
+        # asyncio is imported only for this backend; it adds ~50ms to every cold start otherwise
+        import asyncio
+        results = asyncio.run(_poll_async(list_of_switches, poll_one, max_workers, timeout, len(commands), release,
+                                          start_at))
+    else:
+        results = _poll_threaded(list_of_switches, poll_one, max_workers, release, start_at)
+
+    logger.info(f"Polled {len(list_of_switches)} switches in {time.monotonic() - start:.1f}s")
+    if hostname_cache is not None:
+        stats = hostname_cache.stats()
+        logger.info(f"Hostname cache: {stats['hits']} hits, {stats['misses']} misses")
+    if host_health is not None and (host_health.skipped or host_health.opened):
+        logger.warning(f"Circuit breaker: skipped {len(host_health.skipped)} switches, "
+                       f"opened {len(host_health.opened)} this sweep")
+    if pool is not None:
+        stats = pool.stats()
+        logger.info(f"Session pool: {stats['open']} open, {stats['reused']} reused, "
+                    f"{stats['opened']} opened, {stats['reconnects']} reconnects")
+    return list(results)
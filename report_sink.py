@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Incremental on-disk report writer
+Appends each device's section to the text report as soon as it is analysed and
+keeps a small structured index in memory instead of the whole report string
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENCODING = 'utf-8'
+
+
+class ReportSink:
+    """
+    Append-only writer for device_output_<timestamp>.txt
+
+    Every section is flushed as soon as it is written, so a run that crashes halfway
+    through a sweep still leaves a readable report of the switches polled so far.
+    """
+
+    def __init__(self, text_filename, header):
+        self.text_filename = text_filename
+        self.header = header
+        self.index = []
+        # Binary mode so index offsets are exact byte positions
+        self._file = open(text_filename, 'wb')
+        self._write(header)
+
+    def _write(self, text):
+        data = text.encode(ENCODING)
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.flush()
+        return offset, len(data)
+
+    def write(self, analysis):
+        """
+        Append one analysed section (see alert_analysis) and index it without keeping
+        its output or parsed readings
+        """
+        if analysis['kind'] == 'error':
+            self._write(f"\n{analysis['title']}\n\n")
+            offset, length = 0, 0
+        else:
+            self._write(f"\n{analysis['title']}\n")
+            offset, length = self._write(analysis['output'])
+            self._write('\n\n')
+
+        entry = {key: value for key, value in analysis.items() if key not in ('output', 'readings')}
+        entry['offset'] = offset
+        entry['length'] = length
+        self.index.append(entry)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            logger.info(f"Text report written to: {self.text_filename} ({len(self.index)} sections)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def iter_analyses(self):
+        """
+        Yield the indexed sections with their output read back from disk, one at a time
+        """
+        return read_analyses(self.text_filename, self.index)
+
+
+def read_analyses(text_filename, entries):
+    """
+    Yield ReportSink index entries (any subset, e.g. in another process) with their output read back from the report
+    """
+    with open(text_filename, 'rb') as f:
+        for entry in entries:
+            analysis = dict(entry)
+            if entry['length']:
+                f.seek(entry['offset'])
+                analysis['output'] = f.read(entry['length']).decode(ENCODING)
+            else:
+                analysis['output'] = ''
+            analysis['readings'] = []
+            yield analysis
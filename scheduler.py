@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Schedules for daemon mode
+Standard 5-field cron expressions and fixed intervals, both answering "when is the next run?"
+"""
+
+import datetime
+import os
+import signal
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = (
+    # name, min, max
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day of month', 1, 31),
+    ('month', 1, 12),
+    ('day of week', 0, 7),
+)
+
+_NAMES = {
+    'month': {name: number for number, name in enumerate(
+        ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)},
+    'day of week': {name: number for number, name in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])},
+}
+
+_MACROS = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+
+def _parse_field(text, name, low, high):
+    names = _NAMES.get(name, {})
+
+    def value(token):
+        token = token.lower()
+        if token in names:
+            return names[token]
+        number = int(token)
+        if not low <= number <= high:
+            raise ValueError(f"{name} value {number} out of range {low}-{high}")
+        return number
+
+    values = set()
+    for part in text.split(','):
+        part, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"Invalid step in {name} field: {text}")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (value(token) for token in part.split('-', 1))
+        else:
+            start = value(part)
+            end = high if step > 1 else start
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """
+    5-field cron expression (minute hour day-of-month month day-of-week)
+    Supports *, lists, ranges, steps, month/day names and @hourly-style macros.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = _MACROS.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: '{expression}'")
+        parsed = [_parse_field(text, *spec) for text, spec in zip(fields, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # Cron allows both 0 and 7 for Sunday; Python's isoweekday() % 7 gives Sunday=0
+        self.weekdays = {day % 7 for day in weekdays}
+        # As in Vixie cron, a day field starting with '*' (e.g. '*/1') counts as unrestricted
+        self._any_day = fields[2].startswith('*')
+        self._any_weekday = fields[4].startswith('*')
+
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days
+        weekday_ok = dt.isoweekday() % 7 in self.weekdays
+        # Classic cron: if both day fields are restricted, either one matching is enough
+        if not self._any_day and not self._any_weekday:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, dt):
+        """
+        First matching minute strictly after dt
+        """
+        dt = dt.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = dt + datetime.timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + datetime.timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += datetime.timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+    def __repr__(self):
+        return f"CronSchedule('{self.expression}')"
+
+
+class IntervalSchedule:
+    """
+    Fixed interval, aligned to multiples of the interval since the epoch so that
+    restarts don't drift the schedule (e.g. every 900s runs at :00, :15, :30, :45)
+    """
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_after(self, dt):
+        timestamp = dt.timestamp()
+        following = datetime.datetime.fromtimestamp((timestamp // self.seconds + 1) * self.seconds)
+        # Guard against float rounding landing exactly on dt for sub-second intervals
+        if following <= dt:
+            following += datetime.timedelta(seconds=self.seconds)
+        return following
+
+    def __repr__(self):
+        return f"IntervalSchedule({self.seconds}s)"
+
+
+def period_at(schedule, dt):
+    """
+    Length in seconds of the scheduling period that starts at dt (used to size the poll stagger window)
+    """
+    return (schedule.next_after(dt) - dt).total_seconds()
+
+
+def parse_schedule(cron=None, interval=None):
+    """
+    Build a schedule from a cron expression or an interval in seconds (cron wins if both are given)
+    """
+    if cron:
+        return CronSchedule(cron)
+    if interval:
+        return IntervalSchedule(float(interval))
+    raise ValueError("Daemon mode needs a cron expression or an interval")
+
+
+class InventoryWatcher:
+    """
+    Keeps the loaded inventory in memory and reloads it only when the file changes
+    (modification time or size). A file that fails to load keeps the previous inventory.
+    """
+
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self.inventory = None
+        self.reloads = 0
+        self._signature = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def current(self):
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            if signature is None and self.inventory is None:
+                logger.error(f"Inventory file not found: {self.path}")
+            return self.inventory
+        try:
+            inventory = self.loader(self.path)
+        except Exception as e:
+            logger.error(f"Could not reload inventory {self.path}, keeping previous one: {str(e)}")
+            return self.inventory
+        if inventory is not None:
+            if self._signature is not None:
+                logger.info(f"Inventory {self.path} changed, reloaded {len(inventory)} switches")
+            self.inventory = inventory
+            self._signature = signature
+            self.reloads += 1
+        return self.inventory
+
+
+def run_daemon(schedule, sweep, inventory, stagger_fraction=0.5, run_now=False, stop_event=None, clock=None):
+    """
+    Run sweep(list_of_switches, stagger=seconds) on every scheduled tick until stopped
+
+    The process stays up between sweeps, so imports, the inventory and caches stay warm.
+    Device connections are spread over stagger_fraction of the scheduling period.
+    SIGTERM/SIGINT stop the loop after the current sweep finishes.
+    """
+    stop_event = stop_event or threading.Event()
+    clock = clock or datetime.datetime.now
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop_event.set())
+
+    logger.info(f"Daemon started with {schedule}")
+    sweeps = 0
+    due = clock() if run_now else schedule.next_after(clock())
+    while not stop_event.is_set():
+        wait = (due - clock()).total_seconds()
+        if wait > 0:
+            logger.info(f"Next sweep at {due:%Y-%m-%d %H:%M:%S}")
+            if stop_event.wait(wait):
+                break
+
+        switches = inventory.current()
+        if switches:
+            try:
+                sweep(switches, stagger=period_at(schedule, due) * stagger_fraction)
+            except Exception as e:
+                logger.error(f"Sweep failed: {str(e)}")
+            sweeps += 1
+        else:
+            logger.error("No inventory loaded, skipping this sweep")
+
+        now = clock()
+        following = schedule.next_after(due)
+        if following < now:
+            logger.warning(f"Sweep overran its schedule, skipping to the next slot after {now:%H:%M:%S}")
+            following = schedule.next_after(now)
+        due = following
+
+    logger.info(f"Daemon stopped after {sweeps} sweeps")
+    return sweeps
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Persistent SSH session pool
+Keeps one netmiko session per switch open between sweeps (daemon mode), so
+steady-state polls skip the key exchange, authentication and prompt discovery
+"""
+
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SESSIONS = 500
+DEFAULT_KEEPALIVE = 30
+DEFAULT_MAX_IDLE = 3600
+
+
+def _default_connect(**params):
+    from netmiko import ConnectHandler
+    return ConnectHandler(**params)
+
+
+# Timeouts change from sweep to sweep (host_health adapts them) and don't identify a session
+_VOLATILE_PARAMS = ('conn_timeout', 'auth_timeout', 'read_timeout_override')
+
+
+def _session_key(params):
+    """
+    Connection settings that must match for a pooled session to be reused
+    (an inventory edit such as a new password forces a reconnect)
+    """
+    return tuple(sorted((key, str(value)) for key, value in params.items() if key not in _VOLATILE_PARAMS))
+
+
+class SessionPool:
+    """
+    Thread-safe pool of idle SSH sessions keyed by host
+
+    checkout() hands out a healthy idle session or opens a new one; checkin()
+    returns it for the next sweep. At most max_sessions are kept open - the
+    least recently used idle session is closed to make room. Idle sessions get
+    an SSH keepalive from paramiko and, with start_keepalive(), a periodic
+    is_alive() probe so dead sessions are dropped before the next sweep needs them.
+    """
+
+    def __init__(self, connect=None, max_sessions=DEFAULT_MAX_SESSIONS, keepalive=DEFAULT_KEEPALIVE,
+                 max_idle=DEFAULT_MAX_IDLE):
+        self.connect = connect or _default_connect
+        self.max_sessions = max(1, int(max_sessions))
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+        self.opened = 0
+        self.reused = 0
+        self.reconnects = 0
+        self._idle = OrderedDict()  # host -> (session, key, last_used), least recently used first
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._keepalive_thread = None
+
+    @classmethod
+    def from_env(cls, **overrides):
+        settings = {
+            'max_sessions': int(os.getenv('SSH_POOL_MAX_SESSIONS', str(DEFAULT_MAX_SESSIONS))),
+            'keepalive': int(os.getenv('SSH_KEEPALIVE', str(DEFAULT_KEEPALIVE))),
+            'max_idle': float(os.getenv('SSH_POOL_MAX_IDLE', str(DEFAULT_MAX_IDLE))),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._idle) + self._in_use
+
+    def stats(self):
+        with self._lock:
+            return {'open': len(self._idle) + self._in_use, 'idle': len(self._idle), 'opened': self.opened,
+                    'reused': self.reused, 'reconnects': self.reconnects}
+
+    @staticmethod
+    def _close(host, session):
+        try:
+            if session.is_alive():
+                session.disconnect()
+        except Exception as e:
+            logger.debug(f"Error closing pooled session to {host}: {str(e)}")
+
+    def _healthy(self, session, last_used):
+        if self.max_idle and time.monotonic() - last_used > self.max_idle:
+            return False
+        try:
+            return bool(session.is_alive())
+        except Exception:
+            return False
+
+    def checkout(self, params, fresh=False):
+        """
+        Get a session for this switch: (session, reused)
+        Pass fresh=True to skip the pool after a reused session failed mid-command.
+        """
+        host = params.get('host', 'Unknown')
+        key = _session_key(params)
+        evicted = []
+        with self._lock:
+            entry = self._idle.pop(host, None)
+            self._in_use += 1
+        if entry is not None:
+            session, entry_key, last_used = entry
+            if not fresh and entry_key == key and self._healthy(session, last_used):
+                with self._lock:
+                    self.reused += 1
+                return session, True
+            with self._lock:
+                self.reconnects += 1
+            self._close(host, session)
+
+        with self._lock:
+            while self._idle and len(self._idle) + self._in_use > self.max_sessions:
+                evicted.append(self._idle.popitem(last=False))
+        for evicted_host, (session, _, _) in evicted:
+            logger.info(f"Session pool full, closing idle session to {evicted_host}")
+            self._close(evicted_host, session)
+
+        connect_params = dict(params)
+        if self.keepalive:
+            connect_params.setdefault('keepalive', self.keepalive)
+        try:
+            session = self.connect(**connect_params)
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+            raise
+        with self._lock:
+            self.opened += 1
+        return session, False
+
+    def checkin(self, params, session, healthy=True):
+        """
+        Return a session after use; unhealthy sessions are closed instead of pooled
+        """
+        host = params.get('host', 'Unknown')
+        with self._lock:
+            self._in_use -= 1
+            keep = healthy and not self._stop.is_set() and host not in self._idle
+            if keep:
+                self._idle[host] = (session, _session_key(params), time.monotonic())
+                # Sessions opened past the cap while every pooled session was busy are trimmed here
+                evicted = []
+                while len(self._idle) + self._in_use > self.max_sessions:
+                    evicted.append(self._idle.popitem(last=False))
+        if not keep:
+            self._close(host, session)
+            return
+        for evicted_host, (evicted_session, _, _) in evicted:
+            self._close(evicted_host, evicted_session)
+
+    def retain(self, hosts):
+        """
+        Close idle sessions for switches that are no longer in the inventory
+        """
+        hosts = set(hosts)
+        with self._lock:
+            gone = [(host, self._idle.pop(host)) for host in list(self._idle) if host not in hosts]
+        for host, (session, _, _) in gone:
+            self._close(host, session)
+        if gone:
+            logger.info(f"Closed {len(gone)} pooled sessions for switches removed from the inventory")
+        return len(gone)
+
+    def probe_idle(self):
+        """
+        Check every idle session and drop the dead or expired ones; returns how many were dropped
+        Each session is taken out of the pool while it is probed, so a sweep never shares a channel with the probe.
+        """
+        with self._lock:
+            hosts = list(self._idle)
+        dropped = 0
+        # Newest first, so moving each survivor back to the front rebuilds the original order
+        for host in reversed(hosts):
+            with self._lock:
+                entry = self._idle.pop(host, None)
+            if entry is None:
+                continue
+            session, key, last_used = entry
+            if self._healthy(session, last_used):
+                with self._lock:
+                    if host not in self._idle:
+                        self._idle[host] = entry
+                        self._idle.move_to_end(host, last=False)
+                        continue
+            self._close(host, session)
+            dropped += 1
+        if dropped:
+            logger.info(f"Dropped {dropped} dead or expired pooled sessions")
+        return dropped
+
+    def start_keepalive(self, interval=None):
+        """
+        Probe idle sessions in a background thread every interval seconds
+        """
+        interval = interval or self.keepalive
+        if not interval or self._keepalive_thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.probe_idle()
+                except Exception as e:
+                    logger.warning(f"Session keepalive probe failed: {str(e)}")
+
+        self._keepalive_thread = threading.Thread(target=run, name='session-keepalive', daemon=True)
+        self._keepalive_thread.start()
+
+    def close(self):
+        """
+        Stop the keepalive thread and disconnect every idle session
+        """
+        self._stop.set()
+        if self._keepalive_thread is not None:
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+        with self._lock:
+            entries = list(self._idle.items())
+            self._idle.clear()
+        for host, (session, _, _) in entries:
+            self._close(host, session)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
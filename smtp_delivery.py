@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Pooled SMTP delivery with retry/backoff and a local spool
+Keeps one authenticated connection open for a batch of messages, retries
+transient failures with exponential backoff and spools mail that still fails;
+mail the server rejected outright is never retried
+"""
+
+import email
+import glob
+import json
+import os
+import random
+import shutil
+import smtplib
+import time
+import uuid
+import logging
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = 'mail_spool'
+
+# Spooled messages the server rejected permanently (5xx) are moved here, inside the spool directory
+DEAD_LETTER_DIR = 'failed'
+
+# Failures worth retrying: dropped connections, network errors and 4xx replies
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+# Bytes of a streamed message handed to the socket at a time
+_SEND_CHUNK = 64 * 1024
+
+
+def _is_transient(error):
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def _is_connection_error(error):
+    """
+    Failures of the connection or login rather than of one message: every other message would fail too
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError)):
+        return True
+    # SMTPException subclasses OSError, so only plain socket errors count here
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def _should_spool(error):
+    """
+    Worth sending again later: anything except the server rejecting this message (5xx)
+    """
+    return error is None or _is_transient(error) or _is_connection_error(error)
+
+
+def _subject(path):
+    """
+    Subject header of a message file, reading only its header block
+    """
+    lines = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                break
+            lines.append(line)
+    return email.message_from_bytes(b''.join(lines)).get('Subject', '')
+
+
+class SMTPDelivery:
+    """
+    Reusable SMTP connection for sending several messages over one STARTTLS/login
+
+    Use as a context manager; the connection is opened lazily on the first send and
+    reopened transparently if the server drops it between messages.
+    """
+
+    def __init__(self, server, port=587, username=None, password=None, use_tls=True,
+                 max_retries=3, backoff=2.0, max_backoff=60.0, spool_dir=DEFAULT_SPOOL_DIR,
+                 timeout=30, smtp_factory=smtplib.SMTP):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.spool_dir = spool_dir
+        self.timeout = timeout
+        self.smtp_factory = smtp_factory
+        self.connections_opened = 0
+        self.last_error = None
+        self._smtp = None
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """
+        Build a delivery from the same environment variables send_email_with_attachment uses
+        """
+        settings = dict(
+            server=os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+            port=int(os.getenv('SMTP_PORT', '587')),
+            username=os.getenv('SENDER_EMAIL', 'sender@example.com'),
+            password=os.getenv('SENDER_PASSWORD', 'password'),
+            use_tls=os.getenv('SMTP_USE_TLS', 'true').lower() == 'true',
+            max_retries=int(os.getenv('SMTP_MAX_RETRIES', '3')),
+            backoff=float(os.getenv('SMTP_RETRY_BACKOFF', '2')),
+            spool_dir=os.getenv('MAIL_SPOOL_DIR', DEFAULT_SPOOL_DIR),
+        )
+        settings.update(overrides)
+        return cls(**settings)
+
+    def connect(self):
+        if self._smtp is not None:
+            return self._smtp
+        smtp = self.smtp_factory(self.server, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._abort(smtp)
+            raise
+        self._smtp = smtp
+        self.connections_opened += 1
+        logger.info(f"Connected to SMTP server {self.server}:{self.port}")
+        return smtp
+
+    @staticmethod
+    def _abort(smtp):
+        try:
+            smtp.close()
+        except Exception:
+            pass
+
+    def close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._abort(self._smtp)
+        self._smtp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _deliver_once(self, sender, recipients, message_text):
+        smtp = self.connect()
+        try:
+            smtp.sendmail(sender, recipients, message_text)
+        except Exception as e:
+            # Don't reuse a connection in an unknown state
+            if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                self._abort(smtp)
+                self._smtp = None
+            raise
+
+    def _deliver_file_once(self, sender, recipients, path):
+        """
+        MAIL/RCPT/DATA by hand so the message is streamed from disk instead of passed as one string
+        """
+        smtp = self.connect()
+        try:
+            smtp.ehlo_or_helo_if_needed()
+            code, response = smtp.mail(sender)
+            if code != 250:
+                smtp.rset()
+                raise smtplib.SMTPSenderRefused(code, response, sender)
+            refused = {}
+            for recipient in recipients:
+                code, response = smtp.rcpt(recipient)
+                if code not in (250, 251):
+                    refused[recipient] = (code, response)
+            if len(refused) == len(recipients):
+                smtp.rset()
+                raise smtplib.SMTPRecipientsRefused(refused)
+            code, response = smtp.docmd('data')
+            if code != 354:
+                smtp.rset()
+                raise smtplib.SMTPDataError(code, response)
+            with open(path, 'rb') as f:
+                batch = []
+                batch_size = 0
+                for line in f:
+                    line = line.rstrip(b'\r\n')
+                    if line.startswith(b'.'):
+                        line = b'.' + line
+                    batch.append(line + b'\r\n')
+                    batch_size += len(line) + 2
+                    if batch_size >= _SEND_CHUNK:
+                        smtp.send(b''.join(batch))
+                        batch, batch_size = [], 0
+            smtp.send(b''.join(batch) + b'.\r\n')
+            code, response = smtp.getreply()
+            if code != 250:
+                raise smtplib.SMTPDataError(code, response)
+        except Exception as e:
+            if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                self._abort(smtp)
+                self._smtp = None
+            raise
+
+    def _retry(self, deliver, size):
+        """
+        Run deliver() until it succeeds, retrying transient failures with exponential backoff
+        The final failure is kept in last_error.
+        """
+        self.last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                with tracing.span('smtp', bytes=size, attempt=attempt + 1):
+                    deliver()
+                return True
+            except Exception as e:
+                self.last_error = e
+                if not _is_transient(e) or attempt == self.max_retries:
+                    logger.error(f"Error sending email: {str(e)}")
+                    return False
+                delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning(f"Transient SMTP error ({str(e)}), retrying in {delay:.1f}s "
+                               f"(attempt {attempt + 1} of {self.max_retries})")
+                time.sleep(delay)
+        return False
+
+    def send(self, msg, sender, recipients, spool_on_failure=True):
+        """
+        Send one message, retrying transient failures with exponential backoff
+        Returns True on success; on final failure the message is spooled (unless the server
+        rejected it permanently) and False returned
+        """
+        with tracing.span('mime'):
+            message_text = msg if isinstance(msg, str) else msg.as_string()
+        if self._retry(lambda: self._deliver_once(sender, recipients, message_text), len(message_text)):
+            return True
+        if spool_on_failure and _should_spool(self.last_error):
+            self.spool(message_text, sender, recipients)
+        elif spool_on_failure:
+            logger.error("Email rejected by the server - not spooled, it would fail again")
+        return False
+
+    def send_file(self, path, sender, recipients, spool_on_failure=True):
+        """
+        Send a message already serialised to path (e.g. by mime_stream.write_message),
+        streaming it to the server line by line; retries and spooling as for send()
+        """
+        if self._retry(lambda: self._deliver_file_once(sender, recipients, path), os.path.getsize(path)):
+            return True
+        if spool_on_failure and _should_spool(self.last_error):
+            self.spool_file(path, sender, recipients)
+        elif spool_on_failure:
+            logger.error("Email rejected by the server - not spooled, it would fail again")
+        return False
+
+    def _spool_name(self, sender, recipients):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        with open(os.path.join(self.spool_dir, f"{name}.json"), 'w') as f:
+            json.dump({'sender': sender, 'recipients': list(recipients)}, f)
+        return os.path.join(self.spool_dir, f"{name}.eml")
+
+    def spool(self, message_text, sender, recipients):
+        """
+        Save an undeliverable message to the spool directory for a later flush_spool()
+        """
+        if not self.spool_dir:
+            return None
+        path = self._spool_name(sender, recipients)
+        with open(path, 'w') as f:
+            f.write(message_text)
+        logger.warning(f"Email spooled for later delivery: {path}")
+        return path
+
+    def spool_file(self, message_path, sender, recipients):
+        """
+        Copy an undeliverable message file to the spool directory
+        """
+        if not self.spool_dir:
+            return None
+        path = self._spool_name(sender, recipients)
+        shutil.copyfile(message_path, path)
+        logger.warning(f"Email spooled for later delivery: {path}")
+        return path
+
+    def flush_spool(self):
+        """
+        Try to deliver spooled messages oldest first; returns (delivered, remaining)
+        Stops at the first connection or login failure so a dead server doesn't cost a full
+        retry cycle per message. A message the server rejects permanently is moved to
+        DEAD_LETTER_DIR and the rest keep flushing; one refused for now (4xx) stays spooled.
+        """
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return 0, 0
+        paths = sorted(glob.glob(os.path.join(self.spool_dir, '*.eml')))
+        delivered = remaining = 0
+        for number, path in enumerate(paths):
+            envelope_path = path[:-len('.eml')] + '.json'
+            try:
+                with open(envelope_path) as f:
+                    envelope = json.load(f)
+                subject = _subject(path)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable spooled email {path}: {str(e)}")
+                remaining += 1
+                continue
+            if self.send_file(path, envelope['sender'], envelope['recipients'], spool_on_failure=False):
+                os.remove(path)
+                os.remove(envelope_path)
+                delivered += 1
+                logger.info(f"Delivered spooled email: {subject}")
+            elif _is_connection_error(self.last_error):
+                remaining += len(paths) - number
+                break
+            elif _should_spool(self.last_error):
+                remaining += 1
+            else:
+                dead_dir = os.path.join(self.spool_dir, DEAD_LETTER_DIR)
+                os.makedirs(dead_dir, exist_ok=True)
+                for spooled in (path, envelope_path):
+                    shutil.move(spooled, os.path.join(dead_dir, os.path.basename(spooled)))
+                logger.error(f"Spooled email rejected by the server, moved to {dead_dir}: {subject}")
+        return delivered, remaining
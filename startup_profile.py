@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile for checktemp_enhanced.py
+Runs a fresh interpreter with `python -X importtime`, importing each pipeline stage's
+dependencies in the order a sweep needs them, and reports per-stage and per-import cost
+"""
+
+import os
+import subprocess
+import sys
+
+# Importing checktemp_enhanced (everything a run pays before it reads the inventory) must stay under this
+DEFAULT_STARTUP_BUDGET_MS = 150
+
+# Modules that must not be imported until their stage runs
+HEAVY_MODULES = ('pandas', 'netmiko', 'paramiko', 'reportlab', 'openpyxl', 'smtplib', 'email.mime', 'asyncio',
+                 'sqlite3')
+
+STAGES = (
+    ('startup', ('checktemp_enhanced',)),
+    ('inventory', ('openpyxl',)),
+    ('poll', ('netmiko',)),
+    ('history', ('history_store',)),
+    ('pdf', ('pdf_report',)),
+    ('email', ('email.mime.multipart', 'email.mime.base', 'smtp_delivery')),
+)
+
+_MARKER = '@@stage '
+
+
+def _child_code(stages):
+    lines = ['import sys']
+    for name, modules in stages:
+        lines.append(f"sys.stderr.write({_MARKER + name!r} + '\\n')")
+        for module in modules:
+            lines.append(f"try:\n    __import__({module!r})\n"
+                         f"except ImportError as e:\n    sys.stderr.write('@@missing {module} ' + str(e) + '\\n')")
+    return '\n'.join(lines)
+
+
+def parse_importtime(stderr):
+    """
+    Split `-X importtime` output into stages
+    Returns [(stage, [(module, self_us, cumulative_us, depth)], [missing modules])]
+    """
+    stages = []
+    for line in stderr.splitlines():
+        if line.startswith(_MARKER):
+            stages.append((line[len(_MARKER):].strip(), [], []))
+        elif line.startswith('@@missing ') and stages:
+            stages[-1][2].append(line[len('@@missing '):])
+        elif line.startswith('import time:') and stages:
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or not parts[0].strip().isdigit():
+                continue  # the column header line
+            name = parts[2].rstrip()
+            depth = (len(name) - len(name.lstrip())) // 2
+            stages[-1][1].append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return stages
+
+
+def profile_startup(stages=STAGES, python=sys.executable):
+    """
+    Import every stage in a fresh interpreter and return the parsed importtime profile
+    """
+    env = dict(os.environ)
+    here = os.path.dirname(os.path.abspath(__file__))
+    env['PYTHONPATH'] = here + os.pathsep + env.get('PYTHONPATH', '')
+    completed = subprocess.run([python, '-X', 'importtime', '-c', _child_code(stages)],
+                               capture_output=True, text=True, env=env, cwd=here)
+    return parse_importtime(completed.stderr)
+
+
+def print_profile(profile, budget_ms=DEFAULT_STARTUP_BUDGET_MS, top=10):
+    """
+    Print the per-stage table and the slowest imports; returns False if startup is over budget
+    """
+    within_budget = True
+    print(f"\n{'Stage':<12} {'Imports':>8} {'Cumulative ms':>14}")
+    for stage, imports, missing in profile:
+        total_ms = sum(cumulative for _, _, cumulative, depth in imports if depth == 0) / 1000
+        note = f"  (not installed: {', '.join(m.split()[0] for m in missing)})" if missing else ''
+        print(f"{stage:<12} {len(imports):>8} {total_ms:>14.1f}{note}")
+        if stage == 'startup':
+            startup_ms = total_ms
+            within_budget = total_ms <= budget_ms
+            eager = sorted({name for name, _, _, _ in imports
+                            if any(name == heavy or name.startswith(heavy + '.') for heavy in HEAVY_MODULES)})
+
+    for stage, imports, _ in profile:
+        if not imports:
+            continue
+        print(f"\nSlowest imports in '{stage}' (self us | cumulative us | module, as -X importtime):")
+        for name, self_us, cumulative_us, depth in sorted(imports, key=lambda entry: -entry[1])[:top]:
+            print(f"  {self_us:>9} | {cumulative_us:>12} | {'  ' * depth}{name}")
+
+    if profile and profile[0][0] == 'startup':
+        verdict = 'within' if within_budget else 'OVER'
+        print(f"\nCold start: {startup_ms:.1f} ms, {verdict} the {budget_ms} ms budget")
+        if eager:
+            print(f"Heavy modules imported at startup: {', '.join(eager)}")
+            within_budget = False
+    return within_budget
+
+
+if __name__ == "__main__":
+    ok = print_profile(profile_startup(), int(os.getenv('STARTUP_BUDGET_MS', str(DEFAULT_STARTUP_BUDGET_MS))))
+    sys.exit(0 if ok else 1)
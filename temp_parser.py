@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Structured parser for 'show env temp' output
+Turns IOS, IOS-XE stack and NX-OS temperature output into typed sensor readings
+so alerting compares numbers instead of searching for words
+"""
+
+import re
+from collections import namedtuple
+
+# One parsed sensor (or overall status) line. celsius/yellow/red are None when the device
+# doesn't report them; lineno is the index of the source line within the parsed output.
+# kind is 'temperature' here; collectors.py reuses the record for 'fan' and 'power' status lines.
+TempReading = namedtuple('TempReading', 'sensor celsius yellow red state switch line lineno kind',
+                         defaults=('temperature',))
+
+SEVERITY_ORDER = {'ok': 0, 'warning': 1, 'critical': 2}
+
+STATE_SEVERITY = {
+    'ok': 'ok', 'green': 'ok', 'normal': 'ok', 'good': 'ok', 'fine': 'ok',
+    'yellow': 'warning', 'warning': 'warning', 'warn': 'warning', 'minor': 'warning', 'alert': 'warning',
+    'red': 'critical', 'critical': 'critical', 'major': 'critical', 'catastrophic': 'critical',
+    'shutdown': 'critical', 'faulty': 'critical', 'fail': 'critical', 'failed': 'critical',
+}
+
+_NUM = r'-?\d+(?:\.\d+)?'
+
+# Overall status lines: "Switch 1: SYSTEM TEMPERATURE is OK", "Temperature Status: Warning"
+SUMMARY_RE = re.compile(r'^\s*(?:Switch\s+(?P<switch>\d+)\s*:\s*)?SYSTEM TEMPERATURE is (?P<state>\w+)', re.I)
+STATUS_RE = re.compile(r'^\s*Temperature Status\s*:\s*(?P<state>\w+)', re.I)
+
+# IOS / IOS-XE stack block format:
+#   Inlet Temperature Value: 33 Degree Celsius
+#   Temperature State: GREEN
+#   Yellow Threshold : 46 Degree Celsius
+#   Red Threshold    : 56 Degree Celsius
+BLOCK_VALUE_RE = re.compile(rf'^\s*(?P<sensor>[\w ]*?)\s*Temperature Value\s*:\s*(?P<temp>{_NUM})', re.I)
+BLOCK_STATE_RE = re.compile(r'^\s*(?:\w+ )*Temperature State\s*:\s*(?P<state>\w+)', re.I)
+BLOCK_YELLOW_RE = re.compile(rf'^\s*Yellow Threshold\s*:\s*(?P<temp>{_NUM})', re.I)
+BLOCK_RED_RE = re.compile(rf'^\s*Red Threshold\s*:\s*(?P<temp>{_NUM})', re.I)
+
+# IOS-XE (Catalyst 9k) table: "Temp: Inlet   R0   Normal   32 Celsius   (35,40,45)(Celsius)"
+XE_TABLE_RE = re.compile(
+    rf'^\s*(?P<sensor>Temp:?\s*\S.*?)\s{{2,}}(?P<switch>\S+)\s+(?P<state>\w+)\s+(?P<temp>{_NUM})\s*Celsius'
+    rf'\s*\((?P<yellow>{_NUM}),\s*(?P<red>{_NUM})', re.I)
+
+# NX-OS table: "1        FRONT           80              70          33         Ok"
+#              (Module, Sensor, MajorThresh, MinorThres, CurTemp, Status)
+NXOS_TABLE_RE = re.compile(
+    rf'^\s*(?P<switch>\d+)\s+(?P<sensor>\S+(?:\s\S+)*?)\s+(?P<red>{_NUM}|NA)\s+(?P<yellow>{_NUM}|NA)'
+    rf'\s+(?P<temp>{_NUM})\s+(?P<state>[A-Za-z]+)\s*$')
+
+# Generic "Sensor  Status  Reading" rows: "System Outlet      WARNING         45 Celsius"
+ROW_RE = re.compile(rf'^\s*(?P<sensor>[A-Za-z][\w /().\-]*?)\s{{2,}}(?P<state>[A-Za-z]+)\s+(?P<temp>{_NUM})'
+                    rf'(?:\s*(?:Degree\s+)?(?:Celsius|C))?\s*$', re.I)
+
+_HAS_DIGIT = re.compile(r'\d').search
+
+PLATFORMS = ('auto', 'ios', 'iosxe', 'nxos')
+
+_TABLE_PATTERNS = {
+    'ios': (ROW_RE,),
+    'iosxe': (XE_TABLE_RE, ROW_RE),
+    'nxos': (NXOS_TABLE_RE,),
+    'auto': (XE_TABLE_RE, NXOS_TABLE_RE, ROW_RE),
+}
+
+
+def platform_for_device_type(device_type):
+    """
+    Map a netmiko device_type to a parser platform
+    """
+    device_type = (device_type or '').lower()
+    if 'nxos' in device_type:
+        return 'nxos'
+    if 'xe' in device_type:
+        return 'iosxe'
+    if 'ios' in device_type:
+        return 'ios'
+    return 'auto'
+
+
+def _number(value):
+    if value is None or value == 'NA':
+        return None
+    return float(value)
+
+
+def parse_env_temp(output, platform='auto'):
+    """
+    Parse 'show env temp' output into a list of TempReading records
+    """
+    if platform not in _TABLE_PATTERNS:
+        raise ValueError(f"Unknown platform '{platform}' (expected one of: {', '.join(PLATFORMS)})")
+    table_patterns = _TABLE_PATTERNS[platform]
+    block_format = platform != 'nxos'
+
+    readings = []
+    block = None
+    switch = None
+
+    def close_block():
+        if block is not None:
+            readings.append(TempReading(**block))
+
+    for lineno, line in enumerate(output.split('\n')):
+        # Cheap substring checks pick the candidate patterns so most lines hit at most one regex
+        upper = line.upper()
+        if 'TEMPERATURE' in upper:
+            match = SUMMARY_RE.match(line) or STATUS_RE.match(line)
+            if match:
+                close_block()
+                block = None
+                switch = match.groupdict().get('switch') or switch
+                readings.append(TempReading('System', None, None, None, match.group('state'), switch, line, lineno))
+                continue
+
+            if block_format:
+                match = BLOCK_VALUE_RE.match(line)
+                if match:
+                    close_block()
+                    block = {'sensor': match.group('sensor').strip() or 'System',
+                             'celsius': float(match.group('temp')), 'yellow': None, 'red': None,
+                             'state': '', 'switch': switch, 'line': line, 'lineno': lineno}
+                    continue
+                match = BLOCK_STATE_RE.match(line)
+                if match:
+                    if block is not None:
+                        block['state'] = match.group('state')
+                    continue
+
+        elif 'THRESHOLD' in upper:
+            if block is not None:
+                match = BLOCK_YELLOW_RE.match(line)
+                if match:
+                    block['yellow'] = float(match.group('temp'))
+                    continue
+                match = BLOCK_RED_RE.match(line)
+                if match:
+                    block['red'] = float(match.group('temp'))
+                continue
+
+        # Table rows always carry a reading, so lines without a digit can't match
+        if not _HAS_DIGIT(line):
+            continue
+        for pattern in table_patterns:
+            match = pattern.match(line)
+            if match:
+                fields = match.groupdict()
+                readings.append(TempReading(
+                    fields['sensor'].strip(), float(fields['temp']), _number(fields.get('yellow')),
+                    _number(fields.get('red')), fields['state'], fields.get('switch') or switch, line, lineno))
+                break
+
+    close_block()
+    return readings
+
+
+def sensor_key(reading):
+    """
+    Stable per-device sensor identifier, qualified by stack member/module when known
+    """
+    return f"{reading.switch}/{reading.sensor}" if reading.switch else reading.sensor
+
+
+def reading_severity(reading):
+    """
+    Severity of one reading: the worse of the device-reported state and the
+    numeric comparison of the current temperature against its thresholds
+    """
+    severity = STATE_SEVERITY.get(reading.state.lower(), 'ok')
+    if reading.celsius is not None:
+        if reading.red is not None and reading.celsius >= reading.red:
+            return 'critical'
+        if reading.yellow is not None and reading.celsius >= reading.yellow and severity == 'ok':
+            return 'warning'
+    return severity
+
+
+def legacy_line_severity(line):
+    """
+    Keyword match used for output the structured parser doesn't recognise
+    """
+    line_lower = line.lower()
+    if 'critical' in line_lower or 'catastrophic' in line_lower:
+        return 'critical'
+    if 'warning' in line_lower:
+        return 'warning'
+    return 'ok'
+
+
+def line_severities(output, platform='auto', readings=None):
+    """
+    Map line index -> severity for every non-ok line of one device's output
+    Falls back to keyword matching when no sensor lines could be parsed.
+    Pass readings if the output has already been parsed.
+    """
+    if readings is None:
+        readings = parse_env_temp(output, platform)
+    if readings:
+        severities = {}
+        for reading in readings:
+            severity = reading_severity(reading)
+            if severity != 'ok':
+                severities[reading.lineno] = severity
+        return severities
+
+    severities = {}
+    for lineno, line in enumerate(output.split('\n')):
+        severity = legacy_line_severity(line)
+        if severity != 'ok':
+            severities[lineno] = severity
+    return severities
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+from alert_analysis import AlertIndex
+from benchmark_parser import SAMPLE_OUTPUTS
+from checktemp_enhanced import analyze_output_for_alerts
+from poller import poll_switches
+
+
+def _fake_results():
+    """Poller-shaped results: OK, warning, critical, unreachable, and a second warning command on the critical host"""
+    warning = SAMPLE_OUTPUTS['table'].format(t1=23, t2=28).replace('CPU Temperature        OK', 'CPU Temperature        WARNING')
+    critical = SAMPLE_OUTPUTS['nxos'].format(t1=33, t2=75)
+    return [
+        {'host': '10.0.0.1', 'hostname': 'SW-CORE-01', 'outputs': [('show env temp', SAMPLE_OUTPUTS['ios'].format(t1=41, t2=0))], 'error': None},
+        {'host': '10.0.0.2', 'hostname': 'SW-ACCESS-02', 'outputs': [('show env temp', warning)], 'error': None},
+        {'host': '10.0.0.3', 'hostname': 'SW-DIST-03', 'outputs': [('show env temp', warning), ('show env temp', critical)], 'error': None},
+        {'host': '10.0.0.4', 'hostname': None, 'outputs': [], 'error': 'TCP connection to device failed'},
+    ]
+
+
+def test_streaming_index_matches_text_analysis():
+    """Classifying results as they arrive gives the same summary as re-parsing the report text"""
+    results = _fake_results()
+
+    streamed = AlertIndex()
+    report = 'Start Script at Time: now\n'
+    for result in results:
+        streamed.add_result(result)
+        for command, output in result['outputs']:
+            report += f'\n --- Output of {command} on {result["hostname"]} \n{output}\n\n'
+
+    warning_hosts, critical_hosts, warning_details, critical_details = streamed.summary()
+    assert critical_hosts == ['SW-DIST-03']
+    assert warning_hosts == ['SW-ACCESS-02']
+    assert (warning_hosts, critical_hosts, warning_details, critical_details) == analyze_output_for_alerts(report)
+    assert streamed.host_severity('SW-DIST-03') == 'critical'
+    assert [r['kind'] for r in streamed.records] == ['output'] * 4 + ['error']
+    print("✓ Streaming analysis matches the full-text analysis")
+
+
+def test_poller_releases_results_in_order():
+    """on_result sees every switch exactly once, in inventory order"""
+    inventory = [{'host': f'10.0.0.{i}'} for i in range(30)]
+    seen = []
+
+    class Device:
+        def __init__(self, **params):
+            self.base_prompt = params['host']
+
+        def send_command(self, command):
+            return ''
+
+        def is_alive(self):
+            return False
+
+    poll_switches(inventory, ['show env temp'], max_workers=8, connect=Device,
+                  on_result=lambda result: seen.append(result['host']))
+    assert seen == [s['host'] for s in inventory]
+    print("✓ Poller releases results to on_result in inventory order")
+
+
+if __name__ == "__main__":
+    test_streaming_index_matches_text_analysis()
+    test_poller_releases_results_in_order()
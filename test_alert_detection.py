@@ -4,7 +4,6 @@ Test version demonstrating alert detection functionality
 This creates sample output with warning and critical conditions
 """
 
-import pandas as pd
 import datetime
 import time
 import os
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+from alert_state import AlertStateMachine
+from temp_parser import TempReading
+
+
+def _reading(celsius, sensor='Inlet'):
+    """IOS-style sensor with yellow 66 / red 76"""
+    return TempReading(sensor, celsius, 66, 76, 'GREEN', None, '', 0)
+
+
+def _sweep(machine, ts, temps):
+    machine.begin_sweep(ts)
+    # IOS also reports the sensor as a bare 'SYSTEM TEMPERATURE is OK' line, which must not reset the streak
+    summary_line = TempReading('Inlet', None, None, None, 'OK', None, '', 0)
+    machine.observe('SW-1', [summary_line] + [_reading(celsius) for celsius in temps])
+    return [(t['before'], t['after']) for t in machine.transitions]
+
+
+def test_hysteresis_confirmation_and_renotify():
+    """Flapping on the threshold raises one alert; recovery needs the hysteresis band; reminders follow the interval"""
+    with tempfile.TemporaryDirectory() as tmp:
+        machine = AlertStateMachine(os.path.join(tmp, 'alerts.db'), hysteresis=2, confirm=2, critical_confirm=1,
+                                    renotify_interval=3600)
+        assert _sweep(machine, 0, [67]) == []  # one sample is not confirmed
+        assert _sweep(machine, 60, [65]) == []  # and the streak resets
+        assert _sweep(machine, 120, [67]) == []
+        assert _sweep(machine, 180, [67]) == [('ok', 'warning')]
+        assert machine.due_notifications() == [('SW-1', 'Inlet')]
+        machine.mark_notified(machine.due_notifications())
+
+        # Dipping just under yellow is still inside the band, so no recovery and no new alarm
+        assert _sweep(machine, 240, [65]) == [] and _sweep(machine, 300, [65]) == []
+        assert machine.due_notifications() == []
+        assert _sweep(machine, 360, [80]) == [('warning', 'critical')]  # critical confirms on the first sample
+        machine.mark_notified(machine.due_notifications())
+        assert _sweep(machine, 360 + 3599, [75]) == [] and machine.due_notifications() == []
+        assert machine.due_notifications(360 + 3600) == [('SW-1', 'Inlet')]
+
+        assert _sweep(machine, 4000, [60]) == [] and _sweep(machine, 4060, [60]) == [('critical', 'recovered')]
+        assert machine.alerts() == [] and _sweep(machine, 4120, [60]) == []
+        assert machine.sensors[('SW-1', 'Inlet')][0] == 'ok'
+        machine.close()
+    print("✓ Alert states need confirmation, honour hysteresis and re-notify on schedule")
+
+
+def test_state_persists_and_saves_only_changes():
+    """A restart keeps pending streaks and notification times; unchanged sensors are not rewritten"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'alerts.db')
+        with AlertStateMachine(path) as machine:
+            machine.begin_sweep(0)
+            machine.observe('SW-1', [_reading(40, f'Sensor {n}') for n in range(1000)] + [_reading(70)])
+            assert machine.save() == 1001
+            assert machine.save() == 0
+
+        with AlertStateMachine(path) as machine:
+            assert _sweep(machine, 3600, [70]) == [('ok', 'warning')]
+            assert machine.save() == 1
+            assert machine.prune(older_than=60) == 1000
+        with AlertStateMachine(path) as machine:
+            assert list(machine.sensors) == [('SW-1', 'Inlet')] and machine.alerts(hosts={'SW-1'})[0][2] == 'warning'
+            # A switch that isn't polled this sweep neither lists nor re-notifies its stale alert
+            machine.begin_sweep(3600 + 86400)
+            machine.observe('SW-2', [_reading(40)])
+            assert machine.alerts() == [] and machine.due_notifications() == []
+    print("✓ Alert state survives restarts and writes back only changed sensors")
+
+
+if __name__ == "__main__":
+    test_hysteresis_confirmation_and_renotify()
+    test_state_persists_and_saves_only_changes()
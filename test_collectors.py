@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+from alert_analysis import analyze_poll_result
+from benchmark_parser import SAMPLE_OUTPUTS
+from collectors import (load_collectors, collector_commands, device_record, parse_env_all, parse_env_fan,
+                        parse_env_power)
+from fake_cisco_ssh import FakeCiscoSSHServer, build_fleet, inventory_for
+from poller import poll_switches
+from temp_parser import reading_severity
+
+FAN_OUTPUTS = {
+    'ios': "FAN is OK\nSwitch 1 FAN 2 is FAULTY\nFAN PS-1 is OK\nFAN PS-2 is NOT PRESENT",
+    'c9k': """Switch   FAN     Speed   State   Airflow direction
+---------------------------------------------------
+  1       1     14240     OK      Front to Back
+  1       2     0         NOT FUNCTIONING      Front to Back""",
+    'nxos': """Fan             Model                Hw     Status
+---------------------------------------------------------
+Fan1(sys_fan1)  N9K-C9300-FAN2       --     Ok
+Fan2(sys_fan2)  N9K-C9300-FAN2       --     Failure
+Fan Zone Speed: Zone 1: 0x5f""",
+}
+
+POWER_OUTPUTS = {
+    'ios': "POWER is OK\nRPS is NOT PRESENT",
+    'c9k': """SW  PID                 Serial#     Status           Sys Pwr  PoE Pwr  Watts
+--  ------------------  ----------  ---------------  -------  -------  -----
+1A  PWR-C1-715WAC       DCB1844G1ZY  OK              Good     Good     715
+1B  Not Present
+2A  PWR-C1-715WAC       DCB1844G1ZZ  No Input Power  Bad      n/a      715""",
+    'nxos': """Power                              Actual        Total
+Supply    Model                    Output     Capacity    Status
+-------  -------------------  -----------  -----------  --------------
+1        N9K-PAC-650W-B             102 W        650 W     Ok
+2        N9K-PAC-650W-B               0 W        650 W     Shutdown""",
+}
+
+
+def _states(readings):
+    return [(reading.sensor, reading_severity(reading)) for reading in readings]
+
+
+def test_fan_and_power_parsers():
+    """Fan and power supply status is parsed from IOS, Catalyst 9k and NX-OS output; empty slots are ok"""
+    assert _states(parse_env_fan(FAN_OUTPUTS['ios'])) == [('Fan', 'ok'), ('Fan 2', 'critical'), ('Fan PS-1', 'ok'),
+                                                          ('Fan PS-2', 'ok')]
+    assert _states(parse_env_fan(FAN_OUTPUTS['c9k'])) == [('Fan 1', 'ok'), ('Fan 2', 'critical')]
+    assert _states(parse_env_fan(FAN_OUTPUTS['nxos'])) == [('Fan1', 'ok'), ('Fan2', 'critical')]
+    assert _states(parse_env_power(POWER_OUTPUTS['ios'])) == [('Power', 'ok'), ('RPS', 'ok')]
+    assert _states(parse_env_power(POWER_OUTPUTS['c9k'])) == [('PS 1A', 'ok'), ('PS 1B', 'ok'), ('PS 2A', 'critical')]
+    assert _states(parse_env_power(POWER_OUTPUTS['nxos'])) == [('PS 1', 'ok'), ('PS 2', 'critical')]
+    for output in SAMPLE_OUTPUTS.values():
+        assert parse_env_fan(output.format(t1=30, t2=40)) == []
+        assert parse_env_power(output.format(t1=30, t2=40)) == []
+
+    env_all = '\n'.join([FAN_OUTPUTS['ios'], SAMPLE_OUTPUTS['ios'].format(t1=41, t2=0), POWER_OUTPUTS['ios']])
+    readings = parse_env_all(env_all)
+    assert [reading.kind for reading in readings].count('temperature') == 2
+    assert len({reading.lineno for reading in readings}) == len(readings)
+    # env_all reads the same sensors as temp/fans/power, so they can't be combined
+    try:
+        load_collectors('temp,env_all')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('env_all combined with temp should be rejected')
+    print("✓ Fan and power supply status parsed for IOS, Catalyst 9k and NX-OS")
+
+
+def test_collectors_share_one_session():
+    """Every selected collector runs over the switch's one SSH session and merges into one record"""
+    fleet = build_fleet(3)
+    addresses = list(fleet)
+    fleet[addresses[1]]['fan'] = 'FAULTY'
+    fleet[addresses[2]]['state'] = 'warning'
+    collectors = load_collectors('temp,fans,power')
+    commands = collector_commands(collectors)
+    assert commands == ['show env temp', 'show env fan', 'show env power']
+
+    with FakeCiscoSSHServer(fleet) as server:
+        results = poll_switches(inventory_for(fleet, server.port), commands, max_workers=3, timeout=10)
+    assert server.sessions == 3
+
+    records = [device_record(result, analyze_poll_result(result, collectors=collectors)) for result in results]
+    assert [record['severity'] for record in records] == ['ok', 'critical', 'warning']
+    assert records[1]['collectors'] == {'temp': 'ok', 'fans': 'critical', 'power': 'ok'}
+    assert {reading.kind for reading in records[0]['readings']} == {'temperature', 'fan', 'power'}
+    print("✓ Temperature, fan and power collectors share one session per switch")
+
+
+if __name__ == "__main__":
+    test_fan_and_power_parsers()
+    test_collectors_share_one_session()
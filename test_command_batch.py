@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import logging
+
+from command_batch import prompt_pattern, split_output
+from fake_cisco_ssh import FakeCiscoSSHServer, build_fleet, inventory_for
+from poller import poll_switches
+
+COMMANDS = ['show env temp', 'show env fan', 'show env power']
+
+
+def test_split_output_on_prompts():
+    """Pipelined output is split per command whether echoes come before each output or all at once"""
+    pattern = prompt_pattern('SW1')
+    ios = ("show env temp\r\nSYSTEM TEMPERATURE is OK\r\nSW1#show env fan\r\nFAN is OK\r\n"
+           "SW1#show env power\r\nPOWER is OK\r\nRPS is NOT PRESENT\r\nSW1#")
+    echoed_first = ("show env temp\r\nshow env fan\r\nshow env power\r\nSYSTEM TEMPERATURE is OK\r\nSW1#"
+                    "FAN is OK\r\nSW1#POWER is OK\r\nRPS is NOT PRESENT\r\nSW1(config)#")
+    expected = ['SYSTEM TEMPERATURE is OK', 'FAN is OK', 'POWER is OK\nRPS is NOT PRESENT']
+    assert split_output(ios, COMMANDS, pattern) == expected
+    assert split_output(echoed_first, COMMANDS, pattern) == expected
+    print("✓ Pipelined output split back per command")
+
+
+def test_batched_poll_matches_sequential():
+    """Batched polling over SSH returns the same per-command outputs as one send_command per command"""
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+    fleet = build_fleet(3)
+    with FakeCiscoSSHServer(fleet, round_trip=0.05) as server:
+        inventory = inventory_for(fleet, server.port)
+        sequential = poll_switches(inventory, COMMANDS, max_workers=3, timeout=10)
+        batched = poll_switches(inventory, COMMANDS, max_workers=3, timeout=10, batch=True)
+
+    for one, other in zip(sequential, batched):
+        assert other['error'] is None
+        assert [command for command, _ in other['outputs']] == COMMANDS
+        # Temperatures are random per reply; fan and power output is fixed
+        assert other['outputs'][1:] == one['outputs'][1:]
+        assert other['outputs'][0][1].startswith('SYSTEM TEMPERATURE is OK')
+    assert sum(s for r in batched for _, s in r['command_times']) < sum(s for r in sequential for _, s in r['command_times'])
+    print("✓ Batched polling matches sequential output in fewer round trips")
+
+
+if __name__ == "__main__":
+    test_split_output_on_prompts()
+    test_batched_poll_matches_sequential()
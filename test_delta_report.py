@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+from alert_analysis import analyze_poll_result
+from benchmark_parser import SAMPLE_OUTPUTS
+from delta_report import DeltaState, DeltaTracker, diff, summarize_changes
+
+
+def _sweep(temps, unreachable=()):
+    """Tracker for a fleet of IOS switches at the given inlet temperatures (yellow 66, red 76)"""
+    tracker = DeltaTracker()
+    for number, temp in enumerate(temps, start=1):
+        host = f'10.0.0.{number}'
+        result = {'host': host, 'hostname': f'SW-{number}', 'error': None,
+                  'outputs': [('show env temp', SAMPLE_OUTPUTS['ios'].format(t1=temp, t2=0))]}
+        if host in unreachable:
+            result.update(hostname=None, outputs=[], error='TCP connection to device failed')
+        tracker.observe(result, analyze_poll_result(result))
+    return tracker.hosts
+
+
+def test_only_material_changes_are_reported():
+    """Drift inside a band is ignored; entering/leaving warning or critical and going unreachable are reported"""
+    baseline = _sweep([40, 70, 80, 40])
+
+    assert diff(baseline, _sweep([43, 71, 79, 41])) == []
+
+    changes = diff(baseline, _sweep([67, 60, 80, 40], unreachable=('10.0.0.4',)))
+    assert [(c['hostname'], c['before'], c['after']) for c in changes] == [
+        ('SW-1', 'ok', 'warning'), ('SW-4', 'ok', 'unreachable'), ('SW-2', 'warning', 'ok')]
+    assert changes[0]['details'] and changes[2]['details'] == []
+    assert summarize_changes(changes) == '1 warning, 1 unreachable, 1 recovered'
+
+    # A critical switch leaving the inventory is a change; a healthy new one is not
+    changes = diff(baseline, {**_sweep([40, 70]), **{'10.0.0.9': baseline['10.0.0.1']}})
+    assert [(c['host'], c['before'], c['after']) for c in changes] == [('10.0.0.3', 'critical', 'removed')]
+    print("✓ Delta diff reports only switches that entered or left an alert state")
+
+
+def test_state_round_trip_and_full_report_schedule():
+    """The reported baseline survives a restart; full reports are due on first run and every `every` seconds"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'delta.json')
+        state = DeltaState(path)
+        assert state.full_report_due(1000)
+
+        state.record(_sweep([40, 70]), 1000, full=True)
+        reloaded = DeltaState(path)
+        assert diff(reloaded.hosts, _sweep([40, 70])) == []
+        assert 'details' not in reloaded.hosts['10.0.0.2']
+        assert not reloaded.full_report_due(1000 + 3600, every=86400)
+        assert reloaded.full_report_due(1000 + 86400, every=86400)
+        assert not reloaded.full_report_due(1000 + 10 ** 7, every=0)
+    print("✓ Delta state persists and schedules periodic full reports")
+
+
+if __name__ == "__main__":
+    test_only_material_changes_are_reported()
+    test_state_round_trip_and_full_report_schedule()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+import datetime
+import email
+import email.header
+import os
+import tempfile
+from unittest import mock
+
+from benchmark_parser import SAMPLE_OUTPUTS
+from digest import DigestQueue
+from fake_smtp_server import FakeSMTPServer
+from smtp_delivery import SMTPDelivery
+from temp_parser import parse_env_temp
+
+START = datetime.datetime(2026, 10, 16, 8, 0).timestamp()
+
+
+def _queue_day(queue):
+    # Four 15-minute sweeps: the inlets go 30C -> 50C (warning) -> 58C (critical) -> 30C
+    for sweep, inlet in enumerate((30, 50, 58, 30)):
+        ts = START + sweep * 900
+        queue.begin_sweep(ts)
+        queue.add_readings('core-sw-3', parse_env_temp(SAMPLE_OUTPUTS['iosxe_stack'].format(t1=inlet, t2=50)))
+        if sweep == 1:
+            queue.add_transitions([{'host': 'core-sw-3', 'sensor': '1/Inlet', 'before': 'ok', 'after': 'warning',
+                                    'celsius': 50.0}])
+        if sweep == 2:
+            queue.add_transitions([{'host': 'core-sw-3', 'sensor': '1/Inlet', 'before': 'warning',
+                                    'after': 'critical', 'celsius': 58.0}])
+        if sweep == 3:
+            queue.add_transitions([{'host': 'core-sw-3', 'sensor': '1/Inlet', 'before': 'critical',
+                                    'after': 'recovered', 'celsius': 30.0}])
+        queue.end_sweep(2, unreachable=0, immediate=sweep == 2)
+
+
+def test_digest_aggregates_queued_sweeps():
+    """Queued sweeps become min/max/mean, time above threshold and episodes, due on the schedule"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with DigestQueue(os.path.join(tmp, 'digest.db'), '0 7 * * *') as queue:
+            assert not queue.due(START)
+            _queue_day(queue)
+            assert not queue.due(START + 3600)
+            next_morning = datetime.datetime(2026, 10, 17, 7, 0).timestamp()
+            assert queue.due(next_morning)
+
+            digest = queue.build(next_morning, ongoing=[('access-sw-1', '1/CPU', 'warning', 71.0)])
+            assert (digest['start'], digest['sweeps'], digest['immediate'], digest['switches']) == (START, 4, 1, 2)
+            inlet = next(sensor for sensor in digest['sensors'] if sensor['sensor'] == '1/Inlet')
+            assert (inlet['min_celsius'], inlet['max_celsius'], inlet['mean_celsius'], inlet['samples']) == (30, 58, 42, 4)
+            # Above warning from the 50C sweep to the 30C one, critical for the 15 minutes after 58C
+            assert (inlet['above_samples'], inlet['above_seconds'], inlet['critical_seconds']) == (2, 1800, 900)
+            hotspot = next(sensor for sensor in digest['sensors'] if sensor['sensor'] == '1/Hotspot')
+            assert hotspot['above_samples'] == 0 and hotspot['above_seconds'] == 0
+
+            first, second = digest['episodes']
+            assert (first['host'], first['peak'], first['start'], first['end']) == ('core-sw-3', 'critical',
+                                                                                     START + 900, START + 2700)
+            assert (second['host'], second['peak'], second['start'], second['end']) == ('access-sw-1', 'warning',
+                                                                                      None, None)
+
+            queue.clear(next_morning)
+            assert queue.period_start() == next_morning and not queue.due(next_morning + 3600)
+            assert queue.build(next_morning)['sensors'] == []
+
+            # Without alert states only switches that became critical since the last sweep bypass the digest
+            assert queue.new_critical(['core-sw-3']) == ['core-sw-3']
+            assert queue.new_critical(['core-sw-3']) == []
+            assert queue.new_critical(['core-sw-3', 'access-sw-1']) == ['access-sw-1']
+            assert queue.new_critical([]) == [] and queue.new_critical(['core-sw-3']) == ['core-sw-3']
+    print("✓ Digest queue aggregates sweeps and is due on its schedule")
+
+
+def test_send_digest_email():
+    """The digest goes out as one HTML email with a per-sensor CSV and empties the queue"""
+    from checktemp_enhanced import main, send_digest
+
+    cwd = os.getcwd()
+    with FakeSMTPServer() as server, tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with DigestQueue(os.path.join(tmp, 'digest.db')) as queue:
+                _queue_day(queue)
+                with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=tmp) as delivery:
+                    assert send_digest(queue, START + 86400, delivery)
+                    # Nothing queued since: no empty digest
+                    assert send_digest(queue, START + 2 * 86400, delivery)
+                assert queue.build()['sweeps'] == 0
+            with mock.patch.dict(os.environ, {'DIGEST_SCHEDULE': '0 7 * *'}):
+                try:
+                    main(['--send-digest'])
+                except SystemExit as e:
+                    assert e.code == 2
+                else:
+                    raise AssertionError('a bad DIGEST_SCHEDULE should be a usage error')
+        finally:
+            os.chdir(cwd)
+
+    assert len(server.messages) == 1
+    message = email.message_from_bytes(server.messages[0]['data'])
+    subject = str(email.header.make_header(email.header.decode_header(message['Subject'])))
+    assert subject.startswith('🚨 Cisco switch temperature digest 2026-10-16 08:00 to')
+    parts = [part.get_content_type() for part in message.walk()]
+    assert parts == ['multipart/mixed', 'multipart/alternative', 'text/plain', 'text/html', 'application/gzip']
+    html = next(part for part in message.walk() if part.get_content_type() == 'text/html').get_payload(decode=True).decode()
+    assert 'Critical episodes' in html and 'Time above threshold' in html and '30 / 58 / 42.0C' in html
+    plain = next(part for part in message.walk() if part.get_content_type() == 'text/plain').get_payload(decode=True).decode()
+    assert '1/Inlet above warning for 30m' in plain
+    print("✓ Digest emailed with its CSV")
+
+
+if __name__ == "__main__":
+    test_digest_aggregates_queued_sweeps()
+    test_send_digest_email()
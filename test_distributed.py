@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import logging
+import sys
+
+from distributed import Coordinator, shard_inventory
+from fake_cisco_ssh import FakeCiscoSSHServer, build_fleet, inventory_for
+
+
+def test_shard_inventory():
+    """Consistent hashing moves only a removed node's switches; site sharding keeps a site on one node"""
+    switches = [{'host': f'10.0.{index // 250}.{index % 250}', 'site': f'dc{index % 5}'} for index in range(1000)]
+    nodes = ['node-a', 'node-b', 'node-c', 'node-d']
+    shards = shard_inventory(switches, nodes)
+    assert sorted(index for indexes in shards.values() for index in indexes) == list(range(1000))
+    assert all(150 < len(indexes) < 350 for indexes in shards.values())
+
+    smaller = shard_inventory(switches, nodes[:3])
+    owner = {index: node for node, indexes in shards.items() for index in indexes}
+    moved = [index for node, indexes in smaller.items() for index in indexes if owner[index] != node]
+    assert sorted(moved) == shards['node-d']
+
+    by_site = shard_inventory(switches, nodes + ['dc3'], by='site')
+    assert by_site['dc3'] == [index for index in range(1000) if index % 5 == 3]
+    for indexes in by_site.values():
+        assert len({switches[index]['site'] for index in indexes}) <= 4
+        assert indexes == sorted(indexes)
+    print("✓ Inventory sharded by consistent hash and by site")
+
+
+def test_coordinator_merges_local_workers():
+    """Local worker processes poll their shards over SSH and results come back in inventory order"""
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+    fleet = build_fleet(6)
+    with FakeCiscoSSHServer(fleet) as server:
+        inventory = inventory_for(fleet, server.port)
+        for number, switch in enumerate(inventory):
+            switch['site'] = 'north' if number % 2 else 'south'
+        coordinator = Coordinator(['local-1', 'local-2'], shard_by='site')
+        streamed = []
+        results = coordinator.poll(inventory, ['show env temp'], on_result=streamed.append, max_workers=3, timeout=10)
+
+    assert [result['host'] for result in results] == [switch['host'] for switch in inventory]
+    assert streamed == results
+    assert all(result['error'] is None for result in results)
+    assert [result['hostname'] for result in results] == [profile['hostname'] for profile in fleet.values()]
+    assert results[0]['outputs'][0][1].startswith('SYSTEM TEMPERATURE is OK')
+    assert sorted(stats['switches'] for stats in coordinator.node_stats.values()) == [3, 3]
+
+    failing = Coordinator(['bad-node'], node_command=f'{sys.executable} -c "raise SystemExit(3)"')
+    results = failing.poll(inventory, ['show env temp'])
+    assert all('Collector node bad-node stopped' in result['error'] for result in results)
+    print("✓ Coordinator merged streamed results from local collector processes")
+
+
+if __name__ == "__main__":
+    test_shard_inventory()
+    test_coordinator_merges_local_workers()
@@ -4,7 +4,6 @@ Test version of the enhanced temperature monitoring script
 This version simulates switch connections for testing PDF and email functionality
 """
 
-import pandas as pd
 import datetime
 import time
 import os
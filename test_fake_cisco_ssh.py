@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+from alert_analysis import analyze_poll_result
+from fake_cisco_ssh import FakeCiscoSSHServer, build_fleet, inventory_for
+from poller import poll_switches
+
+
+def test_netmiko_polls_simulated_switches():
+    """The real poll path (netmiko cisco_ios over SSH) gets hostnames, temperatures and injected failures"""
+    fleet = build_fleet(4)
+    addresses = list(fleet)
+    fleet[addresses[1]]['state'] = 'warning'
+    fleet[addresses[2]]['state'] = 'critical'
+    fleet[addresses[3]]['failure'] = 'auth'
+
+    with FakeCiscoSSHServer(fleet) as server:
+        results = poll_switches(inventory_for(fleet, server.port), ['show env temp'], max_workers=4,
+                                hostname_source='config', timeout=10)
+
+    assert [r['hostname'] for r in results[:3]] == ['SIM-SW-0001', 'SIM-SW-0002', 'SIM-SW-0003']
+    severities = [analyze_poll_result(r)[0]['severity'] for r in results[:3]]
+    assert severities == ['ok', 'warning', 'critical']
+    assert results[0]['connect_time'] is not None and results[0]['outputs'][0][1].startswith('SYSTEM TEMPERATURE')
+    assert results[3]['error'] and 'auth' in results[3]['error'].lower()
+    assert server.sessions == 4 and server.failures_injected >= 1
+    print("✓ netmiko polls simulated switches over SSH")
+
+
+if __name__ == "__main__":
+    test_netmiko_polls_simulated_switches()
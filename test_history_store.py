@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+from benchmark_parser import SAMPLE_OUTPUTS
+from history_store import TemperatureHistory, HOUR
+from temp_parser import parse_env_temp
+
+
+def test_range_and_downsample():
+    """Readings from several sweeps come back by (host, sensor, time) and aggregate per bucket"""
+    start = 1_760_000_000 - 1_760_000_000 % (24 * HOUR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with TemperatureHistory(os.path.join(tmp, 'history.db'), batch_size=3) as history:
+            # Two hours of 5-minute sweeps, two switches
+            for sweep in range(24):
+                history.begin_sweep(start + sweep * 300)
+                history.add_readings('core-sw-3', parse_env_temp(SAMPLE_OUTPUTS['iosxe_stack'].format(t1=30 + sweep, t2=50)))
+                history.add_readings('access-sw-1', parse_env_temp(SAMPLE_OUTPUTS['nxos'].format(t1=33, t2=40)))
+                assert history.end_sweep() == 6
+
+            assert history.hosts() == ['access-sw-1', 'core-sw-3']
+            assert history.sensors('core-sw-3') == ['1/Hotspot', '1/Inlet', '2/Inlet']
+
+            rows = history.range('core-sw-3', start, start + HOUR, sensor='1/Inlet')
+            assert [(ts - start, celsius) for _, ts, celsius, *_ in rows] == [(i * 300, 30.0 + i) for i in range(12)]
+            # The last sweep read 53C, over the 46C yellow threshold
+            assert history.range('core-sw-3', start + 23 * 300, start + 2 * HOUR, sensor='1/Inlet')[0][-1] == 'warning'
+
+            hourly = history.downsample('core-sw-3', start, start + 2 * HOUR, HOUR, sensor='1/Inlet')
+            assert hourly == [('1/Inlet', start, 30.0, 41.0, 35.5, 12), ('1/Inlet', start + HOUR, 42.0, 53.0, 47.5, 12)]
+
+            # Non-hour buckets aggregate the raw readings
+            half_hours = history.downsample('core-sw-3', start, start + HOUR, 1800, sensor='1/Inlet')
+            assert [(low, high, samples) for _, _, low, high, _, samples in half_hours] == [(30.0, 35.0, 6), (36.0, 41.0, 6)]
+
+            daily = history.downsample('access-sw-1', start, start + 24 * HOUR, 24 * HOUR)
+            assert [(sensor, samples) for sensor, _, _, _, _, samples in daily] == [('1/BACK', 24), ('1/CPU', 24), ('1/FRONT', 24)]
+    print("✓ History store answers range queries and downsampled aggregates")
+
+
+def test_duplicates_and_expiry():
+    """A reading stored twice is counted once in the rollup; old raw readings expire once a day"""
+    start = 1_760_000_000 - 1_760_000_000 % (24 * HOUR)
+    readings = parse_env_temp(SAMPLE_OUTPUTS['iosxe_stack'].format(t1=40, t2=50))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with TemperatureHistory(os.path.join(tmp, 'history.db')) as history:
+            # The same sensors collected twice (temp plus env_all), then a second sweep in the same second
+            for _ in range(2):
+                history.begin_sweep(start)
+                history.add_readings('core-sw-3', readings + readings)
+                history.end_sweep()
+            assert len(history.range('core-sw-3', start, start + 1)) == 3
+            assert history.downsample('core-sw-3', start, start + HOUR, HOUR, sensor='1/Inlet') == [
+                ('1/Inlet', start, 40.0, 40.0, 40.0, 1)]
+
+            assert history.expire(90, now=start + 91 * 24 * HOUR) == 3
+            assert history.range('core-sw-3', start, start + 1) == []
+            assert history.downsample('core-sw-3', start, start + HOUR, HOUR, sensor='1/Inlet')[0][-1] == 1
+            history.begin_sweep(start + 91 * 24 * HOUR)
+            history.add_readings('core-sw-3', readings)
+            history.end_sweep()
+            assert history.expire(0.5, now=start + 91 * 24 * HOUR + 60) == 0
+    print("✓ Duplicate readings are stored and rolled up once; expiry runs daily")
+
+
+if __name__ == "__main__":
+    test_range_and_downsample()
+    test_duplicates_and_expiry()
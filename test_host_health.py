@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+from alert_analysis import analyze_poll_result
+from benchmark_poller import FakeSSHDevice, make_inventory
+from host_health import HostHealth
+from poller import poll_switches
+
+
+def test_adaptive_timeouts():
+    """Timeouts follow each switch's own latency, within bounds, and back off after failures"""
+    health = HostHealth(None, min_timeout=2, max_timeout=30)
+    assert health.timeouts('10.0.0.1', default=20) == (20, 20)  # no history yet
+
+    for _ in range(20):
+        health.record({'host': '10.0.0.1', 'error': None, 'connect_time': 0.5, 'command_times': [('show env temp', 0.1)]})
+        health.record({'host': '10.0.0.2', 'error': None, 'connect_time': 6.0, 'command_times': [('show env temp', 3.0)]})
+    assert health.timeouts('10.0.0.1') == (2, 2)  # fast switch: the floor
+    slow_connect, slow_command = health.timeouts('10.0.0.2')
+    assert 12 <= slow_connect < 14 and 6 <= slow_command < 8
+    assert health.timeouts('10.0.0.2', default=7) == (7, slow_command)  # POLL_TIMEOUT stays the ceiling
+
+    health.record({'host': '10.0.0.2', 'error': 'Timed out', 'connect_time': None, 'command_times': []})
+    assert abs(health.timeouts('10.0.0.2')[0] - slow_connect * 2) < 0.2
+    print("✓ Adaptive timeouts track per-switch latency")
+
+
+def test_circuit_breaker_skips_and_probes():
+    """A switch that failed N sweeps in a row is skipped, probed later with backoff, and closed on success"""
+    now = [1000.0]
+    dead = {'10.0.0.3'}
+    connects = []
+
+    def connect(**params):
+        connects.append(params['host'])
+        if params['host'] in dead:
+            raise ConnectionError("TCP connection to device failed")
+        return FakeSSHDevice(0.0, 0.0, **params)
+
+    inventory = make_inventory(4)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'health.json')
+
+        def sweep():
+            health = HostHealth(path, failure_threshold=3, probe_interval=600, max_probe_interval=1800,
+                                clock=lambda: now[0])
+            connects.clear()
+            results = poll_switches(inventory, ['show env temp'], connect=connect, host_health=health)
+            health.save()
+            now[0] += 60
+            return health, results
+
+        for _ in range(3):
+            sweep()
+        health, results = sweep()  # circuit open: no connection attempt
+        assert '10.0.0.3' not in connects and len(connects) == 3
+        assert results[3]['skipped'] and 'failed 3 times in a row' in results[3]['error']
+        assert analyze_poll_result(results[3])[0]['title'].startswith(' --- Not polled 10.0.0.3: Skipped')
+        assert health.open_circuits() == ['10.0.0.3']
+
+        now[0] += 600
+        health, _ = sweep()  # half-open probe fails: wait twice as long
+        assert '10.0.0.3' in connects
+        assert health.entries()['10.0.0.3']['probe_interval'] == 1200
+
+        dead.clear()
+        now[0] += 1200
+        health, results = sweep()  # probe succeeds: circuit closed
+        assert results[3]['error'] is None and health.open_circuits() == []
+    print("✓ Circuit breaker skips dead switches and probes them with backoff")
+
+
+if __name__ == "__main__":
+    test_adaptive_timeouts()
+    test_circuit_breaker_skips_and_probes()
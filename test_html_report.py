@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import email
+import os
+import tempfile
+
+from alert_analysis import AlertIndex
+from fake_smtp_server import FakeSMTPServer
+from html_report import ATTACHMENT_NOTICE_MARKER, load_template, render_report
+from smtp_delivery import SMTPDelivery
+from test_alert_analysis import _fake_results
+
+
+def _report():
+    alert_index = AlertIndex()
+    for result in _fake_results():
+        alert_index.add_result(result)
+    return alert_index, render_report(alert_index.records, alert_index.summary(), '2026-10-17 06:00:00',
+                                      recovered_details=['SW-EDGE-09: Inlet <sensor> back to normal'])
+
+
+def test_html_tables_from_analyses():
+    """Critical, warning, recovered and unreachable switches get their own colour-coded, escaped tables"""
+    alert_index, html = _report()
+    assert load_template() is load_template()
+    assert 'CRITICAL temperature alerts on SW-DIST-03' in html
+    assert '4 switches: 1 critical, 1 warning, 1 not polled' in html
+    critical = html[html.index('Critical alerts'):html.index('Warning alerts')]
+    assert '#fdecea' in critical and 'SW-DIST-03' in critical and 'SW-ACCESS-02' not in critical
+    assert 'SW-ACCESS-02' in html[html.index('Warning alerts'):]
+    assert 'Inlet &lt;sensor&gt; back to normal' in html
+    assert 'TCP connection to device failed' in html[html.index('Not polled'):]
+    assert html.count(ATTACHMENT_NOTICE_MARKER) == 1
+    print("✓ HTML report tables built from the analysed results")
+
+
+def test_html_email_without_pdf():
+    """The HTML report goes out as an alternative to the plain-text body, with no PDF attached"""
+    from checktemp_enhanced import send_email_with_attachment
+
+    alert_index, html = _report()
+    with FakeSMTPServer() as server, tempfile.TemporaryDirectory() as tmp:
+        text_filename = os.path.join(tmp, 'device_output.txt')
+        with open(text_filename, 'w') as f:
+            f.write('Start Script at Time: now\n')
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=tmp) as delivery:
+            assert send_email_with_attachment(None, text_filename, '2026-10-17 06:00:00', *alert_index.summary(),
+                                              delivery=delivery, recipients=['noc@example.com'], html=html)
+
+    message = email.message_from_bytes(server.messages[0]['data'])
+    parts = [part.get_content_type() for part in message.walk()]
+    assert parts == ['multipart/mixed', 'multipart/alternative', 'text/plain', 'text/html', 'application/gzip']
+    body = next(part for part in message.walk() if part.get_content_type() == 'text/html')
+    assert 'SW-DIST-03' in body.get_payload(decode=True).decode()
+    assert ATTACHMENT_NOTICE_MARKER not in body.get_payload(decode=True).decode()
+    assert server.messages[0]['recipients'] == ['noc@example.com']
+    plain = next(part for part in message.walk() if part.get_content_type() == 'text/plain').get_payload(decode=True).decode()
+    assert 'The raw switch output is attached.' in plain and 'PDF' not in plain
+
+    # A changes email without the opt-in PDF carries no attachment, and says none
+    changes = [{'hostname': 'SW-DIST-03', 'host': '10.0.0.3', 'before': 'warning', 'after': 'critical',
+                'details': ['Inlet 80C']}]
+    with FakeSMTPServer() as server, tempfile.TemporaryDirectory() as tmp:
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=tmp) as delivery:
+            assert send_email_with_attachment(None, None, '2026-10-17 06:15:00', *alert_index.summary(),
+                                              delivery=delivery, changes=changes, since='2026-10-17 06:00:00')
+    message = email.message_from_bytes(server.messages[0]['data'])
+    assert [part.get_content_type() for part in message.walk()] == ['multipart/mixed', 'text/plain']
+    assert 'attached' not in message.get_payload()[0].get_payload(decode=True).decode()
+    print("✓ HTML email sent without a PDF")
+
+
+if __name__ == "__main__":
+    test_html_tables_from_analyses()
+    test_html_email_without_pdf()
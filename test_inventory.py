@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import tempfile
+
+from openpyxl import Workbook
+
+from inventory import InventoryCache, load_inventory
+
+
+def test_backends_agree_and_validate():
+    """xlsx, csv and json inventories load to the same validated switch list"""
+    rows = [
+        ['device_type', 'host', 'username', 'password', 'port', 'secret'],
+        ['cisco_ios', ' 10.0.0.1 ', 'admin', 12345, 22, None],
+        [None, None, None, None, None, None],                      # blank row
+        ['cisco_ios', None, 'admin', 'pw', 22, None],              # no host
+        ['cisco_nxos', '10.0.0.2', 'admin', 'pw', 2222.0, 'en'],
+        ['cisco_ios', '10.0.0.1', 'admin', 'pw', 22, None],        # duplicate
+    ]
+    expected = [
+        {'device_type': 'cisco_ios', 'host': '10.0.0.1', 'username': 'admin', 'password': '12345', 'port': 22},
+        {'device_type': 'cisco_nxos', 'host': '10.0.0.2', 'username': 'admin', 'password': 'pw', 'port': 2222,
+         'secret': 'en'},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        workbook.save(os.path.join(tmp, 'switches.xlsx'))
+
+        with open(os.path.join(tmp, 'switches.csv'), 'w') as f:
+            for row in rows:
+                f.write(','.join('' if value is None else str(value) for value in row) + '\n')
+
+        with open(os.path.join(tmp, 'switches.json'), 'w') as f:
+            json.dump({'switches': [dict(zip(rows[0], row)) for row in rows[1:]]}, f)
+
+        for name in ('switches.xlsx', 'switches.csv', 'switches.json'):
+            assert load_inventory(os.path.join(tmp, name)) == expected, name
+    print("✓ xlsx, csv and json inventories validate to the same switches")
+
+
+def test_cache_keyed_on_mtime_and_hash():
+    """Unchanged files come from the cache, even when only touched; edits are re-parsed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'switches.csv')
+        cache_path = os.path.join(tmp, 'private', 'cache.json')
+        with open(path, 'w') as f:
+            f.write('device_type,host\ncisco_ios,10.0.0.1\n')
+
+        assert len(load_inventory(path, cache=InventoryCache(cache_path))) == 1
+        assert oct(os.stat(cache_path).st_mode & 0o777) == '0o600'
+        assert oct(os.stat(os.path.dirname(cache_path)).st_mode & 0o777) == '0o700'
+
+        # Poison the cached entry so a cache hit is observable
+        with open(cache_path) as f:
+            data = json.load(f)
+        entry = next(iter(data['entries'].values()))
+        entry['switches'] = [{'device_type': 'cisco_ios', 'host': 'from-cache'}]
+        with open(cache_path, 'w') as f:
+            json.dump(data, f)
+
+        assert load_inventory(path, cache=InventoryCache(cache_path))[0]['host'] == 'from-cache'
+        os.utime(path, ns=(1, 1))
+        assert load_inventory(path, cache=InventoryCache(cache_path))[0]['host'] == 'from-cache'
+
+        with open(path, 'a') as f:
+            f.write('cisco_ios,10.0.0.2\n')
+        assert [s['host'] for s in load_inventory(path, cache=InventoryCache(cache_path))] == ['10.0.0.1', '10.0.0.2']
+
+        # Once the file is gone its entry (and credentials) is dropped at the next write
+        rotated = os.path.join(tmp, 'switches-new.csv')
+        os.replace(path, rotated)
+        load_inventory(rotated, cache=InventoryCache(cache_path))
+        with open(cache_path) as f:
+            assert list(json.load(f)['entries']) == [os.path.abspath(rotated)]
+    print("✓ Inventory cache survives a touch, is invalidated by an edit and forgets removed files")
+
+
+if __name__ == "__main__":
+    test_backends_agree_and_validate()
+    test_cache_keyed_on_mtime_and_hash()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import urllib.request
+
+from metrics import SweepMetrics, start_metrics_server
+from temp_parser import TempReading
+
+
+def _result(host, error=None, connect_time=0.8):
+    return {'host': host, 'hostname': None if error else f'SW-{host}', 'outputs': [], 'error': error,
+            'elapsed': 1.2, 'connect_time': connect_time,
+            'command_times': [] if error else [('show env temp', 0.3)]}
+
+
+def test_snapshot_exposition():
+    """Sensor gauges come from the last sweep only; histograms and failure counters accumulate"""
+    metrics = SweepMetrics()
+    for sweep in range(2):
+        metrics.begin_sweep()
+        metrics.observe_result(_result('10.0.0.1'))
+        metrics.observe_readings('SW-10.0.0.1', [TempReading('Inlet', None, None, None, 'OK', None, '', 0),
+                                                 TempReading('Inlet', 41.5 + sweep, 66, 76, 'GREEN', None, '', 0)])
+        metrics.observe_result(_result('10.0.0.2', error='timed out', connect_time=None))
+        metrics.observe_hostname_cache({'hits': sweep, 'misses': 2 - sweep, 'size': 2})
+        metrics.end_sweep(3.0, ts=1000.0)
+
+    text = metrics.snapshot().decode()
+    assert 'cisco_switch_temperature_celsius{hostname="SW-10.0.0.1",sensor="Inlet"} 42.5\n' in text
+    assert 'cisco_switch_temperature_celsius{hostname="SW-10.0.0.1",sensor="Inlet"} 41.5' not in text
+    assert text.count('cisco_switch_temperature_severity{') == 1
+    assert 'cisco_switch_temperature_red_threshold_celsius{hostname="SW-10.0.0.1",sensor="Inlet"} 76\n' in text
+    assert 'cisco_switch_up{host="10.0.0.2",hostname="10.0.0.2"} 0\n' in text
+    assert 'cisco_switch_poll_failures_total{host="10.0.0.2"} 2\n' in text
+    assert 'cisco_switch_connect_seconds_bucket{le="0.5"} 0\n' in text
+    assert 'cisco_switch_connect_seconds_bucket{le="1"} 2\n' in text
+    assert 'cisco_switch_connect_seconds_bucket{le="+Inf"} 2\n' in text
+    assert 'cisco_switch_command_seconds_count{command="show env temp"} 2\n' in text
+    assert 'cisco_switch_sweep_duration_seconds_sum 6.0\n' in text
+    assert 'cisco_switch_sweeps_total 2\n' in text
+    assert 'cisco_switch_hostname_cache_hits_total 1\n' in text
+    assert 'cisco_switch_hostname_cache_misses_total 3\n' in text
+    assert 'cisco_switch_hostname_cache_entries 2\n' in text
+    print("✓ Metrics snapshot renders Prometheus text exposition")
+
+
+def test_scrape_serves_last_published_snapshot():
+    """A scrape mid-sweep returns the previous sweep's snapshot"""
+    metrics = SweepMetrics()
+    metrics.begin_sweep()
+    metrics.observe_readings('core "1"', [TempReading('Inlet', 40, 66, 76, 'GREEN', None, '', 0)])
+    metrics.end_sweep(1.0)
+    metrics.begin_sweep()
+    metrics.observe_readings('core "1"', [TempReading('Inlet', 90, 66, 76, 'GREEN', None, '', 0)])
+
+    server = start_metrics_server(metrics, 0, '127.0.0.1')
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+        with urllib.request.urlopen(url) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+    assert 'cisco_switch_temperature_celsius{hostname="core \\"1\\"",sensor="Inlet"} 40\n' in body
+    assert 'cisco_switch_sweeps_total 1\n' in body
+    print("✓ /metrics serves the last completed sweep")
+
+
+if __name__ == "__main__":
+    test_snapshot_exposition()
+    test_scrape_serves_last_published_snapshot()
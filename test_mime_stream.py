@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import email
+import gzip
+import os
+import tempfile
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from mime_stream import encoded_size, gzip_file, plan_attachments, write_message
+
+
+def test_streamed_message_round_trips():
+    """A gzipped raw report streamed into the message file decodes back to the original"""
+    with tempfile.TemporaryDirectory() as tmp:
+        text_filename = os.path.join(tmp, 'device_output.txt')
+        with open(text_filename, 'wb') as f:
+            for number in range(20000):
+                f.write(f"SW-{number:05d} System Temperature Value: {30 + number % 40} Degree Celsius\n".encode())
+        compressed = gzip_file(text_filename)
+        assert os.path.getsize(compressed) < os.path.getsize(text_filename) / 5
+
+        msg = MIMEMultipart()
+        msg['Subject'] = '🚨 CRITICAL ALERT: test'
+        msg.attach(MIMEText('Body 🚨', 'plain'))
+        message_filename = os.path.join(tmp, 'message.eml')
+        with open(message_filename, 'wb') as out:
+            written = write_message(msg, [(compressed, 'device_output.txt.gz', 'application/gzip')], out)
+        assert written == os.path.getsize(message_filename)
+        assert written < encoded_size(os.path.getsize(compressed)) + 2000
+
+        with open(message_filename, 'rb') as f:
+            raw = f.read()
+        assert all(len(line) <= 998 for line in raw.split(b'\r\n'))
+        parsed = email.message_from_bytes(raw)
+        body, attachment = parsed.get_payload()
+        assert body.get_payload(decode=True).decode() == 'Body 🚨'
+        assert attachment.get_filename() == 'device_output.txt.gz'
+        with open(text_filename, 'rb') as f:
+            assert gzip.decompress(attachment.get_payload(decode=True)) == f.read()
+    print("✓ Gzipped attachment streams into the message and decodes back to the original")
+
+
+def test_attachments_over_limit_are_omitted():
+    """Attachments that don't fit the size budget are left out, smaller later ones still fit"""
+    with tempfile.TemporaryDirectory() as tmp:
+        attachments = []
+        for name, size in (('report.pdf', 3000), ('raw.txt.gz', 9000), ('small.txt.gz', 500)):
+            path = os.path.join(tmp, name)
+            with open(path, 'wb') as f:
+                f.write(os.urandom(size))
+            attachments.append((path, name, 'application/octet-stream'))
+        attached, omitted = plan_attachments(attachments, max_bytes=6000)
+        assert [name for _, name, _ in attached] == ['report.pdf', 'small.txt.gz']
+        assert [name for _, name, _ in omitted] == ['raw.txt.gz']
+        assert plan_attachments(attachments, max_bytes=0) == (attachments, [])
+    print("✓ Attachments over the size limit are omitted")
+
+
+if __name__ == "__main__":
+    test_streamed_message_round_trips()
+    test_attachments_over_limit_are_omitted()
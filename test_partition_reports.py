@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import email
+import os
+import tempfile
+from unittest import mock
+
+from alert_analysis import AlertIndex, analyze_poll_result
+from fake_cisco_ssh import FakeCiscoSSHServer, build_fleet, inventory_for
+from fake_smtp_server import FakeSMTPServer
+from partition_reports import PartitionReports, filter_summary, recipients_env
+from report_sink import ReportSink
+from test_alert_analysis import _fake_results
+
+SWITCHES = [{'host': '10.0.0.1', 'site': 'dc-east'}, {'host': '10.0.0.2', 'site': 'dc-west'},
+            {'host': '10.0.0.3', 'site': 'dc-east'}, {'host': '10.0.0.4'}]
+
+
+def test_sections_split_by_site():
+    """Report sections and alert summaries are cut down to each site's switches"""
+    reports = PartitionReports(SWITCHES, 'site')
+    alert_index = AlertIndex()
+    entries = []
+    for result in _fake_results():
+        reports.observe(result)
+        for analysis in analyze_poll_result(result):
+            alert_index.add(analysis)
+            entries.append({'hostname': analysis['hostname']})
+
+    split = reports.split(entries)
+    assert {partition: [entry['hostname'] for entry in part] for partition, part in split.items()} == {
+        'dc-east': ['SW-CORE-01', 'SW-DIST-03', 'SW-DIST-03'], 'dc-west': ['SW-ACCESS-02'], 'unassigned': ['10.0.0.4']}
+    warning_hosts, critical_hosts, warning_details, critical_details = filter_summary(alert_index.summary(),
+                                                                                     {'SW-CORE-01', 'SW-DIST-03'})
+    assert (warning_hosts, critical_hosts) == ([], ['SW-DIST-03'])
+    assert warning_details and all(detail.startswith('SW-DIST-03:') for detail in warning_details + critical_details)
+    assert recipients_env('dc-east') == 'RECIPIENT_EMAIL_DC_EAST'
+    print("✓ Sweep split into per-site sections and alert summaries")
+
+
+def test_partition_pdfs_render_in_process_pool():
+    """Only partitions with recipients get a PDF, rendered in pool processes from the on-disk report"""
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {'RECIPIENT_EMAIL_DC_EAST': 'east@example.com',
+                                                                           'RECIPIENT_EMAIL_DC_WEST': 'west@example.com'}):
+        previous_cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            reports = PartitionReports(SWITCHES, 'site', processes=2)
+            alert_index = AlertIndex()
+            sink = ReportSink('device_output.txt', 'Start Script at Time: now\n')
+            for result in _fake_results():
+                reports.observe(result)
+                for analysis in analyze_poll_result(result):
+                    alert_index.add(analysis, keep_record=False)
+                    sink.write(analysis)
+            sink.close()
+
+            members = reports.start(sink.header, sink.text_filename, sink.index, alert_index.summary(), 'test')
+            results = reports.finish()
+            assert members == {'dc-east': {'SW-CORE-01', 'SW-DIST-03'}, 'dc-west': {'SW-ACCESS-02'}}
+            assert sorted(results) == [('dc-east', 'device_temperature_report_dc-east_test.pdf', True),
+                                       ('dc-west', 'device_temperature_report_dc-west_test.pdf', True)]
+            assert all(os.path.getsize(pdf_filename) > 0 for _, pdf_filename, _ in results)
+        finally:
+            os.chdir(previous_cwd)
+    print("✓ Per-site PDFs rendered in a process pool")
+
+
+def test_changes_mode_sends_changed_sites_report():
+    """With REPORT_PDF and DELTA_MODE=changes, changed sites get their report; a bad column only disables them"""
+    from checktemp_enhanced import main, run_sweep
+
+    fleet = build_fleet(4)
+    first_address = next(iter(fleet))
+    with FakeCiscoSSHServer(fleet) as ssh_server, FakeSMTPServer() as smtp_server, \
+            tempfile.TemporaryDirectory() as tmp:
+        inventory = inventory_for(fleet, ssh_server.port)
+        for index, switch in enumerate(inventory):
+            switch['site'] = 'dc-east' if index % 2 == 0 else 'dc-west'
+        environment = {'SMTP_SERVER': '127.0.0.1', 'SMTP_PORT': str(smtp_server.port), 'SMTP_USE_TLS': 'false',
+                       'SENDER_PASSWORD': '', 'SMTP_RETRY_BACKOFF': '0', 'MAIL_SPOOL_DIR': os.path.join(tmp, 'spool'),
+                       'RECIPIENT_EMAIL': 'noc@example.com', 'RECIPIENT_EMAIL_DC_EAST': 'east@example.com',
+                       'RECIPIENT_EMAIL_DC_WEST': 'west@example.com', 'REPORT_PROCESSES': '1',
+                       'DELTA_MODE': 'changes', 'DELTA_STATE_FILE': os.path.join(tmp, 'delta.json'),
+                       'HOSTNAME_CACHE_FILE': os.path.join(tmp, 'hostnames.json'), 'ALERT_STATE_DB': '',
+                       'HISTORY_DB': '', 'HOST_HEALTH_FILE': '', 'DIGEST_MODE': 'false'}
+        previous_cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            with mock.patch.dict(os.environ, environment):
+                run_sweep(inventory, ts=1790000000, partition_by='site', report_pdf=True)
+                assert len(smtp_server.messages) == 3
+                fleet[first_address]['state'] = 'critical'
+                run_sweep(inventory, ts=1790000900, partition_by='site', report_pdf=True)
+                # A bad partition column only disables the site reports, never the main report
+                fleet[first_address]['state'] = 'ok'
+                run_sweep(inventory, ts=1790001800, partition_by='Site', report_pdf=True)
+                assert len(smtp_server.messages) == 6
+        finally:
+            os.chdir(previous_cwd)
+
+    changes, site, recovered = [email.message_from_bytes(message['data']) for message in smtp_server.messages[3:]]
+    assert 'changes' in changes['Subject'].lower()
+    assert site['To'] == 'east@example.com'
+    attachments = [part.get_filename() for part in site.walk() if part.get_filename()]
+    assert any(name.endswith('.pdf') for name in attachments)
+    assert recovered['To'] == 'noc@example.com'
+
+    with mock.patch.dict(os.environ, {'REPORT_PARTITION_BY': 'Site'}):
+        try:
+            main([])
+        except SystemExit as e:
+            assert e.code == 2
+        else:
+            raise AssertionError('REPORT_PARTITION_BY=Site should be rejected')
+    print("✓ Changed sites still get their report in changes mode")
+
+
+if __name__ == "__main__":
+    test_sections_split_by_site()
+    test_partition_pdfs_render_in_process_pool()
+    test_changes_mode_sends_changed_sites_report()
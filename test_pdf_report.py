@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+from benchmark_pdf import build_fleet
+from pdf_report import create_pdf_report, DeviceBlock, PDF_RENDER_MODES
+
+
+def test_render_modes():
+    """Every render mode (and the summary without raw output) produces a PDF"""
+    alert_index = build_fleet(60)
+    warning_hosts, critical_hosts, warning_details, critical_details = alert_index.summary()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, raw_output in [(mode, 'appendix') for mode in PDF_RENDER_MODES] + [('summary', 'skip')]:
+            pdf_filename = os.path.join(tmp, f'{mode}_{raw_output}.pdf')
+            assert create_pdf_report('Start Script at Time: now\n', pdf_filename, warning_hosts, critical_hosts,
+                                     warning_details, critical_details, device_analyses=alert_index.records,
+                                     render_mode=mode, raw_output=raw_output)
+            assert os.path.getsize(pdf_filename) > 0
+        assert not create_pdf_report('', os.path.join(tmp, 'bad.pdf'), render_mode='bogus')
+    print("✓ detailed, fast and summary PDFs render")
+
+
+def test_device_block_splits_across_pages():
+    """A device block taller than the remaining frame splits at a line boundary"""
+    record = build_fleet(1).records[0]
+    block = DeviceBlock.from_analysis(record, type('Style', (), {'leading': 10, 'fontSize': 8, 'fontName': 'Courier', 'spaceAfter': 12})())
+    first, rest = block.split(500, 25)
+    assert len(first.lines) == 2 and first.lines + rest.lines == block.lines
+    assert block.split(500, 10_000) == []
+    print("✓ Device blocks split across pages")
+
+
+if __name__ == "__main__":
+    test_render_modes()
+    test_device_block_splits_across_pages()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+from benchmark_poller import FakeSSHDevice, make_inventory
+from hostname_cache import HostnameCache
+from poller import poll_switches
+
+
+def _connect(**params):
+    if params['host'].endswith('.13'):
+        raise ConnectionError("TCP connection to device failed")
+    # Later switches answer faster so completion order differs from inventory order
+    return FakeSSHDevice(connect_latency=0.02 / (1 + int(params['host'].split('.')[-1])),
+                         command_latency=0.0, **params)
+
+
+def test_results_keep_inventory_order():
+    """Results come back in spreadsheet order for both backends, with failures recorded inline"""
+    inventory = make_inventory(20)
+
+    for backend in ('thread', 'asyncio'):
+        results = poll_switches(inventory, ['show env temp'], max_workers=8, backend=backend, connect=_connect)
+
+        assert [r['host'] for r in results] == [s['host'] for s in inventory]
+        assert results[13]['error'] == "TCP connection to device failed"
+        assert results[0]['hostname'] == 'SW-10-0-0-0'
+        assert results[0]['outputs'][0][0] == 'show env temp'
+        print(f"✓ {backend} backend returned {len(results)} results in inventory order")
+
+
+def test_hostname_cache_one_command_per_switch():
+    """Cold sweep looks hostnames up once per switch; warm sweep sends only the temperature command"""
+    inventory = make_inventory(5)
+    devices = []
+
+    def connect(**params):
+        device = FakeSSHDevice(connect_latency=0.0, command_latency=0.0, **params)
+        devices.append(device)
+        return device
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = os.path.join(tmp, 'hostnames.json')
+
+        cache = HostnameCache(cache_file)
+        poll_switches(inventory, ['show env temp'], connect=connect, hostname_cache=cache, hostname_source='config')
+        cache.save()
+        assert all(d.commands_sent == ['sh run | i host', 'show env temp'] for d in devices)
+        assert cache.stats()['misses'] == 5
+
+        devices.clear()
+        cache = HostnameCache(cache_file)
+        results = poll_switches(inventory, ['show env temp'], connect=connect, hostname_cache=cache, hostname_source='config')
+        assert all(d.commands_sent == ['show env temp'] for d in devices)
+        assert results[2]['hostname'] == 'SW-10-0-0-2'
+        assert cache.stats()['hits'] == 5
+
+        cache.invalidate('10.0.0.2')
+        assert cache.get('10.0.0.2') is None
+        expired = HostnameCache(cache_file, ttl=0)
+        assert expired.get('10.0.0.1') is None
+        print("✓ Hostname cache removes the per-sweep 'sh run | i host' round trip")
+
+
+def test_asyncio_timeout_with_slow_and_fast_switches():
+    """A timed-out switch keeps its worker until it returns, so fast switches queued behind it don't time out"""
+    inventory = make_inventory(4)
+
+    def connect(**params):
+        slow = params['host'] in ('10.0.0.0', '10.0.0.1')
+        return FakeSSHDevice(connect_latency=1.5 if slow else 0.2, command_latency=0.0, **params)
+
+    results = poll_switches(inventory, ['show env temp'], max_workers=2, backend='asyncio', timeout=0.3,
+                            connect=connect)
+    assert [r['error'] for r in results[:2]] == ["Timed out after 1s"] * 2
+    assert [r['error'] for r in results[2:]] == [None, None]
+    assert results[3]['outputs'][0][0] == 'show env temp'
+    print("✓ asyncio timeouts only hit the slow switches")
+
+
+if __name__ == "__main__":
+    test_results_keep_inventory_order()
+    test_hostname_cache_one_command_per_switch()
+    test_asyncio_timeout_with_slow_and_fast_switches()
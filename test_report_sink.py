@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+from alert_analysis import analyze_poll_result
+from report_sink import ReportSink
+from test_alert_analysis import _fake_results
+
+
+def test_sections_written_incrementally():
+    """Sections hit the disk as they are written, in the same format as the old report string"""
+    results = _fake_results()
+    header = 'Start Script at Time: now\n'
+    expected = header
+    for result in results:
+        for command, output in result['outputs']:
+            expected += f'\n --- Output of {command} on {result["hostname"]} \n{output}\n\n'
+        if result['error']:
+            expected += f'\n --- Error connecting to {result["host"]}: {result["error"]}\n\n'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_filename = os.path.join(tmp, 'device_output.txt')
+        sink = ReportSink(text_filename, header)
+        analyses = [analysis for result in results for analysis in analyze_poll_result(result)]
+
+        sink.write(analyses[0])
+        # Simulate a crash: without close() the first section is already readable
+        with open(text_filename) as f:
+            assert f.read().startswith(header + '\n --- Output of show env temp on SW-CORE-01 \nSYSTEM TEMPERATURE is OK')
+
+        for analysis in analyses[1:]:
+            sink.write(analysis)
+        sink.close()
+
+        with open(text_filename) as f:
+            assert f.read() == expected
+        assert all('output' not in entry for entry in sink.index)
+
+        reread = list(sink.iter_analyses())
+        assert [a['output'] for a in reread] == [a['output'] for a in analyses]
+        assert reread[2]['line_severities'] == analyses[2]['line_severities']
+    print("✓ Report sink streams sections to disk and reads them back by index")
+
+
+if __name__ == "__main__":
+    test_sections_written_incrementally()
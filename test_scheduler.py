@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import datetime
+import os
+import tempfile
+import threading
+
+from scheduler import CronSchedule, IntervalSchedule, InventoryWatcher, run_daemon
+
+
+def test_cron_next_run():
+    """Cron expressions resolve to the next matching minute"""
+    start = datetime.datetime(2025, 7, 30, 20, 27, 45)  # a Wednesday
+    assert CronSchedule('*/15 * * * *').next_after(start) == datetime.datetime(2025, 7, 30, 20, 30)
+    assert CronSchedule('0 6,18 * * *').next_after(start) == datetime.datetime(2025, 7, 31, 6, 0)
+    assert CronSchedule('30 8 * * mon-fri').next_after(datetime.datetime(2025, 8, 1, 9, 0)) == \
+        datetime.datetime(2025, 8, 4, 8, 30)
+    assert CronSchedule('0 0 1 jan *').next_after(start) == datetime.datetime(2026, 1, 1, 0, 0)
+    assert CronSchedule('@hourly').next_after(start) == datetime.datetime(2025, 7, 30, 21, 0)
+    # Both day fields restricted: either matches; '*/1' is as unrestricted as '*'
+    assert CronSchedule('0 7 1 * 1').next_after(start) == datetime.datetime(2025, 8, 1, 7, 0)
+    assert CronSchedule('0 7 */1 * 1').next_after(datetime.datetime(2026, 10, 17, 8, 0)) == \
+        datetime.datetime(2026, 10, 19, 7, 0)
+    for bad in ('* * *', '61 * * * *', '*/0 * * * *'):
+        try:
+            CronSchedule(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"'{bad}' should be rejected")
+
+    interval = IntervalSchedule(900).next_after(start)
+    assert interval > start and interval.timestamp() % 900 == 0
+    print("✓ Cron and interval schedules compute the next run")
+
+
+def test_daemon_reloads_inventory_when_file_changes():
+    """The daemon reuses the loaded inventory and reloads it only after the file changes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'switches.txt')
+        with open(path, 'w') as f:
+            f.write('10.0.0.1\n')
+
+        loads = []
+
+        def loader(inventory_path):
+            with open(inventory_path) as f:
+                switches = [{'host': line.strip()} for line in f if line.strip()]
+            loads.append(len(switches))
+            return switches
+
+        stop = threading.Event()
+        swept = []
+
+        def sweep(switches, stagger):
+            swept.append((len(switches), stagger))
+            if len(swept) == 2:
+                with open(path, 'a') as f:
+                    f.write('10.0.0.2\n')
+            if len(swept) == 3:
+                stop.set()
+
+        run_daemon(IntervalSchedule(0.05), sweep, InventoryWatcher(path, loader),
+                   stagger_fraction=0.5, run_now=True, stop_event=stop)
+
+    assert [count for count, _ in swept] == [1, 1, 2]
+    assert loads == [1, 2]
+    assert all(0 < stagger <= 0.05 for _, stagger in swept)
+    print("✓ Daemon swept 3 times and reloaded the changed inventory once")
+
+
+if __name__ == "__main__":
+    test_cron_next_run()
+    test_daemon_reloads_inventory_when_file_changes()
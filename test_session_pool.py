@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+from benchmark_poller import FakeSSHDevice, make_inventory
+from poller import poll_switches
+from session_pool import SessionPool
+
+
+def test_sessions_reused_across_sweeps():
+    """Second sweep reuses every session; a dead one is replaced transparently"""
+    inventory = make_inventory(6)
+    devices = []
+
+    def connect(**params):
+        device = FakeSSHDevice(connect_latency=0.0, command_latency=0.0, **params)
+        devices.append(device)
+        return device
+
+    with SessionPool(connect=connect, keepalive=0) as pool:
+        poll_switches(inventory, ['show env temp'], max_workers=3, pool=pool)
+        assert len(devices) == 6 and all(d.alive for d in devices)
+
+        devices[2].alive = False  # e.g. the switch reloaded between sweeps
+        results = poll_switches(inventory, ['show env temp'], max_workers=3, pool=pool)
+        assert all(r['error'] is None and r['outputs'] for r in results)
+        assert len(devices) == 7
+        assert pool.stats()['reused'] == 5 and pool.stats()['reconnects'] == 1
+
+        # A session that dies mid-command is retried once on a fresh connection
+        def broken_send(command, **kwargs):
+            raise OSError("Socket is closed")
+        devices[0].send_command = broken_send
+        results = poll_switches(inventory, ['show env temp'], max_workers=3, pool=pool)
+        assert results[0]['error'] is None and len(devices) == 8
+
+    assert not any(d.alive for d in devices)
+    print("✓ Pooled sessions are reused across sweeps and replaced when dead")
+
+
+def test_pool_caps_open_sessions():
+    """Idle sessions beyond max_sessions are closed, least recently used first"""
+    inventory = make_inventory(10)
+    devices = []
+
+    def connect(**params):
+        device = FakeSSHDevice(connect_latency=0.0, command_latency=0.0, **params)
+        devices.append(device)
+        return device
+
+    with SessionPool(connect=connect, max_sessions=4, keepalive=0) as pool:
+        poll_switches(inventory, ['show env temp'], max_workers=1, pool=pool)
+        assert pool.stats()['open'] == 4
+        assert [d.host for d in devices if d.alive] == [s['host'] for s in inventory[-4:]]
+
+        assert pool.retain([inventory[-1]['host']]) == 3
+        devices[-1].alive = False
+        assert pool.probe_idle() == 1 and len(pool) == 0
+    print("✓ Session pool stays within its cap and drops removed or dead sessions")
+
+
+if __name__ == "__main__":
+    test_sessions_reused_across_sweeps()
+    test_pool_caps_open_sessions()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+from email.mime.text import MIMEText
+
+from fake_smtp_server import FakeSMTPServer
+from smtp_delivery import SMTPDelivery
+
+
+def _message(subject):
+    msg = MIMEText(f"Body of {subject}")
+    msg['Subject'] = subject
+    return msg
+
+
+def test_batch_uses_one_connection():
+    """Several messages go out over a single SMTP session"""
+    with FakeSMTPServer() as server, tempfile.TemporaryDirectory() as spool:
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=spool) as delivery:
+            for number in range(5):
+                assert delivery.send(_message(f"report {number}"), 'monitor@example.com', ['a@example.com', 'b@example.com'])
+        assert delivery.connections_opened == 1
+        assert server.sessions == 1
+        assert len(server.messages) == 5
+        assert server.messages[0]['recipients'] == ['a@example.com', 'b@example.com']
+    print("✓ Batch of 5 emails sent over one SMTP connection")
+
+
+def test_retry_then_spool_and_flush():
+    """Dropped connections are retried; mail that still fails is spooled and delivered later"""
+    with FakeSMTPServer(drop_first=2) as server, tempfile.TemporaryDirectory() as spool:
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, max_retries=3, backoff=0, spool_dir=spool) as delivery:
+            assert delivery.send(_message('after retries'), 'monitor@example.com', ['a@example.com'])
+        assert server.sessions == 3 and len(server.messages) == 1
+
+        server.drop_first = server.sessions + 10
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, max_retries=1, backoff=0, spool_dir=spool) as delivery:
+            assert not delivery.send(_message('spooled'), 'monitor@example.com', ['a@example.com'])
+        assert len([name for name in os.listdir(spool) if name.endswith('.eml')]) == 1
+
+        server.drop_first = 0
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=spool) as delivery:
+            assert delivery.flush_spool() == (1, 0)
+        assert os.listdir(spool) == []
+        assert b'Subject: spooled' in server.messages[-1]['data']
+    print("✓ Transient failures are retried, spooled and flushed")
+
+
+def test_send_file_streams_message():
+    """A message file is streamed with dot-stuffing and spooled as a file when delivery fails"""
+    with FakeSMTPServer() as server, tempfile.TemporaryDirectory() as spool:
+        message_filename = os.path.join(spool, 'message.eml')
+        with open(message_filename, 'wb') as f:
+            f.write(b'Subject: streamed\r\n\r\nfirst line\r\n.leading dot\r\n' + b'x' * 76 * 2000 + b'\r\n')
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=spool) as delivery:
+            assert delivery.send_file(message_filename, 'monitor@example.com', ['a@example.com'])
+        with open(message_filename, 'rb') as f:
+            assert server.messages[0]['data'] == f.read()
+
+        server.drop_first = server.sessions + 10
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, max_retries=0, spool_dir=spool) as delivery:
+            assert not delivery.send_file(message_filename, 'monitor@example.com', ['a@example.com'])
+        os.remove(message_filename)
+        server.drop_first = 0
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=spool) as delivery:
+            assert delivery.flush_spool() == (1, 0)
+        assert server.messages[-1]['data'] == server.messages[0]['data']
+    print("✓ Message files are streamed, spooled and flushed")
+
+
+def test_rejected_mail_does_not_block_spool():
+    """A refused recipient is not spooled, and a spooled message the server rejects is moved aside"""
+    with FakeSMTPServer(refuse=['gone@example.com']) as server, tempfile.TemporaryDirectory() as spool:
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=spool) as delivery:
+            assert not delivery.send(_message('refused'), 'monitor@example.com', ['gone@example.com'])
+        assert os.listdir(spool) == []
+
+        # Spooled while the server was down, oldest first: the refused one must not hold up the other
+        with SMTPDelivery('127.0.0.1', 1, use_tls=False, max_retries=0, spool_dir=spool, timeout=2) as delivery:
+            assert not delivery.send(_message('to gone'), 'monitor@example.com', ['gone@example.com'])
+            assert not delivery.send(_message('to noc'), 'monitor@example.com', ['noc@example.com'])
+        assert len([name for name in os.listdir(spool) if name.endswith('.eml')]) == 2
+
+        with SMTPDelivery('127.0.0.1', server.port, use_tls=False, backoff=0, spool_dir=spool) as delivery:
+            assert delivery.flush_spool() == (1, 0)
+        assert b'Subject: to noc' in server.messages[-1]['data']
+        assert os.listdir(spool) == ['failed'] and len(os.listdir(os.path.join(spool, 'failed'))) == 2
+    print("✓ Permanently rejected mail is dead-lettered instead of blocking the spool")
+
+
+if __name__ == "__main__":
+    test_batch_uses_one_connection()
+    test_retry_then_spool_and_flush()
+    test_send_file_streams_message()
+    test_rejected_mail_does_not_block_spool()
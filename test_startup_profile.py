@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+
+from startup_profile import HEAVY_MODULES, DEFAULT_STARTUP_BUDGET_MS, profile_startup
+
+
+def test_startup_imports_no_heavy_modules():
+    """Importing checktemp_enhanced leaves netmiko, reportlab, openpyxl, smtplib etc. for later stages"""
+    profile = profile_startup()
+    stages = {stage: imports for stage, imports, _ in profile}
+    assert list(stages) == ['startup', 'inventory', 'poll', 'history', 'pdf', 'email']
+
+    startup = [name for name, _, _, _ in stages['startup']]
+    assert 'checktemp_enhanced' in startup
+    eager = [name for name in startup if any(name == heavy or name.startswith(heavy + '.') for heavy in HEAVY_MODULES)]
+    assert eager == [], eager
+    assert any(name.startswith('reportlab') for name, _, _, _ in stages['pdf'])
+
+    startup_ms = sum(cumulative for _, _, cumulative, depth in stages['startup'] if depth == 0) / 1000
+    print(f"✓ Cold start imports took {startup_ms:.1f} ms (budget {DEFAULT_STARTUP_BUDGET_MS} ms), no heavy modules")
+
+
+if __name__ == "__main__":
+    test_startup_imports_no_heavy_modules()
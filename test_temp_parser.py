@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+from benchmark_parser import SAMPLE_OUTPUTS
+from temp_parser import parse_env_temp, reading_severity, line_severities
+from checktemp_enhanced import analyze_output_for_alerts
+
+
+def test_platform_variants():
+    """Each platform variant parses into numeric readings with thresholds"""
+    ios = parse_env_temp(SAMPLE_OUTPUTS['ios'].format(t1=41, t2=0), 'ios')
+    assert [(r.sensor, r.celsius, r.yellow, r.red, r.state) for r in ios] == [
+        ('System', None, None, None, 'OK'), ('System', 41.0, 66.0, 76.0, 'GREEN')]
+
+    stack = parse_env_temp(SAMPLE_OUTPUTS['iosxe_stack'].format(t1=50, t2=48), 'iosxe')
+    values = [r for r in stack if r.celsius is not None]
+    assert [(r.switch, r.sensor, r.celsius) for r in values] == [
+        ('1', 'Inlet', 50.0), ('1', 'Hotspot', 48.0), ('2', 'Inlet', 50.0)]
+    # 50C is over the 46C yellow threshold even though the device still says GREEN
+    assert reading_severity(values[0]) == 'warning'
+    assert reading_severity(values[1]) == 'ok'
+
+    c9k = parse_env_temp(SAMPLE_OUTPUTS['iosxe_c9k'].format(t1=32, t2=120))
+    assert [(r.sensor, r.celsius, r.yellow, r.red) for r in c9k] == [
+        ('Temp: Inlet', 32.0, 35.0, 40.0), ('Temp: Coretemp', 120.0, 107.0, 117.0)]
+    assert reading_severity(c9k[1]) == 'critical'
+
+    nxos = parse_env_temp(SAMPLE_OUTPUTS['nxos'].format(t1=33, t2=75), 'nxos')
+    assert [(r.sensor, r.celsius, r.yellow, r.red) for r in nxos] == [
+        ('FRONT', 33.0, 70.0, 80.0), ('BACK', 75.0, 42.0, 70.0), ('CPU', 75.0, 80.0, 90.0)]
+    assert [reading_severity(r) for r in nxos] == ['ok', 'critical', 'ok']
+    print("✓ IOS, IOS-XE stack, Catalyst 9k and NX-OS outputs parse into numeric readings")
+
+
+def test_threshold_rows_are_not_alerts():
+    """Threshold labels containing 'critical' or 'warning' no longer raise alerts"""
+    output = """SYSTEM TEMPERATURE is OK
+System Temperature Value: 41 Degree Celsius
+System Temperature State: GREEN
+Yellow Threshold / Warning : 66 Degree Celsius
+Red Threshold    : 76 Degree Celsius
+Critical threshold: 80C"""
+    assert line_severities(output) == {}
+
+    report = f"Start Script at Time: now\n\n --- Output of show env temp on SW-CORE-01 \n{output}\n\n"
+    warning_hosts, critical_hosts, _, _ = analyze_output_for_alerts(report)
+    assert warning_hosts == [] and critical_hosts == []
+    print("✓ Threshold rows are not misclassified as alerts")
+
+
+if __name__ == "__main__":
+    test_platform_variants()
+    test_threshold_rows_are_not_alerts()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import tracing
+
+
+def test_spans_summary_and_trace_files():
+    """Spans from worker threads are collected, summarised per stage and written as Chrome trace events"""
+    assert tracing.get_tracer() is None
+    with tracing.span('connect', host='10.0.0.1') as span:
+        span.set(ignored=True)  # no tracer installed: a shared no-op span
+
+    tracer = tracing.Tracer()
+    previous = tracing.set_tracer(tracer)
+    try:
+        def poll(host):
+            with tracing.span('connect', host=host):
+                time.sleep(0.01)
+            with tracing.span('command', host=host, command='show env temp'):
+                pass
+
+        threads = [threading.Thread(target=poll, args=(f'10.0.0.{n}',)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        try:
+            with tracing.span('pdf'):
+                raise RuntimeError('disk full')
+        except RuntimeError:
+            pass
+    finally:
+        tracing.set_tracer(previous)
+
+    summary = {name: (count, total) for name, count, total, _, _ in tracer.summary()}
+    assert [name for name, _, _, _, _ in tracer.summary()] == ['connect', 'command', 'pdf']
+    assert summary['connect'][0] == 4 and summary['connect'][1] >= 0.04
+    assert 'command' in tracer.format_summary() and 'Wall time' in tracer.format_summary()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chrome_path = os.path.join(tmp, 'trace.json')
+        tracer.write(chrome_path, 'chrome')
+        with open(chrome_path) as f:
+            events = json.load(f)['traceEvents']
+        assert len(events) == 9 and {event['ph'] for event in events} == {'X'}
+        assert len({event['tid'] for event in events if event['name'] == 'connect'}) == 4
+        assert [e['args'] for e in events if e['name'] == 'pdf'] == [{'error': 'RuntimeError: disk full'}]
+
+        json_path = os.path.join(tmp, 'trace_spans.json')
+        tracer.write(json_path, 'json')
+        with open(json_path) as f:
+            data = json.load(f)
+        assert data['summary'][0]['name'] == 'connect' and len(data['spans']) == 9
+    print("✓ Tracer summarises stages and writes JSON / Chrome trace files")
+
+
+if __name__ == "__main__":
+    test_spans_summary_and_trace_files()
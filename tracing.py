@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Lightweight tracing for a sweep
+Spans time each stage (inventory load, per-device connect and command, analysis,
+PDF build, MIME encoding, SMTP send) so a slow sweep shows where the time went.
+Prints a per-stage summary table and writes JSON or Chrome trace-event files
+(open in chrome://tracing or https://ui.perfetto.dev)
+
+Tracing is off unless a Tracer is installed with set_tracer(); until then span()
+returns a shared no-op context manager, so instrumented code pays almost nothing.
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRACE_FORMATS = ('json', 'chrome')
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'attrs', 'start')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs['error'] = f"{exc_type.__name__}: {exc_value}"
+        # list.append is atomic, so worker threads can record spans without a lock
+        self.tracer.spans.append((self.name, self.start, end - self.start, threading.get_ident(), self.attrs))
+        return False
+
+    def set(self, **attrs):
+        """
+        Add attributes known only once the span is running (e.g. bytes sent)
+        """
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    Records finished spans as (name, start_ns, duration_ns, thread_id, attrs)
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.origin = time.perf_counter_ns()
+        self.started_at = time.time()
+
+    def span(self, name, **attrs):
+        return _Span(self, name, attrs)
+
+    def summary(self):
+        """
+        Per-span-name totals, in order of first appearance: [(name, count, total_s, mean_s, max_s)]
+        """
+        stats = {}
+        for name, _, duration, _, _ in self.spans:
+            entry = stats.setdefault(name, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+        first_seen = {}
+        for name, start, _, _, _ in self.spans:
+            first_seen[name] = min(first_seen.get(name, start), start)
+        return [(name, count, total / 1e9, total / count / 1e9, longest / 1e9)
+                for name, (count, total, longest) in sorted(stats.items(), key=lambda item: first_seen[item[0]])]
+
+    def format_summary(self):
+        """
+        Summary table; spans on worker threads overlap, so their totals can exceed the wall time
+        """
+        wall = (max((start + duration for _, start, duration, _, _ in self.spans), default=self.origin)
+                - self.origin) / 1e9
+        lines = [f"{'Stage':<14} {'Count':>7} {'Total s':>9} {'Mean ms':>9} {'Max ms':>9}"]
+        for name, count, total, mean, longest in self.summary():
+            lines.append(f"{name:<14} {count:>7} {total:>9.3f} {mean * 1000:>9.1f} {longest * 1000:>9.1f}")
+        lines.append(f"Wall time {wall:.3f}s, {len(self.spans)} spans")
+        return '\n'.join(lines)
+
+    def to_json(self):
+        return {
+            'started_at': self.started_at,
+            'spans': [{'name': name, 'start_ms': (start - self.origin) / 1e6, 'duration_ms': duration / 1e6,
+                       'thread': thread, 'attrs': attrs}
+                      for name, start, duration, thread, attrs in self.spans],
+            'summary': [{'name': name, 'count': count, 'total_s': total, 'mean_s': mean, 'max_s': longest}
+                        for name, count, total, mean, longest in self.summary()],
+        }
+
+    def to_chrome_trace(self):
+        """
+        Chrome trace-event format: one complete ('X') event per span, microsecond timestamps
+        """
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for name, start, duration, thread, attrs in self.spans:
+            tid = threads.setdefault(thread, len(threads) + 1)
+            events.append({'name': name, 'ph': 'X', 'ts': (start - self.origin) / 1000, 'dur': duration / 1000,
+                           'pid': pid, 'tid': tid, 'args': {key: str(value) for key, value in attrs.items()}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path, fmt='chrome'):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{fmt}' (expected one of: {', '.join(TRACE_FORMATS)})")
+        data = self.to_chrome_trace() if fmt == 'chrome' else self.to_json()
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            logger.info(f"Trace written to {path} ({fmt}, {len(self.spans)} spans)")
+        except OSError as e:
+            logger.warning(f"Could not write trace to {path}: {str(e)}")
+
+
+_tracer = None
+
+
+def set_tracer(tracer):
+    """
+    Install the tracer that span() records into (None turns tracing off); returns the previous one
+    """
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(name, **attrs):
+    """
+    Context manager timing one stage: `with tracing.span('connect', host=host): ...`
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, **attrs)